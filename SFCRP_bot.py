@@ -5,17 +5,135 @@ from discord.ui import View, Button
 import json
 import os
 import logging
+import shutil
 import sys
 from dotenv import load_dotenv
+import metrics
+import diagnostics
+import recorder
+import guild_config
 
 
 load_dotenv()
 
+# Lean gateway mode: no member chunking at startup and no discord.py member cache.
+# Members who interact are kept in a bounded LRU (staff pinned) and everything else is
+# fetched over REST on demand. Saves startup time and RSS on large servers.
+LEAN_GATEWAY = os.getenv("LEAN_GATEWAY", "").lower() in ("1", "true", "yes")
+LEAN_MEMBER_CACHE_SIZE = int(os.getenv("LEAN_MEMBER_CACHE_SIZE", "5000"))
+
 intents = discord.Intents.default()
-intents.message_content = True
+# Only the !stup/!dqa prefix commands in status.py need message content. Lean mode drops it;
+# mentioning the bot still works without the intent (@Bot stup), and /stup covers the rest.
+intents.message_content = not LEAN_GATEWAY
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# ------------------------
+# Command Throttling
+# ------------------------
+import time
+from collections import OrderedDict
+
+# (burst capacity, seconds to refill one token) per scope, keyed by command name.
+# "user" limits one member on that command, "guild" limits the whole server on it.
+COMMAND_RATE_LIMITS = {
+    "logrp": {"user": (3, 60), "guild": (30, 2)},
+    "rplog": {"user": (5, 10)},
+    "rpleaderboard": {"user": (3, 30), "guild": (20, 3)},
+    "rpsearch": {"user": (5, 10), "guild": (30, 1)},
+    "sessionstatus": {"user": (5, 10)},
+    "sessionhistory": {"user": (3, 20)},
+    "sessionstats": {"user": (3, 20)},
+    "profile": {"user": (5, 10)},
+}
+DEFAULT_COMMAND_RATE_LIMIT = {"user": (10, 6)}
+GLOBAL_USER_RATE_LIMIT = (20, 3)  # Across all commands, per member
+MAX_TOKEN_BUCKETS = 50_000  # Hard cap; past it the least recently used bucket goes even if not yet full
+
+class TokenBuckets:
+    """Token buckets in an LRU map so idle buckets (which would be full again anyway) can be evicted in O(1)"""
+
+    def __init__(self):
+        self.buckets = OrderedDict()  # key -> [tokens, updated_at, capacity, refill_seconds]
+
+    def _refill(self, key, capacity, refill_seconds, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(capacity), now, capacity, refill_seconds]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) / refill_seconds)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def _evict_idle(self, now, count):
+        # The front of the LRU is the least recently touched bucket
+        for _ in range(count):
+            if not self.buckets:
+                return
+            key, (tokens, updated_at, capacity, refill_seconds) = next(iter(self.buckets.items()))
+            if now - updated_at < (capacity - tokens) * refill_seconds and len(self.buckets) + count <= MAX_TOKEN_BUCKETS:
+                return
+            del self.buckets[key]
+
+    def take(self, limits):
+        """
+        Take one token from every (key, capacity, refill_seconds) bucket, or none of them.
+        Returns 0 on success, otherwise the seconds until all buckets have a token.
+        """
+        now = time.monotonic()
+        # Make room for as many buckets as this call can create, plus one so churn shrinks the map
+        self._evict_idle(now, len(limits) + 1)
+        buckets = [self._refill(key, capacity, refill_seconds, now) for key, capacity, refill_seconds in limits]
+
+        retry_after = max((1 - bucket[0]) * bucket[3] for bucket in buckets)
+        if retry_after > 0:
+            return retry_after
+
+        for bucket in buckets:
+            bucket[0] -= 1
+        return 0
+
+command_buckets = TokenBuckets()
+
+class ThrottledCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+
+        # Autocomplete fires per keystroke and is served from memory, so it is not throttled
+        if interaction.type is discord.InteractionType.autocomplete:
+            return True
+
+        command_name = interaction.command.qualified_name if interaction.command else interaction.data.get("name", "unknown")
+        if metrics.METRICS_PORT:
+            metrics.start_ack_watch(interaction, command_name)
+        command_limits = COMMAND_RATE_LIMITS.get(command_name.split()[0], DEFAULT_COMMAND_RATE_LIMIT)
+
+        limits = [(("user", interaction.user.id), *GLOBAL_USER_RATE_LIMIT)]
+        if "user" in command_limits:
+            limits.append((("user", interaction.user.id, command_name), *command_limits["user"]))
+        if "guild" in command_limits:
+            limits.append((("guild", interaction.guild_id, command_name), *command_limits["guild"]))
+
+        retry_after = command_buckets.take(limits)
+        if retry_after:
+            logger.info(f"Throttled /{command_name} for {interaction.user} (ID: {interaction.user.id}), retry in {retry_after:.1f}s")
+            await interaction.response.send_message(
+                f"⏳ Slow down! You can use `/{command_name}` again <t:{int(time.time() + retry_after) + 1}:R>.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+# Auto-sharded so one process can serve the sister servers as they are added
+if LEAN_GATEWAY:
+    bot = commands.AutoShardedBot(
+        command_prefix=commands.when_mentioned_or("!"), intents=intents, tree_cls=ThrottledCommandTree,
+        chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none()
+    )
+else:
+    bot = commands.AutoShardedBot(command_prefix="!", intents=intents, tree_cls=ThrottledCommandTree)
+metrics.gateway_latency.function = lambda: bot.latency
 
 # ------------------------
 # Logging Setup
@@ -37,32 +155,80 @@ logger = logging.getLogger('discord_bot')
 # ------------------------
 # Constants
 # ------------------------
+# The home guild and its IDs. Other guilds, and overrides for this one, come from
+# guild_config.json; code reads them through guild_configs, never these constants.
 GUILD_ID = 1427147442411012149
+OWNER_ID = 1185802371062833152
 
 # Role IDs
 ROLE_STAFF_ADMIN = 1427161909349843004
 ROLE_STAFF_MODERATOR = 1427161368804589738
 ROLE_RP_LOGGER = 1427472685499289670
+ALLOWED_ROLES = [ROLE_STAFF_ADMIN, ROLE_STAFF_MODERATOR]  # Admin & Moderator
+PING_ROLE_ID = 1428247832229318727
+TRAINING_PING_ROLE_ID = 1428228426179018762
+SESSION_HOST_ROLE_ID = 1427472494151077938
 
 # Channel IDs
 CHANNEL_PROMOTIONS = 1427471492572119170
 CHANNEL_INFRACTIONS = 1427471662881837139
 CHANNEL_RP_LOGS = 1429695512910757961
+ANNOUNCE_CHANNEL_ID = 1427153224330248213
+STATUS_CHANNEL_ID = 1427153224330248213
+TRAINING_CHANNEL_ID = 1431693846357479636
+TRAINING_RESULTS_CHANNEL_ID = 1428231048575058030
+AFFILIATE_CHANNEL_ID = 1427152315902591137
+
+SSU_VOTE_GOAL = 5
+LOW_PLAYER_THRESHOLD = 3  # Alert when players drop below this
 
 # URLs
 PROMOTION_BANNER_URL = "https://media.discordapp.net/attachments/1427516887427846204/1432044703905353871/SFCRP_Promo_banner.png?ex=68ff9f0f&is=68fe4d8f&hm=c6fc60cf07e0c8f9a290a374176762b1ec0d6733bbc59758fc931ca7d679143a&=&format=webp&quality=lossless"
 INFRACTION_BANNER_URL = "https://media.discordapp.net/attachments/1427516887427846204/1432073959506968759/Infractions.png?ex=68ffba4e&is=68fe68ce&hm=808f9a7fc30d3e1d81ec79eea1e2d6323b4d47cab8773bc9a6c24c43862092d1&=&format=webp&quality=lossless"
 ROLEPLAY_BANNER_URL= "https://media.discordapp.net/attachments/1427494059257233449/1432155262566793418/Game_log.png?ex=69000606&is=68feb486&hm=01bb72f8cea2e76f9ef49dd10b80d85ebde94f93228bf0b104da9bb46c82672c&=&format=webp&quality=lossless"
+SESSION_BANNER_URL = "https://media.discordapp.net/attachments/1373459392241864716/1435519241381216268/Sessions.png?ex=690c42f9&is=690af179&hm=5032379abf5a4f35544453428ae2e425632760a9d1c72b950a1c5757c52e3621&=&format=webp&quality=lossless"
+training_banner_url = "https://media.discordapp.net/attachments/1373459392241864716/1436403102667505845/Training_sfcrp.png?ex=690f7a22&is=690e28a2&hm=5599508dbce650516a0774017e742f84e0c8127e236e01ef555e4f70ca83103a&=&format=webp&quality=lossless"
 # API Keys
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# ------------------------
+# Per-guild Config
+# ------------------------
+guild_configs = guild_config.GuildConfigStore(guild_config.GUILD_CONFIG_FILE, GUILD_ID, {
+    "staff_role_ids": ALLOWED_ROLES,
+    "rp_logger_role_id": ROLE_RP_LOGGER,
+    "ping_role_id": PING_ROLE_ID,
+    "training_ping_role_id": TRAINING_PING_ROLE_ID,
+    "announce_channel_id": ANNOUNCE_CHANNEL_ID,
+    "promotions_channel_id": CHANNEL_PROMOTIONS,
+    "infractions_channel_id": CHANNEL_INFRACTIONS,
+    "rp_logs_channel_id": CHANNEL_RP_LOGS,
+    "training_channel_id": TRAINING_CHANNEL_ID,
+    "training_results_channel_id": TRAINING_RESULTS_CHANNEL_ID,
+    "affiliate_channel_id": AFFILIATE_CHANNEL_ID,
+    "ssu_vote_goal": SSU_VOTE_GOAL,
+    "low_player_threshold": LOW_PLAYER_THRESHOLD,
+    "status_channel_id": STATUS_CHANNEL_ID,
+    "session_host_role_id": SESSION_HOST_ROLE_ID,
+    "owner_id": OWNER_ID,
+    "promotion_banner_url": PROMOTION_BANNER_URL,
+    "infraction_banner_url": INFRACTION_BANNER_URL,
+    "session_banner_url": SESSION_BANNER_URL,
+})
+guild_configs.load()
+# Cogs are loaded as extensions and reach the configs through the bot
+bot.guild_configs = guild_configs
+
+# Slash commands are registered per configured guild
+COMMAND_GUILDS = [discord.Object(id=guild_id) for guild_id in guild_configs.guild_ids]
+
 # ------------------------
 # Helper Functions
 # ------------------------
 def has_staff_permission(user: discord.Member) -> bool:
     """Check if user has staff permissions"""
-    allowed_roles = [ROLE_STAFF_ADMIN, ROLE_STAFF_MODERATOR]
-    return any(role.id in allowed_roles for role in user.roles)
+    guild = getattr(user, "guild", None)
+    return guild is not None and guild_configs.get(guild.id).is_staff(user)
 
 def require_staff_permission():
     """Decorator to check staff permission before executing command"""
@@ -73,6 +239,10 @@ def require_staff_permission():
         return True
     return app_commands.check(predicate)
 
+def require_specific_staff():
+    """Decorator for the session and training commands (same staff roles)"""
+    return require_staff_permission()
+
 async def send_dm_safe(member: discord.Member, content: str = None, embed: discord.Embed = None) -> bool:
     """
     Safely send a DM to a member. Returns True if successful, False otherwise.
@@ -91,18 +261,86 @@ async def send_dm_safe(member: discord.Member, content: str = None, embed: disco
         logger.error(f"Failed to DM {member} (ID: {member.id}): {e}", exc_info=True)
         return False
 
-@bot.event
-async def on_ready():
-    """Bot startup event handler"""
-    logger.info(f"Logged in as {bot.user}")
+# ------------------------
+# Member Cache (lean gateway mode)
+# ------------------------
+class MemberCache:
+    """Bounded LRU of members seen in lean mode; staff are pinned and never evicted"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.members = OrderedDict()  # (guild ID, member ID) -> Member
+        self.pinned = {}              # (guild ID, member ID) -> Member
+
+    def get(self, guild_id, member_id):
+        key = (guild_id, member_id)
+        member = self.pinned.get(key)
+        if member is None:
+            member = self.members.get(key)
+            if member is not None:
+                self.members.move_to_end(key)
+        return member
+
+    def add(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        if has_staff_permission(member):
+            self.members.pop(key, None)
+            self.pinned[key] = member
+            return
+        self.pinned.pop(key, None)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        while len(self.members) > self.capacity:
+            self.members.popitem(last=False)
+
+    def discard(self, guild_id, member_id):
+        self.members.pop((guild_id, member_id), None)
+        self.pinned.pop((guild_id, member_id), None)
+
+    def __len__(self):
+        return len(self.members) + len(self.pinned)
+
+member_cache = MemberCache(LEAN_MEMBER_CACHE_SIZE)
+
+def find_member(guild: discord.Guild, member_id) -> discord.Member:
+    """Cached member from discord.py's cache or, in lean mode, the bounded member cache"""
+    member_id = int(member_id)
+    return guild.get_member(member_id) or member_cache.get(guild.id, member_id)
+
+async def fetch_member_cached(guild: discord.Guild, member_id) -> discord.Member:
+    """find_member, falling back to REST; raises like Guild.fetch_member"""
+    member = find_member(guild, member_id)
+    if member is None:
+        member = await guild.fetch_member(int(member_id))
+        if LEAN_GATEWAY:
+            member_cache.add(member)
+    return member
+
+def remember_member(member):
+    """Keep an interacting member around in lean mode, and findable by name for /logrp participants"""
+    if not LEAN_GATEWAY or not isinstance(member, discord.Member):
+        return
+    member_cache.add(member)
+    index = member_name_indexes.get(member.guild.id)
+    if index:
+        index.add_member(member)
+
+def move_global_commands_to_guilds():
+    """Cog commands (/stup) register globally; copy them into every command guild's tree instead"""
+    for guild in COMMAND_GUILDS:
+        bot.tree.copy_global_to(guild=guild)
+    bot.tree.clear_commands(guild=None)
+
+async def sync_guild_commands():
+    """Sync the slash commands to every configured guild"""
     logger.info("Starting command sync process...")
     
     try:
-        # Sync commands to the guild
-        bot.tree.clear_commands(guild=None)
+        move_global_commands_to_guilds()
         await bot.tree.sync()
-        synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID))
-        logger.info(f"Successfully synced {len(synced)} commands to guild {GUILD_ID}")
+        for guild_id in guild_configs.guild_ids:
+            synced = await bot.tree.sync(guild=discord.Object(id=guild_id))
+            logger.info(f"Successfully synced {len(synced)} commands to guild {guild_id}")
         
         # Log all synced commands
         for command in synced:
@@ -116,11 +354,31 @@ async def on_ready():
         # Don't exit, but make it clear there's an issue
 
 
+def record_command_latency(interaction: discord.Interaction, outcome):
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None and interaction.command:
+        metrics.command_latency.observe(time.perf_counter() - started_at, command=interaction.command.qualified_name, outcome=outcome)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    record_command_latency(interaction, "ok")
+
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    remember_member(interaction.user)
+    # Opt-in traffic capture for bench.replay; see recorder.py
+    if interaction_recorder is not None:
+        try:
+            interaction_recorder.record(interaction)
+        except Exception as e:
+            logger.warning(f"Failed to record interaction {interaction.id}: {e}")
+
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
     """Global error handler for all slash commands"""
     # Get command name safely
     command_name = interaction.command.name if interaction.command else "Unknown"
+    record_command_latency(interaction, "check_failed" if isinstance(error, app_commands.CheckFailure) else "error")
     
     if isinstance(error, app_commands.CheckFailure):
         # Permission errors are already handled by the decorator
@@ -148,18 +406,126 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
     except Exception as e:
         logger.error(f"Failed to send error message to user: {e}", exc_info=True)
 
+# ------------------------
+# 📚 Moderation Event Journal
+# ------------------------
+import asyncio
+import bisect
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+MODERATION_JOURNAL_FILE = "moderation_journal.jsonl"
+RECORD_PAGE_SIZE = 10
+
+class ModerationJournal:
+    """
+    Append-only JSONL journal of moderation events with in-memory (member ID, guild ID) -> byte
+    offsets and event type counts. File I/O runs off the event loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = defaultdict(list)         # (member ID, guild ID) -> byte offsets, ascending
+        self.type_counts = defaultdict(Counter)  # (member ID, guild ID) -> event type -> count
+        self.loaded = False
+        self.write_lock = asyncio.Lock()  # Keeps the offset read and the write of one append together
+
+    @metrics.time_storage("moderation_journal", "load")
+    def load(self):
+        """Scan the journal once to rebuild the per-member indexes"""
+        offsets = defaultdict(list)
+        type_counts = defaultdict(Counter)
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                offset = 0
+                line = b""
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        offsets[event["member_id"], event["guild_id"]].append(offset)
+                        type_counts[event["member_id"], event["guild_id"]][event["type"]] += 1
+                    except (ValueError, KeyError):
+                        logger.warning(f"Skipping unreadable moderation journal line at byte {offset}")
+                    offset += len(line)
+
+            # Terminate a line torn by a crash so the next append starts clean
+            if line and not line.endswith(b"\n"):
+                with open(self.path, 'ab') as f:
+                    f.write(b"\n")
+
+        self.offsets = offsets
+        self.type_counts = type_counts
+        self.loaded = True
+
+    async def ensure_loaded(self):
+        async with self.write_lock:
+            if not self.loaded:
+                await asyncio.to_thread(self.load)
+
+    def _write(self, line):
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+        return offset
+
+    async def append(self, event_type, guild_id, member, actor, **details):
+        """Write one typed event on a worker thread and index it under the member"""
+        event = {
+            "type": event_type,
+            "guild_id": str(guild_id),
+            "member_id": str(member.id),
+            "member_name": member.display_name,
+            "actor_id": str(actor.id),
+            "actor_name": actor.display_name,
+            "timestamp": datetime.utcnow().isoformat(),
+            **details
+        }
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        async with self.write_lock:
+            if not self.loaded:
+                await asyncio.to_thread(self.load)
+            offset = await asyncio.to_thread(self._write, line)
+            self.offsets[event["member_id"], event["guild_id"]].append(offset)
+            self.type_counts[event["member_id"], event["guild_id"]][event_type] += 1
+        return event
+
+    def page_for(self, member_id, guild_id, before=None, after=None):
+        """
+        Newest-first page of a member's events in one guild, older than the `before` byte offset
+        or newer than the `after` one, read by seeking. Returns ([(offset, event)], has_newer, has_older).
+        Run off the event loop after ensure_loaded().
+        """
+        offsets = self.offsets.get((str(member_id), str(guild_id)), [])
+        if after is not None:
+            start = bisect.bisect_right(offsets, after)
+            end = min(len(offsets), start + RECORD_PAGE_SIZE)
+        else:
+            end = bisect.bisect_left(offsets, before) if before is not None else len(offsets)
+            start = max(0, end - RECORD_PAGE_SIZE)
+
+        page = []
+        if start < end:
+            with open(self.path, 'rb') as f:
+                for offset in reversed(offsets[start:end]):
+                    f.seek(offset)
+                    page.append((offset, json.loads(f.readline())))
+
+        return page, end < len(offsets), start > 0
+
+moderation_journal = ModerationJournal(MODERATION_JOURNAL_FILE)
+
 # ------------------------
 # 📈 Promote Command
 # ------------------------
 
 
 # 🔹 /promote Command
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="promote", description="Promote a member with notes")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="promote", description="Promote a member with notes")
 @require_staff_permission()
 @app_commands.describe( member="Member to promote", new_rank="New rank/title for the member", reason="Reason for promotion (optional)")
 async def promote(interaction: discord.Interaction, member: discord.Member, new_rank: str, reason: str = "N/A"):
     banner_embed = discord.Embed(color=discord.Color.blue())
-    banner_embed.set_image(url=PROMOTION_BANNER_URL)
+    banner_embed.set_image(url=guild_configs.get(interaction.guild_id).promotion_banner_url)
 
     promo_embed = discord.Embed(title="📈 Staff Promotion",
         description=(f"**{member.mention}** has been promoted to **{new_rank}**!\n\n"
@@ -180,7 +546,7 @@ async def promote(interaction: discord.Interaction, member: discord.Member, new_
     dm_sent = await send_dm_safe(member, embed=dm_embed)
 
     # Get promotion channel
-    promo_channel = interaction.guild.get_channel(CHANNEL_PROMOTIONS)
+    promo_channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).promotions_channel_id)
     if not promo_channel:
         await interaction.response.send_message("❌ Promotion channel not found. Check the channel ID.", ephemeral=True)
         return
@@ -189,18 +555,21 @@ async def promote(interaction: discord.Interaction, member: discord.Member, new_
     await promo_channel.send(embed=banner_embed)
     await promo_channel.send(embed=promo_embed)
 
+    await moderation_journal.append("promotion", interaction.guild_id, member, interaction.user,
+                                    new_rank=new_rank, reason=reason, dm_sent=dm_sent)
+
     # Send confirmation response
     if dm_sent:
-        await interaction.response.send_message(f"✅ Promotion for {member.mention} logged in <#{CHANNEL_PROMOTIONS}> and DM sent.", ephemeral=True)
+        await interaction.response.send_message(f"✅ Promotion for {member.mention} logged in {promo_channel.mention} and DM sent.", ephemeral=True)
     else:
-        await interaction.response.send_message(f"✅ Promotion posted in <#{CHANNEL_PROMOTIONS}>, but I couldn't DM {member.mention}.", ephemeral=True)
+        await interaction.response.send_message(f"✅ Promotion posted in {promo_channel.mention}, but I couldn't DM {member.mention}.", ephemeral=True)
 
 
 
 # ------------------------
 # ⚠️ Infraction Command
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="infraction", description="Give a user an infraction")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="infraction", description="Give a user an infraction")
 @require_staff_permission()
 @app_commands.describe(
     member="Member to infract",
@@ -219,7 +588,7 @@ async def promote(interaction: discord.Interaction, member: discord.Member, new_
 async def infraction(interaction: discord.Interaction, member: discord.Member, reason: str, punishment: app_commands.Choice[str]):
     # Banner embed
     banner_embed = discord.Embed(color=discord.Color.blue())
-    banner_embed.set_image(url=INFRACTION_BANNER_URL)
+    banner_embed.set_image(url=guild_configs.get(interaction.guild_id).infraction_banner_url)
     
     # Infraction details embed
     infraction_embed = discord.Embed(
@@ -237,7 +606,7 @@ async def infraction(interaction: discord.Interaction, member: discord.Member, r
     dm_sent = await send_dm_safe(member, content=dm_message)
 
     # Get infractions channel
-    channel = bot.get_channel(CHANNEL_INFRACTIONS)
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).infractions_channel_id)
     if channel is None:
         await interaction.response.send_message("❌ Could not find the infractions log channel. Please check the channel ID.", ephemeral=True)
         return
@@ -246,16 +615,245 @@ async def infraction(interaction: discord.Interaction, member: discord.Member, r
     await channel.send(embed=banner_embed)
     await channel.send(embed=infraction_embed)
 
+    await moderation_journal.append("infraction", interaction.guild_id, member, interaction.user,
+                                    punishment=punishment.value, reason=reason, dm_sent=dm_sent)
+
     # Confirm privately
     if dm_sent:
-        await interaction.response.send_message(f"✅ Infraction for {member.mention} has been logged in <#{CHANNEL_INFRACTIONS}> and DM sent.", ephemeral=True)
+        await interaction.response.send_message(f"✅ Infraction for {member.mention} has been logged in {channel.mention} and DM sent.", ephemeral=True)
     else:
-        await interaction.response.send_message(f"✅ Infraction logged in <#{CHANNEL_INFRACTIONS}>, but I couldn't DM {member.mention}.", ephemeral=True)
+        await interaction.response.send_message(f"✅ Infraction logged in {channel.mention}, but I couldn't DM {member.mention}.", ephemeral=True)
+
+
+
+# ------------------------
+# 📚 /record Command
+# ------------------------
+RECORD_EVENT_LABELS = {
+    "infraction": "⚠️ Infraction",
+    "promotion": "📈 Promotion",
+    "training_result": "📋 Training",
+}
+
+def describe_moderation_event(event):
+    if event["type"] == "infraction":
+        return f"**{event['punishment']}** — {event['reason']}"
+    if event["type"] == "promotion":
+        return f"Promoted to **{event['new_rank']}** — {event['reason']}"
+    if event["type"] == "training_result":
+        return f"**{event['result'].title()}** — {event['notes']}"
+    return event["type"]
+
+def build_record_embed(member, counts, page):
+    embed = discord.Embed(
+        title=f"📚 Moderation Record — {member.display_name}",
+        description=" • ".join(f"{RECORD_EVENT_LABELS.get(t, t)}: **{n}**" for t, n in counts.items()),
+        color=discord.Color.blue()
+    )
+
+    for _, event in page:
+        issued = datetime.fromisoformat(event["timestamp"])
+        embed.add_field(
+            name=f"{RECORD_EVENT_LABELS.get(event['type'], event['type'])} • {issued.strftime('%b %d, %Y')}",
+            value=f"{describe_moderation_event(event)}\n*by {event['actor_name']}*"[:1024],
+            inline=False
+        )
+
+    embed.set_footer(text=f"Showing {len(page)} of {sum(counts.values())} events, newest first")
+    return embed
+
+class RecordView(View):
+    """Pages a moderation record with byte-offset cursors into the journal"""
+
+    def __init__(self, user_id, member, counts, page, has_newer, has_older):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.member = member
+        self.counts = counts
+        self.set_page(page, has_newer, has_older)
+
+    def set_page(self, page, has_newer, has_older):
+        self.newer_cursor = page[0][0] if page and has_newer else None
+        self.older_cursor = page[-1][0] if page and has_older else None
+        self.previous_button.disabled = self.newer_cursor is None
+        self.next_button.disabled = self.older_cursor is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("⚠️ Run `/record` yourself to page through a record.", ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction: discord.Interaction, before=None, after=None):
+        page, has_newer, has_older = await asyncio.to_thread(
+            moderation_journal.page_for, self.member.id, interaction.guild_id, before, after
+        )
+        if not page:
+            await interaction.response.send_message("📚 No more events in that direction.", ephemeral=True)
+            return
+        self.set_page(page, has_newer, has_older)
+        await interaction.response.edit_message(embed=build_record_embed(self.member, self.counts, page), view=self)
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, after=self.newer_cursor)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, before=self.older_cursor)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="record", description="View a member's moderation record")
+@require_staff_permission()
+@app_commands.describe(member="Member whose record to view")
+async def record(interaction: discord.Interaction, member: discord.Member):
+    await moderation_journal.ensure_loaded()
+    page, has_newer, has_older = await asyncio.to_thread(moderation_journal.page_for, member.id, interaction.guild_id)
+
+    if not page:
+        await interaction.response.send_message(f"📚 {member.mention} has a clean record.", ephemeral=True)
+        return
+
+    counts = Counter(moderation_journal.type_counts.get((str(member.id), str(interaction.guild_id)), {}))
+    view = RecordView(interaction.user.id, member, counts, page, has_newer, has_older)
+    await interaction.response.send_message(embed=build_record_embed(member, counts, page), view=view, ephemeral=True)
+
+
+# ------------------------
+# 🩺 Bot Diagnostics
+# ------------------------
+bot_started_at = time.time()
+gateway_ready_seconds = None  # Import to first on_ready
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="botperf", description="Show event-loop health and recent stalls (Staff only)")
+@require_staff_permission()
+async def botperf(interaction: discord.Interaction):
+    watchdog = diagnostics.watchdog
+    lag = metrics.loop_lag.quantiles(0.5, 0.95, 0.99).get((), (0, 0, 0))
+
+    embed = discord.Embed(title="🩺 Bot Performance", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+    embed.add_field(name="⏱️ Uptime", value=f"<t:{int(bot_started_at)}:R>", inline=True)
+    embed.add_field(name="📡 Gateway Latency", value=f"{bot.latency * 1000:.0f} ms", inline=True)
+    embed.add_field(
+        name="🚪 Gateway Mode",
+        value=f"{'Lean' if LEAN_GATEWAY else 'Full'}, ready in {gateway_ready_seconds:.1f}s" if gateway_ready_seconds else ('Lean' if LEAN_GATEWAY else 'Full'),
+        inline=True
+    )
+    embed.add_field(name="🔁 Loop Lag p50 / p95 / p99", value=" / ".join(f"{value * 1000:.1f} ms" for value in lag), inline=True)
+    embed.add_field(
+        name="🧱 Loop Stalls",
+        value=(
+            f"**{watchdog.stall_count}** over {diagnostics.STALL_THRESHOLD * 1000:.0f} ms\n"
+            f"Total: {watchdog.stall_seconds:.2f}s • Longest: {watchdog.longest_stall * 1000:.0f} ms"
+        ),
+        inline=False
+    )
+
+    recent = list(watchdog.recent_stalls)[-5:]
+    if recent:
+        embed.add_field(
+            name="🕒 Recent Stalls",
+            value="\n".join(f"<t:{int(stall['at'])}:R> — {stall['duration'] * 1000:.0f} ms in `{stall['where']}`" for stall in reversed(recent)),
+            inline=False
+        )
+
+    # Successful runs only; slowest p95 first
+    command_latencies = sorted(
+        ((dict(key)["command"], p50, p95) for key, (p50, p95) in metrics.command_latency.quantiles(0.5, 0.95).items() if dict(key)["outcome"] == "ok"),
+        key=lambda row: row[2], reverse=True
+    )
+    if command_latencies:
+        embed.add_field(
+            name="⌛ Command Latency (p50 / p95)",
+            value="\n".join(f"`/{name}` — {p50 * 1000:.0f} / {p95 * 1000:.0f} ms" for name, p50, p95 in command_latencies[:8]),
+            inline=False
+        )
+
+    task_lines = [
+        f"`rp_archive_task` — {diagnostics.loop_status(rp_archive_task)}",
+        f"`guild_config_watch_task` — {diagnostics.loop_status(guild_config_watch_task)}",
+        f"`job_scheduler` — {diagnostics.loop_status(job_scheduler.task)}",
+        f"`loop_watchdog` — {diagnostics.loop_status(watchdog.heartbeat_task)}",
+    ]
+    task_lines += [f"`rp_backfill` ({guild_id}) — {diagnostics.loop_status(task)}" for guild_id, task in rp_backfill_tasks.items()]
+    task_lines += [f"`{cog_name}.{attribute}` — {diagnostics.loop_status(loop)}" for cog_name, attribute, loop in diagnostics.cog_loops(bot)]
+    embed.add_field(name="🔄 Background Tasks", value="\n".join(task_lines), inline=False)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="botmem", description="Inspect memory usage and allocation growth (Staff only)")
+@require_staff_permission()
+@app_commands.describe(action="Summary, or start/diff/stop allocation tracing")
+@app_commands.choices(action=[
+    app_commands.Choice(name="Summary", value="summary"),
+    app_commands.Choice(name="Start allocation tracing", value="start"),
+    app_commands.Choice(name="Show growth since start", value="diff"),
+    app_commands.Choice(name="Stop allocation tracing", value="stop"),
+])
+async def botmem(interaction: discord.Interaction, action: app_commands.Choice[str] = None):
+    action = action.value if action else "summary"
+    tracer = diagnostics.memory_tracer
+    await interaction.response.defer(ephemeral=True)
+
+    if action == "start":
+        await asyncio.to_thread(tracer.start)
+        await interaction.followup.send("🧪 Allocation tracing started. Run `/botmem action:diff` later to see what grew, then `stop` to remove the overhead.", ephemeral=True)
+        return
+    if action == "stop":
+        tracer.stop()
+        await interaction.followup.send("🛑 Allocation tracing stopped.", ephemeral=True)
+        return
+    if action == "diff":
+        if not tracer.active:
+            await interaction.followup.send("⚠️ Allocation tracing is not running. Start it with `/botmem action:start`.", ephemeral=True)
+            return
+        growth = await asyncio.to_thread(tracer.diff)
+        embed = discord.Embed(
+            title="🧪 Allocation Growth",
+            description="\n".join(f"`{site}` — {diagnostics.format_bytes(size)} ({count:+} blocks)" for site, size, count in growth) or "No growth recorded.",
+            color=discord.Color.orange(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.set_footer(text=f"Since tracing started {datetime.utcfromtimestamp(tracer.started_at):%Y-%m-%d %H:%M} UTC")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
 
+    rss = diagnostics.process_rss()
+    views = diagnostics.count_live_views()
+    embed = discord.Embed(title="🧠 Bot Memory", color=discord.Color.blue(), timestamp=discord.utils.utcnow())
+    embed.add_field(name="💾 Process RSS", value=diagnostics.format_bytes(rss) if rss is not None else "Unavailable", inline=True)
+    embed.add_field(name="🧪 Allocation Tracing", value="On" if tracer.active else "Off", inline=True)
+    embed.add_field(
+        name="🗂️ Discord Caches",
+        value=(
+            f"Messages: **{len(bot.cached_messages)}**\n"
+            f"Members: **{sum(len(guild.members) for guild in bot.guilds)}**\n"
+            f"Lean member cache: **{len(member_cache)}** ({len(member_cache.pinned)} staff pinned)\n"
+            f"Users: **{len(bot.users)}**"
+        ),
+        inline=True
+    )
+    embed.add_field(
+        name=f"🧩 Live Views ({sum(views.values())})",
+        value="\n".join(f"`{name}` × {count}" for name, count in views.most_common(8)) or "None",
+        inline=True
+    )
+    embed.add_field(
+        name="📦 Bot State",
+        value=(
+            f"RP search index: **{sum(len(index.docs) for index in rp_search_indexes.values())}** logs, "
+            f"**{sum(len(index.postings) for index in rp_search_indexes.values())}** terms in {len(rp_search_indexes)} guild(s)\n"
+            f"Leaderboard cache: **{len(leaderboard_cache)}** entries\n"
+            f"Training registry: **{len(training_registry.trainings)}** trainings\n"
+            f"Scheduled jobs: **{len(job_scheduler.jobs)}**\n"
+            f"Rate-limit buckets: **{len(command_buckets.buckets)}**"
+        ),
+        inline=False
+    )
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
 
 # /say command
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="say", description="Make the bot say a message (staff only).")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="say", description="Make the bot say a message (staff only).")
 @require_staff_permission()
 @app_commands.describe(message="What should the bot say?")
 async def say(interaction: discord.Interaction, message: str):
@@ -272,187 +870,548 @@ async def say(interaction: discord.Interaction, message: str):
 # ------------------------
 # Training
 # ------------------------
+import threading
 
+TRAINING_ATTENDEES_FILE = "training_attendees.json"
+TRAINING_ATTENDEES_PAGE_SIZE = 20
+TRAINING_RETENTION_DAYS = 30  # Registries for older announcements are dropped on load
+TRAINING_SAVE_DELAY = 2  # Seconds to coalesce joins/leaves into one write
 
-@bot.tree.command(
-    guild=discord.Object(id=GUILD_ID),
-    name="stafftraining",
-    description="Create a staff training or ride-along announcement."
-)
-@require_staff_permission()
-@app_commands.describe(
-    session_type="Choose between Training or Ride Along",
-    notes="Add any important notes or instructions"
-)
-@app_commands.choices(session_type=[
-    app_commands.Choice(name="Training", value="Training"),
-    app_commands.Choice(name="Ride Along", value="Ride Along")
-])
-async def stafftraining(interaction: discord.Interaction, session_type: app_commands.Choice[str], notes: str):
-    # Channel where message will be sent
-    target_channel_id = 1431693846357479636
-    target_channel = interaction.guild.get_channel(target_channel_id)
+class TrainingRegistry:
+    """
+    Attendee lists per training announcement, keyed by message ID. Attendees and the
+    waitlist are dicts used as ordered sets: insertion order with O(1) join and leave.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.trainings = {}
+        self.save_task = None
+        self.write_lock = threading.Lock()
+        self.version = 0          # Bumped per snapshot, so an older write never lands over a newer one
+        self.written_version = 0
+
+    @metrics.time_storage("training_attendees", "load")
+    def load(self):
+        cutoff = discord.utils.utcnow() - timedelta(days=TRAINING_RETENTION_DAYS)
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except:
+                logger.error("Failed to read training attendees", exc_info=True)
+
+        self.trainings = {}
+        for message_id, training in data.items():
+            if discord.utils.snowflake_time(int(message_id)) < cutoff:
+                continue
+            self.trainings[int(message_id)] = {
+                "capacity": training.get("capacity"),
+                "attendees": dict.fromkeys(training.get("attendees", [])),
+                "waitlist": dict.fromkeys(training.get("waitlist", [])),
+            }
+
+    def snapshot(self):
+        return {
+            str(message_id): {
+                "capacity": training["capacity"],
+                "attendees": list(training["attendees"]),
+                "waitlist": list(training["waitlist"]),
+            }
+            for message_id, training in self.trainings.items()
+        }
+
+    @metrics.time_storage("training_attendees", "save")
+    def write(self, data, version):
+        # A thread lock, not an asyncio one: a cancelled save's thread can still be writing
+        with self.write_lock:
+            if version <= self.written_version:
+                return  # A newer snapshot already landed
+            write_json_atomic(self.path, data)
+            self.written_version = version
+
+    async def save(self):
+        """Snapshot the registry on the event loop and write it atomically on a worker thread"""
+        self.version += 1
+        await asyncio.to_thread(self.write, self.snapshot(), self.version)
+
+    def schedule_save(self):
+        """Coalesce bursts of joins into a single write a couple of seconds later"""
+        if self.save_task and not self.save_task.done():
+            return
+
+        async def delayed_save():
+            await asyncio.sleep(TRAINING_SAVE_DELAY)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to save training attendees: {e}", exc_info=True)
+
+        self.save_task = asyncio.create_task(delayed_save())
+
+    async def flush(self):
+        """Write a save that is still waiting out its delay right away (shutdown)"""
+        if self.save_task and not self.save_task.done():
+            self.save_task.cancel()
+            self.save_task = None
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to save training attendees: {e}", exc_info=True)
+
+    def create(self, message_id, capacity=None):
+        self.trainings[message_id] = {"capacity": capacity, "attendees": {}, "waitlist": {}}
+        self.schedule_save()
+
+    def join(self, message_id, member_id):
+        """Returns "joined", "waitlisted", "already_joined", "already_waitlisted" or None for an unknown training"""
+        training = self.trainings.get(message_id)
+        if training is None:
+            return None
+        if member_id in training["attendees"]:
+            return "already_joined"
+        if member_id in training["waitlist"]:
+            return "already_waitlisted"
+
+        if training["capacity"] and len(training["attendees"]) >= training["capacity"]:
+            training["waitlist"][member_id] = None
+            result = "waitlisted"
+        else:
+            training["attendees"][member_id] = None
+            result = "joined"
+        self.schedule_save()
+        return result
+
+    def leave(self, message_id, member_id):
+        """Returns (result, promoted member ID or None); result is "left", "left_waitlist", "not_joined" or None"""
+        training = self.trainings.get(message_id)
+        if training is None:
+            return None, None
+
+        if member_id in training["waitlist"]:
+            del training["waitlist"][member_id]
+            self.schedule_save()
+            return "left_waitlist", None
+        if member_id not in training["attendees"]:
+            return "not_joined", None
+
+        del training["attendees"][member_id]
+        promoted = None
+        if training["waitlist"]:
+            promoted = next(iter(training["waitlist"]))
+            del training["waitlist"][promoted]
+            training["attendees"][promoted] = None
+        self.schedule_save()
+        return "left", promoted
+
+training_registry = TrainingRegistry(TRAINING_ATTENDEES_FILE)
+training_view_registered = False
+
+def build_attendees_embed(training, page):
+    attendees = list(training["attendees"])
+    total_pages = max(1, (len(attendees) + TRAINING_ATTENDEES_PAGE_SIZE - 1) // TRAINING_ATTENDEES_PAGE_SIZE)
+    first = page * TRAINING_ATTENDEES_PAGE_SIZE
+    lines = [f"**{first + i}.** <@{member_id}>" for i, member_id in
+             enumerate(attendees[first:first + TRAINING_ATTENDEES_PAGE_SIZE], 1)]
+
+    capacity = f"/{training['capacity']}" if training["capacity"] else ""
+    embed = discord.Embed(
+        title=f"👋 Attendees ({len(attendees)}{capacity})",
+        description="\n".join(lines) or "No one has joined yet.",
+        color=discord.Color.blue()
+    )
+    footer = f"Page {page + 1}/{total_pages}"
+    if training["waitlist"]:
+        footer += f" • {len(training['waitlist'])} on the waitlist"
+    embed.set_footer(text=footer)
+    return embed
+
+class AttendeesPageView(View):
+    def __init__(self, training):
+        super().__init__(timeout=300)
+        self.training = training
+        self.page = 0
+        self.update_buttons()
+
+    def last_page(self):
+        return max(0, (len(self.training["attendees"]) - 1) // TRAINING_ATTENDEES_PAGE_SIZE)
+
+    def update_buttons(self):
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.last_page()
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=build_attendees_embed(self.training, self.page), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.last_page(), self.page + 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=build_attendees_embed(self.training, self.page), view=self)
+
+class StaffTrainingView(View):
+    """Persistent buttons shared by every announcement; state is looked up by the clicked message's ID"""
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Join", style=discord.ButtonStyle.success, custom_id="training_join")
+    async def join_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        result = training_registry.join(interaction.message.id, interaction.user.id)
+        messages = {
+            "joined": "✅ You joined the training!",
+            "waitlisted": "🕒 The training is full — you've been added to the waitlist.",
+            "already_joined": "⚠️ You've already joined this training!",
+            "already_waitlisted": "⚠️ You're already on the waitlist for this training.",
+            None: "❌ This training is no longer accepting sign-ups.",
+        }
+        await interaction.response.send_message(messages[result], ephemeral=True)
+
+    @discord.ui.button(label="Leave", style=discord.ButtonStyle.danger, custom_id="training_leave")
+    async def leave_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        result, promoted = training_registry.leave(interaction.message.id, interaction.user.id)
+        messages = {
+            "left": "👋 You left the training.",
+            "left_waitlist": "👋 You left the waitlist.",
+            "not_joined": "⚠️ You haven't joined this training.",
+            None: "❌ This training is no longer accepting sign-ups.",
+        }
+        await interaction.response.send_message(messages[result], ephemeral=True)
+
+        if promoted:
+            member = find_member(interaction.guild, promoted)
+            if member:
+                await send_dm_safe(member, content=f"✅ A spot opened up — you're now attending the training in {interaction.channel.mention}!")
+
+    @discord.ui.button(label="Attendees", style=discord.ButtonStyle.secondary, custom_id="training_attendees")
+    async def attendees_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        training = training_registry.trainings.get(interaction.message.id)
+        if training is None:
+            await interaction.response.send_message("❌ No attendee list for this training.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=build_attendees_embed(training, 0), view=AttendeesPageView(training), ephemeral=True)
 
+async def post_training_announcement(guild, host, session_type, notes, capacity=None):
+    """Post a training/ride-along announcement with sign-up buttons; returns the message or None"""
+    config = guild_configs.get(guild.id)
+    target_channel = guild.get_channel(config.training_channel_id)
     if not target_channel:
-        await interaction.response.send_message("❌ Could not find the target channel.", ephemeral=True)
-        return
+        return None
 
     # Role to ping
-    role_id = 1428228426179018762
-    role_mention = f"<@&{role_id}>"
+    role_mention = f"<@&{config.training_ping_role_id}>"
 
     # Build embed
     embed = discord.Embed(
-        title=f"🚔 Staff {session_type.value} Announcement",
+        title=f"🚔 Staff {session_type} Announcement",
         color=discord.Color.blue()
     )
-    embed.add_field(name="👮 **Host**", value=interaction.user.mention, inline=False)
-    embed.add_field(name="📝 **Type**", value=session_type.value, inline=True)
+    embed.add_field(name="👮 **Host**", value=host.mention, inline=False)
+    embed.add_field(name="📝 **Type**", value=session_type, inline=True)
+    if capacity:
+        embed.add_field(name="👥 **Capacity**", value=f"{capacity} attendees", inline=True)
     embed.add_field(name="🧾 **Notes**", value=notes, inline=False)
     embed.add_field(name="\U0001f517 Server code sftrain", value="", inline=False)
-    embed.set_footer(text=f"LAPD {session_type.value} Announcement")
-
-    # Buttons
-    class StaffTrainingView(View):
-        attendees = set()
-        def __init__(self, target_channel):
-            super().__init__(timeout=None)
-            self.target_channel = target_channel
-            join_button = Button(label="Join", style=discord.ButtonStyle.success)
-            join_button.callback = self.join_button_haandler
-            self.add_item(join_button)
-            attendees_button = Button(label="Attendees", style=discord.ButtonStyle.secondary)
-            attendees_button.callback = self.attendees_button_handler
-            self.add_item(attendees_button)
-
+    embed.set_footer(text=f"LAPD {session_type} Announcement")
 
-        async def join_button_haandler(self, interaction: discord.Interaction):
-                self.attendees.add(interaction.user.mention) 
-                await interaction.response.send_message(f"✅ You joined the training!", ephemeral=True)
+    # Send to specific channel
+    message = await target_channel.send(content=role_mention, embed=embed, view=StaffTrainingView())
+    training_registry.create(message.id, capacity)
+    return message
 
-        async def attendees_button_handler(self, interaction: discord.Interaction):
-            data = ','.join(self.attendees)
-            await interaction.response.send_message(f"👋 Attendees: {data}", ephemeral=True)
 
+@bot.tree.command(
+    guilds=COMMAND_GUILDS,
+    name="stafftraining",
+    description="Create a staff training or ride-along announcement."
+)
+@require_staff_permission()
+@app_commands.describe(
+    session_type="Choose between Training or Ride Along",
+    notes="Add any important notes or instructions",
+    capacity="Optional: maximum attendees; later sign-ups go to a waitlist"
+)
+@app_commands.choices(session_type=[
+    app_commands.Choice(name="Training", value="Training"),
+    app_commands.Choice(name="Ride Along", value="Ride Along")
+])
+async def stafftraining(interaction: discord.Interaction, session_type: app_commands.Choice[str], notes: str,
+                        capacity: app_commands.Range[int, 1, 500] = None):
+    message = await post_training_announcement(interaction.guild, interaction.user, session_type.value, notes, capacity)
 
-    view = StaffTrainingView(target_channel)
+    if not message:
+        await interaction.response.send_message("❌ Could not find the target channel.", ephemeral=True)
+        return
 
-    # Send to specific channel
-    await target_channel.send(content=role_mention, embed=embed, view=view)
-    await interaction.response.send_message(f"✅ Sent your {session_type.value.lower()} announcement to <#{target_channel_id}>!", ephemeral=True)
+    await interaction.response.send_message(f"✅ Sent your {session_type.value.lower()} announcement to {message.channel.mention}!", ephemeral=True)
 
 # ------------------------
-# ssu
+# Per-guild Storage
 # ------------------------
-# Constants
-# ------------------------
-GUILD_ID = 1427147442411012149
-ALLOWED_ROLES = [1427161909349843004, 1427161368804589738]  # Admin & Moderator
-ANNOUNCE_CHANNEL_ID = 1427153224330248213
-PING_ROLE_ID = 1428247832229318727
-SSU_VOTE_GOAL = 5
-SESSION_BANNER_URL = "https://media.discordapp.net/attachments/1427494059257233449/1437332565051838556/Sessions.png?ex=6912dbc3&is=69118a43&hm=0691c34703b71062a86e746bce58519edd38983937dfb381f5d0386810218140&=&format=webp&quality=lossless"
-training_banner_url= "https://media.discordapp.net/attachments/1373459392241864716/1436403102667505845/Training_sfcrp.png?ex=690f7a22&is=690e28a2&hm=5599508dbce650516a0774017e742f84e0c8127e236e01ef555e4f70ca83103a&=&format=webp&quality=lossless"
+# Sessions, RP logs (hot file and archive) and member profiles live under
+# guilds/<guild ID>/, so a command only ever reads its own guild's files.
+GUILD_DATA_DIR = "guilds"
+# Files from before per-guild storage that only ever held the home guild's data.
+# The legacy rp_logs.json and rp_archive/ tag each log with its guild and are split instead.
+LEGACY_GUILD_FILES = ["session_data.json", "rp_backfill_checkpoint.json"]
+
+def guild_data_path(guild_id, *parts):
+    return os.path.join(GUILD_DATA_DIR, str(guild_id), *parts)
+
+def write_json_atomic(path, data, **dump_options):
+    """Write JSON to a .tmp file and os.replace() it in, so readers and crashes never see half a file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **dump_options)
+    os.replace(tmp_path, path)
+
+def legacy_log_guild(log):
+    return log.get("guild_id") or str(GUILD_ID)
+
+def split_legacy_rp_logs():
+    """Give each guild its own share of the legacy rp_logs.json and rp_archive/ (log IDs are kept)"""
+    if os.path.exists("rp_logs.json"):
+        with open("rp_logs.json", 'r', encoding='utf-8') as f:
+            legacy_logs = json.load(f)
+        by_guild = defaultdict(list)
+        for log in legacy_logs:
+            by_guild[legacy_log_guild(log)].append(log)
+        for guild_id, logs in by_guild.items():
+            if not os.path.exists(guild_data_path(guild_id, RP_LOG_FILE)):
+                save_rp_logs(guild_id, logs)
+        os.remove("rp_logs.json")
+        logger.info(f"Split rp_logs.json into {len(by_guild)} guild(s)")
+
+    legacy_index_path = os.path.join(RP_ARCHIVE_DIR, RP_ARCHIVE_INDEX_FILE)
+    if os.path.exists(legacy_index_path):
+        with open(legacy_index_path, 'r', encoding='utf-8') as f:
+            legacy_index = json.load(f)
+        indexes = {}
+        for name, segment in legacy_index["segments"].items():
+            by_guild = defaultdict(list)
+            with gzip.open(os.path.join(RP_ARCHIVE_DIR, f"{name}.jsonl.gz"), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        log = json.loads(line)
+                        by_guild[legacy_log_guild(log)].append(log)
+
+            for guild_id, logs in by_guild.items():
+                if os.path.exists(guild_data_path(guild_id, RP_ARCHIVE_DIR, RP_ARCHIVE_INDEX_FILE)):
+                    continue  # Split by an earlier run
+                os.makedirs(guild_data_path(guild_id, RP_ARCHIVE_DIR), exist_ok=True)
+                tmp_path = rp_segment_path(guild_id, name) + ".tmp"
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    for log in logs:
+                        f.write(json.dumps(log, ensure_ascii=False) + "\n")
+                os.replace(tmp_path, rp_segment_path(guild_id, name))
+
+                index = indexes.setdefault(guild_id, {"next_id": legacy_index.get("next_id", 1), "segments": {}})
+                index["segments"][name] = {
+                    "month": segment["month"],
+                    "count": len(logs),
+                    "min_id": min(log["id"] for log in logs),
+                    "max_id": max(log["id"] for log in logs),
+                    "guilds": summarize_rp_logs(logs),
+                }
+
+        for guild_id, index in indexes.items():
+            save_rp_archive_index(guild_id, index)
+        shutil.rmtree(RP_ARCHIVE_DIR)
+        logger.info(f"Split {RP_ARCHIVE_DIR}/ into {len(indexes)} guild(s)")
+
+def migrate_legacy_storage():
+    """Move single-guild data files from the working directory into per-guild directories"""
+    split_legacy_rp_logs()
+
+    for name in LEGACY_GUILD_FILES:
+        target = guild_data_path(GUILD_ID, name)
+        if os.path.exists(name) and not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(name, target)
+            logger.info(f"Moved {name} to {target}")
+
+    # member_profiles.json was keyed by guild ID; split it into one file per guild
+    if os.path.exists(MEMBER_PROFILES_FILE):
+        with open(MEMBER_PROFILES_FILE, 'r', encoding='utf-8') as f:
+            legacy_profiles = json.load(f)
+        for guild_id, profiles in legacy_profiles.items():
+            if not os.path.exists(guild_data_path(guild_id, MEMBER_PROFILES_FILE)):
+                save_member_profiles(guild_id, profiles)
+        os.remove(MEMBER_PROFILES_FILE)
+        logger.info(f"Split {MEMBER_PROFILES_FILE} into {len(legacy_profiles)} guild(s)")
 
-# ------------------------
-# Decorator to restrict commands to specific staff roles
-# ------------------------
-def require_specific_staff():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        if not any(role.id in ALLOWED_ROLES for role in interaction.user.roles):
-            await interaction.response.send_message(
-                "⛔ You do not have permission to use this command.", ephemeral=True
-            )
-            return False
-        return True
-    return app_commands.check(predicate)
 # ------------------------
 # Enhanced Session Management System
 # ------------------------
-
+from datetime import datetime, timedelta
+import base64
+import bisect
 import json
 import os
 
-# Constants
-GUILD_ID = 1427147442411012149
-ALLOWED_ROLES = [1427161909349843004, 1427161368804589738]  # Admin & Moderator
-ANNOUNCE_CHANNEL_ID = 1427153224330248213
-PING_ROLE_ID = 1428247832229318727
-SSU_VOTE_GOAL = 5
-LOW_PLAYER_THRESHOLD = 3  # Alert when players drop below this
-SESSION_BANNER_URL = "https://media.discordapp.net/attachments/1373459392241864716/1435519241381216268/Sessions.png?ex=690c42f9&is=690af179&hm=5032379abf5a4f35544453428ae2e425632760a9d1c72b950a1c5757c52e3621&=&format=webp&quality=lossless"
-training_banner_url = "https://media.discordapp.net/attachments/1373459392241864716/1436403102667505845/Training_sfcrp.png?ex=690f7a22&is=690e28a2&hm=5599508dbce650516a0774017e742f84e0c8127e236e01ef555e4f70ca83103a&=&format=webp&quality=lossless"
-
 # Session data storage
 SESSION_DATA_FILE = "session_data.json"
-
-def load_session_data():
-    """Load session history from JSON"""
-    if os.path.exists(SESSION_DATA_FILE):
-        try:
-            with open(SESSION_DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {"sessions": [], "current_session": None}
-    return {"sessions": [], "current_session": None}
-
-def save_session_data(data):
-    """Save session data to JSON"""
-    with open(SESSION_DATA_FILE, 'w', encoding='utf-8') as f:
+SESSION_HISTORY_PAGE_SIZE = 5
+
+_session_data = {}  # str guild ID -> session data, its list kept sorted by start time
+
+@metrics.time_storage("sessions", "load")
+def load_session_data(guild_id):
+    """Load a guild's session history (cached in memory after the first read; only save_session_data changes it)"""
+    session_data = _session_data.get(str(guild_id))
+    if session_data is None:
+        session_data = {"sessions": [], "current_session": None}
+        path = guild_data_path(guild_id, SESSION_DATA_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    session_data = json.load(f)
+            except:
+                logger.error(f"Failed to read session data for guild {guild_id}", exc_info=True)
+        _session_data[str(guild_id)] = session_data
+    return session_data
+
+@metrics.time_storage("sessions", "save")
+def save_session_data(guild_id, data):
+    """Save a guild's session data to JSON"""
+    path = guild_data_path(guild_id, SESSION_DATA_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    _session_data[str(guild_id)] = data
 
-# ------------------------
-# Decorator to restrict commands to specific staff roles
-# ------------------------
-def require_specific_staff():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        if not any(role.id in ALLOWED_ROLES for role in interaction.user.roles):
-            await interaction.response.send_message(
-                "⛔ You do not have permission to use this command.", ephemeral=True
-            )
-            return False
-        return True
-    return app_commands.check(predicate)
-
-# ------------------------
-# Enhanced Session Management System
-# ------------------------
-from datetime import datetime, timedelta
-import json
-import os
+def session_sort_key(session):
+    return (session["start_time"], session.get("id", 0))
 
+def ensure_sessions_sorted(session_data):
+    """
+    Sort a legacy session list by start time once; /ssd keeps it sorted from then on.
+    Returns True if the data changed and should be saved.
+    """
+    if session_data.get("sessions_sorted"):
+        return False
+    session_data["sessions"].sort(key=session_sort_key)
+    session_data["sessions_sorted"] = True
+    return True
 
+def encode_session_cursor(session):
+    return base64.urlsafe_b64encode(json.dumps(list(session_sort_key(session))).encode()).decode()
 
-# Session data storage
-SESSION_DATA_FILE = "session_data.json"
+def decode_session_cursor(cursor):
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
 
-def load_session_data():
-    """Load session history from JSON"""
-    if os.path.exists(SESSION_DATA_FILE):
-        try:
-            with open(SESSION_DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {"sessions": [], "current_session": None}
-    return {"sessions": [], "current_session": None}
+def session_history_page(sessions, before=None, after=None):
+    """
+    Newest-first page of a start-time sorted session list, older than the `before`
+    cursor or newer than the `after` cursor. Returns (page, newer_cursor, older_cursor).
+    """
+    if after:
+        start = bisect.bisect_right(sessions, decode_session_cursor(after), key=session_sort_key)
+        page = sessions[start:start + SESSION_HISTORY_PAGE_SIZE]
+    else:
+        end = bisect.bisect_left(sessions, decode_session_cursor(before), key=session_sort_key) if before else len(sessions)
+        page = sessions[max(0, end - SESSION_HISTORY_PAGE_SIZE):end]
 
-def save_session_data(data):
-    """Save session data to JSON"""
-    with open(SESSION_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    page = page[::-1]
+    newer_cursor = encode_session_cursor(page[0]) if page and page[0] is not sessions[-1] else None
+    older_cursor = encode_session_cursor(page[-1]) if page and page[-1] is not sessions[0] else None
+    return page, newer_cursor, older_cursor
 
 # ------------------------
-# Decorator to restrict commands to specific staff roles
+# Running Session Statistics
 # ------------------------
-def require_specific_staff():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        if not any(role.id in ALLOWED_ROLES for role in interaction.user.roles):
-            await interaction.response.send_message(
-                "⛔ You do not have permission to use this command.", ephemeral=True
-            )
-            return False
-        return True
-    return app_commands.check(predicate)
+# Each guild's session_stats.json holds aggregates that /ssd folds each finished session
+# into. It lives apart from session_data.json, so /sessionstats never loads or walks the
+# session list.
+SESSION_STATS_FILE = "session_stats.json"
+
+_session_stats = {}  # str guild ID -> stats
+
+def empty_session_stats():
+    return {
+        "count": 0,
+        "total_minutes": 0,
+        "max_duration": 0,
+        "duration_mean": 0.0,
+        "duration_m2": 0.0,   # Welford sum of squared deviations
+        "max_players": 0,
+        "players_mean": 0.0,
+        "players_m2": 0.0,
+        "hosts": {},          # host_id -> {"name", "sessions", "minutes"}
+        "hour_of_week": [[0, 0] for _ in range(168)],  # UTC weekday*24+hour -> [sessions, peak player sum]
+    }
+
+def update_session_stats(stats, session):
+    """Fold one finished session into the running aggregates"""
+    duration = session.get("duration_minutes", 0)
+    peak = session.get("peak_players", 0)
+
+    stats["count"] += 1
+    n = stats["count"]
+    stats["total_minutes"] += duration
+    stats["max_duration"] = max(stats["max_duration"], duration)
+    stats["max_players"] = max(stats["max_players"], peak)
+
+    delta = duration - stats["duration_mean"]
+    stats["duration_mean"] += delta / n
+    stats["duration_m2"] += delta * (duration - stats["duration_mean"])
+
+    delta = peak - stats["players_mean"]
+    stats["players_mean"] += delta / n
+    stats["players_m2"] += delta * (peak - stats["players_mean"])
+
+    host = stats["hosts"].setdefault(session["host_id"], {"name": session["host_name"], "sessions": 0, "minutes": 0})
+    host["name"] = session["host_name"]
+    host["sessions"] += 1
+    host["minutes"] += duration
+
+    start = datetime.fromisoformat(session["start_time"])
+    slot = stats["hour_of_week"][start.weekday() * 24 + start.hour]
+    slot[0] += 1
+    slot[1] += peak
+
+def rebuild_session_stats(sessions):
+    stats = empty_session_stats()
+    for session in sessions:
+        update_session_stats(stats, session)
+    return stats
+
+@metrics.time_storage("session_stats", "save")
+def save_session_stats(guild_id, stats):
+    path = guild_data_path(guild_id, SESSION_STATS_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    _session_stats[str(guild_id)] = stats
+
+@metrics.time_storage("session_stats", "load")
+def load_session_stats(guild_id):
+    """A guild's running aggregates (cached); built once from its session history if the file is missing"""
+    stats = _session_stats.get(str(guild_id))
+    if stats is None:
+        path = guild_data_path(guild_id, SESSION_STATS_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    stats = json.load(f)
+            except:
+                logger.error(f"Failed to read session stats for guild {guild_id}; rebuilding them", exc_info=True)
+        if stats is None:
+            # Earlier versions kept the aggregates inside session_data.json; the next session save drops them there
+            session_data = load_session_data(guild_id)
+            stats = session_data.pop("stats", None) or rebuild_session_stats(session_data.get("sessions", []))
+            save_session_stats(guild_id, stats)
+        _session_stats[str(guild_id)] = stats
+    return stats
 
 # 
 # ------------------------
@@ -460,25 +1419,17 @@ def require_specific_staff():
 # ------------------------
 # Replace your /ssv command (around line 548-683) with this fixed version:
 
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="ssv", description="Start session vote (SSV)")
-@require_specific_staff()
-async def ssv(interaction: discord.Interaction):
-    channel = interaction.guild.get_channel(ANNOUNCE_CHANNEL_ID)
-    if not channel:
-        return await interaction.response.send_message("❌ Announcement channel not found.", ephemeral=True)
-
-    # Check if session already active
-    session_data = load_session_data()
-    if session_data.get("current_session"):
-        return await interaction.response.send_message("⚠️ A session is already active! Use `/ssd` to end it first.", ephemeral=True)
-
+async def post_session_vote(channel, host):
+    """Post the SSV vote embed with its voting buttons to the announcement channel"""
+    config = guild_configs.get(channel.guild.id)
+    vote_goal = config.ssu_vote_goal
     embed = discord.Embed(
         title="🟡 Server Standby — Vote for Session Start",
-        description=f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {SSU_VOTE_GOAL} votes\n**Current Votes:** 0",
+        description=f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {vote_goal} votes\n**Current Votes:** 0",
         color=discord.Color.gold()
     )
-    embed.add_field(name="🎮 Started by", value=interaction.user.mention, inline=True)
-    embed.set_image(url=SESSION_BANNER_URL)
+    embed.add_field(name="🎮 Started by", value=host.mention, inline=True)
+    embed.set_image(url=config.session_banner_url)
     embed.set_footer(text="Server Status: SSV — Waiting for player votes")
 
     class VoteView(discord.ui.View):
@@ -504,7 +1455,7 @@ async def ssv(interaction: discord.Interaction):
             
             # Update embed
             embed_update = interaction.message.embeds[0]
-            embed_update.description = f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {SSU_VOTE_GOAL} votes\n**Current Votes:** {vote_count}"
+            embed_update.description = f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {vote_goal} votes\n**Current Votes:** {vote_count}"
             
             # Add voters list if there are voters
             if vote_count > 0:
@@ -523,9 +1474,9 @@ async def ssv(interaction: discord.Interaction):
 
             await interaction.message.edit(embed=embed_update, view=self)
 
-            if vote_count >= SSU_VOTE_GOAL:
+            if vote_count >= vote_goal:
                 await interaction.response.send_message(
-                    f"🎉 Vote goal reached ({vote_count}/{SSU_VOTE_GOAL})! Starting session...", ephemeral=True
+                    f"🎉 Vote goal reached ({vote_count}/{vote_goal})! Starting session...", ephemeral=True
                 )
                 
                 # Disable buttons
@@ -534,12 +1485,12 @@ async def ssv(interaction: discord.Interaction):
                 await interaction.message.edit(view=self)
                 
                 # Start session automatically
-                await start_ssu(channel, interaction, vote_initiated=True, voter_count=vote_count)
+                await start_ssu(channel, interaction.user, vote_initiated=True, voter_count=vote_count)
                 self.stop()
                 return
 
             await interaction.response.send_message(
-                f"✅ Your vote has been counted! ({vote_count}/{SSU_VOTE_GOAL})", ephemeral=True
+                f"✅ Your vote has been counted! ({vote_count}/{vote_goal})", ephemeral=True
             )
 
         @discord.ui.button(label="❌ Remove Vote", style=discord.ButtonStyle.danger, custom_id="vote_no_persistent")
@@ -561,7 +1512,7 @@ async def ssv(interaction: discord.Interaction):
             
             # Update embed
             embed_update = interaction.message.embeds[0]
-            embed_update.description = f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {SSU_VOTE_GOAL} votes\n**Current Votes:** {vote_count}"
+            embed_update.description = f"Server currently in **standby**.\nPlayers can vote ✅ to start the session.\n\n**Vote Goal:** {vote_goal} votes\n**Current Votes:** {vote_count}"
             
             # Update voters list
             if vote_count > 0:
@@ -589,7 +1540,7 @@ async def ssv(interaction: discord.Interaction):
             voter_list = "\n".join([f"• **{name}**" for name in self.voters_info.values()])
             
             embed = discord.Embed(
-                title=f"📊 Current Voters ({len(self.yes_votes)}/{SSU_VOTE_GOAL})",
+                title=f"📊 Current Voters ({len(self.yes_votes)}/{vote_goal})",
                 description=voter_list,
                 color=discord.Color.blue()
             )
@@ -598,36 +1549,50 @@ async def ssv(interaction: discord.Interaction):
     view = VoteView()
     
     # Send the message
-    await channel.send(f"<@&{PING_ROLE_ID}>", embed=embed, view=view)
+    await channel.send(f"<@&{config.ping_role_id}>", embed=embed, view=view)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="ssv", description="Start session vote (SSV)")
+@require_specific_staff()
+async def ssv(interaction: discord.Interaction):
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).announce_channel_id)
+    if not channel:
+        return await interaction.response.send_message("❌ Announcement channel not found.", ephemeral=True)
+
+    # Check if session already active
+    session_data = load_session_data(interaction.guild_id)
+    if session_data.get("current_session"):
+        return await interaction.response.send_message("⚠️ A session is already active! Use `/ssd` to end it first.", ephemeral=True)
+
+    await post_session_vote(channel, interaction.user)
     await interaction.response.send_message("🟡 Session vote started! Players can now vote.", ephemeral=True)
 # ------------------------
 # /ssu Command — Start Session (Enhanced)
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="ssu", description="Start Session (SSU)")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="ssu", description="Start Session (SSU)")
 @require_specific_staff()
 async def ssu(interaction: discord.Interaction):
-    channel = interaction.guild.get_channel(ANNOUNCE_CHANNEL_ID)
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).announce_channel_id)
     if not channel:
         return await interaction.response.send_message("❌ Announcement channel not found.", ephemeral=True)
 
     # Check if session already active
-    session_data = load_session_data()
+    session_data = load_session_data(interaction.guild_id)
     if session_data.get("current_session"):
         return await interaction.response.send_message("⚠️ A session is already active! Use `/ssd` to end it first.", ephemeral=True)
 
-    await start_ssu(channel, interaction)
+    await start_ssu(channel, interaction.user)
     await interaction.response.send_message("🟢 Session started successfully!", ephemeral=True)
 # ------------------------
 # /ssd Command — End Session (Enhanced)
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="ssd", description="End Session (SSD)")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="ssd", description="End Session (SSD)")
 @require_specific_staff()
 async def ssd(interaction: discord.Interaction):
-    channel = interaction.guild.get_channel(ANNOUNCE_CHANNEL_ID)
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).announce_channel_id)
     if not channel:
         return await interaction.response.send_message("❌ Announcement channel not found.", ephemeral=True)
 
-    session_data = load_session_data()
+    session_data = load_session_data(interaction.guild_id)
     current_session = session_data.get("current_session")
     
     if not current_session:
@@ -657,9 +1622,18 @@ async def ssd(interaction: discord.Interaction):
     current_session["ended_by_name"] = interaction.user.display_name
     current_session["duration_minutes"] = int(duration.total_seconds() // 60)
     
-    session_data["sessions"].append(current_session)
+    stats = load_session_stats(interaction.guild_id)  # Before the insert, so a first-time build doesn't count it twice
+    ensure_sessions_sorted(session_data)
+    bisect.insort(session_data["sessions"], current_session, key=session_sort_key)
     session_data["current_session"] = None
-    save_session_data(session_data)
+    save_session_data(interaction.guild_id, session_data)
+
+    update_session_stats(stats, current_session)
+    save_session_stats(interaction.guild_id, stats)
+
+    profiles = load_member_profiles(interaction.guild_id)
+    apply_session_to_profiles(profiles, current_session)
+    schedule_profiles_save(interaction.guild_id)
 
     await interaction.response.send_message("🔴 Session ended and logged!", ephemeral=True)
 
@@ -668,9 +1642,9 @@ async def ssd(interaction: discord.Interaction):
 # ------------------------
 # /sessionstatus Command — View Current Session Info
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="sessionstatus", description="View current session information")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="sessionstatus", description="View current session information")
 async def sessionstatus(interaction: discord.Interaction):
-    session_data = load_session_data()
+    session_data = load_session_data(interaction.guild_id)
     current_session = session_data.get("current_session")
     
     if not current_session:
@@ -704,24 +1678,14 @@ async def sessionstatus(interaction: discord.Interaction):
 # ------------------------
 # /sessionhistory Command — View Past Sessions
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="sessionhistory", description="View recent session history")
-async def sessionhistory(interaction: discord.Interaction):
-    session_data = load_session_data()
-    sessions = session_data.get("sessions", [])
-    
-    if not sessions:
-        return await interaction.response.send_message("📊 No session history yet!", ephemeral=True)
-
-    # Get last 5 sessions
-    recent_sessions = sorted(sessions, key=lambda x: x["start_time"], reverse=True)[:5]
-
+def build_session_history_embed(page, total_sessions):
     embed = discord.Embed(
-        title="📜 Recent Session History",
-        description=f"Showing last {len(recent_sessions)} sessions:",
+        title="📜 Session History",
+        description=f"Showing {len(page)} sessions, newest first:",
         color=discord.Color.blue()
     )
 
-    for idx, session in enumerate(recent_sessions, 1):
+    for session in page:
         start = datetime.fromisoformat(session["start_time"])
         duration_min = session.get("duration_minutes", 0)
         hours = duration_min // 60
@@ -735,39 +1699,96 @@ async def sessionhistory(interaction: discord.Interaction):
         )
         
         embed.add_field(
-            name=f"Session #{len(sessions) - sessions.index(session)}",
+            name=f"Session #{session.get('id', '?')}",
             value=session_info,
             inline=False
         )
 
-    embed.set_footer(text=f"Total sessions: {len(sessions)}")
-    await interaction.response.send_message(embed=embed)
+    embed.set_footer(text=f"Total sessions: {total_sessions}")
+    return embed
+
+class SessionHistoryView(View):
+    def __init__(self, user_id, newer_cursor, older_cursor):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.set_cursors(newer_cursor, older_cursor)
+
+    def set_cursors(self, newer_cursor, older_cursor):
+        self.newer_cursor = newer_cursor
+        self.older_cursor = older_cursor
+        self.previous_button.disabled = newer_cursor is None
+        self.next_button.disabled = older_cursor is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("⚠️ Run `/sessionhistory` yourself to page through sessions.", ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction: discord.Interaction, before=None, after=None):
+        sessions = load_session_data(interaction.guild_id).get("sessions", [])
+        page, newer_cursor, older_cursor = session_history_page(sessions, before=before, after=after)
+        if not page:
+            await interaction.response.send_message("📊 No more sessions in that direction.", ephemeral=True)
+            return
+        self.set_cursors(newer_cursor, older_cursor)
+        await interaction.response.edit_message(embed=build_session_history_embed(page, len(sessions)), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, after=self.newer_cursor)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, before=self.older_cursor)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="sessionhistory", description="View recent session history")
+async def sessionhistory(interaction: discord.Interaction):
+    session_data = load_session_data(interaction.guild_id)
+    sessions = session_data.get("sessions", [])
+    
+    if not sessions:
+        return await interaction.response.send_message("📊 No session history yet!", ephemeral=True)
+
+    if ensure_sessions_sorted(session_data):
+        save_session_data(interaction.guild_id, session_data)
+
+    # Newest page straight off the end of the start-time ordered list
+    page, newer_cursor, older_cursor = session_history_page(sessions)
+    view = SessionHistoryView(interaction.user.id, newer_cursor, older_cursor)
+    await interaction.response.send_message(embed=build_session_history_embed(page, len(sessions)), view=view)
 
 # ------------------------
 # /sessionstats Command — View Session Statistics
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="sessionstats", description="View overall session statistics")
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="sessionstats", description="View overall session statistics")
 async def sessionstats(interaction: discord.Interaction):
-    session_data = load_session_data()
-    sessions = session_data.get("sessions", [])
+    stats = load_session_stats(interaction.guild_id)
     
-    if not sessions:
+    if not stats["count"]:
         return await interaction.response.send_message("📊 No session data yet!", ephemeral=True)
 
-    # Calculate statistics
-    total_sessions = len(sessions)
-    total_minutes = sum(s.get("duration_minutes", 0) for s in sessions)
-    avg_duration = total_minutes / total_sessions if total_sessions > 0 else 0
-    max_players = max((s.get("peak_players", 0) for s in sessions), default=0)
-    avg_players = sum(s.get("peak_players", 0) for s in sessions) / total_sessions if total_sessions > 0 else 0
+    total_sessions = stats["count"]
+    total_minutes = stats["total_minutes"]
+    duration_std = (stats["duration_m2"] / total_sessions) ** 0.5 if total_sessions else 0
+    players_std = (stats["players_m2"] / total_sessions) ** 0.5 if total_sessions else 0
 
-    # Most active host
-    host_counter = {}
-    for session in sessions:
-        host = session["host_name"]
-        host_counter[host] = host_counter.get(host, 0) + 1
-    
-    most_active_host = max(host_counter.items(), key=lambda x: x[1]) if host_counter else ("N/A", 0)
+    top_hosts = sorted(stats["hosts"].values(), key=lambda h: h["sessions"], reverse=True)[:3]
+    hosts_text = "\n".join(
+        f"**{host['name']}** — {host['sessions']} sessions, {host['minutes'] // 60}h {host['minutes'] % 60}m"
+        for host in top_hosts
+    )
+
+    # Best hours to host: highest average peak players among slots hosted at least twice
+    slots = [(slot_players / slot_sessions, index, slot_sessions)
+             for index, (slot_sessions, slot_players) in enumerate(stats["hour_of_week"]) if slot_sessions >= 2]
+    best_slots = sorted(slots, reverse=True)[:3]
+    hours_text = "\n".join(
+        f"**{WEEKDAY_NAMES[index // 24]} {index % 24:02d}:00 UTC** — avg peak {avg:.1f} ({count} sessions)"
+        for avg, index, count in best_slots
+    )
 
     embed = discord.Embed(
         title="📊 Session Statistics",
@@ -776,7 +1797,11 @@ async def sessionstats(interaction: discord.Interaction):
     )
     embed.add_field(name="📈 Total Sessions", value=f"**{total_sessions}**", inline=True)
     embed.add_field(name="⏱️ Total Playtime", value=f"**{total_minutes // 60}h {total_minutes % 60}m**", inline=True)
-    embed.add_field(name="🏆 Most Active Host", value=f"**{most_active_host[0]}**\n({most_active_host[1]} sessions)", inline=True)
+    embed.add_field(name="⌛ Avg Duration", value=f"**{stats['duration_mean']:.0f}m** ± {duration_std:.0f}m\n(longest {stats['max_duration']}m)", inline=True)
+    embed.add_field(name="👥 Avg Peak Players", value=f"**{stats['players_mean']:.1f}** ± {players_std:.1f}", inline=True)
+    embed.add_field(name="📈 Record Peak", value=f"**{stats['max_players']}** players", inline=True)
+    embed.add_field(name="🏆 Most Active Hosts", value=hosts_text or "N/A", inline=False)
+    embed.add_field(name="🕒 Best Hours to Host", value=hours_text or "Not enough data yet", inline=False)
     
     embed.set_footer(text="Statistics since bot deployment")
     embed.timestamp = discord.utils.utcnow()
@@ -786,42 +1811,36 @@ async def sessionstats(interaction: discord.Interaction):
 # ------------------------
 # Helper function to start SSU (Enhanced)
 # ------------------------
-async def start_ssu(channel, interaction, vote_initiated=False, voter_count=0):
-    session_data = load_session_data()
-    
-    start_time = datetime.utcnow()
-    
-    # Create new session
-   # Replace your start_ssu function (around line 793-831) with this:
-
-async def start_ssu(channel, interaction, vote_initiated=False, voter_count=0):
-    session_data = load_session_data()
+async def start_ssu(channel, host, vote_initiated=False, voter_count=0):
+    config = guild_configs.get(channel.guild.id)
+    session_data = load_session_data(channel.guild.id)
     
     start_time = datetime.utcnow()
     
     # Create new session
     new_session = {
         "id": len(session_data["sessions"]) + 1,
-        "host_id": str(interaction.user.id),
-        "host_name": interaction.user.display_name,
+        "host_id": str(host.id),
+        "host_name": host.display_name,
         "start_time": start_time.isoformat(),
         "current_players": 0,
         "peak_players": 0,
         "player_updates": 0,
         "player_history": [],
         "vote_initiated": vote_initiated,
-        "voter_count": voter_count
+        "voter_count": voter_count,
+        "guild_id": str(channel.guild.id)
     }
     
     session_data["current_session"] = new_session
-    save_session_data(session_data)
+    save_session_data(channel.guild.id, session_data)
     
     embed = discord.Embed(
         title="🟢 Server Start Up — Session Open",
         description="The server is now **open for RP**! Join in and have fun!",
         color=discord.Color.green()
     )
-    embed.add_field(name="🎮 Started by", value=interaction.user.mention, inline=True)
+    embed.add_field(name="🎮 Started by", value=host.mention, inline=True)
     
     if vote_initiated:
         embed.add_field(name="🗳️ Vote Count", value=f"{voter_count} votes", inline=True)
@@ -830,18 +1849,16 @@ async def start_ssu(channel, interaction, vote_initiated=False, voter_count=0):
     else:
         embed.add_field(name="Server Code", value="SSCRPP")
         embed.set_footer(text="Server Status: SSU — Join now!")
-    embed.set_image(url="https://media.discordapp.net/attachments/1373459392241864716/1435519241381216268/Sessions.png?ex=69162639&is=6914d4b9&hm=2fe27dfccf414d840a81705fce6689454d1c7890984fcabba6874cd1a8e7634c&=&format=webp&quality=lossless")
+    embed.set_image(url=config.session_banner_url)
     embed.timestamp = start_time
     
-    await channel.send(f"<@&{PING_ROLE_ID}>", embed=embed)
+    await channel.send(f"<@&{config.ping_role_id}>", embed=embed)
 # ------------------------
 # ------------------------
 # /trainingresult Command — Log Training Results + DM Trainee
 # ------------------------
-TRAINING_RESULTS_CHANNEL_ID = 1428231048575058030  # Change if needed
-
 @bot.tree.command(
-    guild=discord.Object(id=GUILD_ID),
+    guilds=COMMAND_GUILDS,
     name="trainingresult",
     description="Post a trainee's pass/fail results and DM them automatically"
 )
@@ -858,7 +1875,7 @@ TRAINING_RESULTS_CHANNEL_ID = 1428231048575058030  # Change if needed
     ]
 )
 async def trainingresult(interaction: discord.Interaction, trainee: discord.Member, result: app_commands.Choice[str], notes: str):
-    channel = interaction.guild.get_channel(TRAINING_RESULTS_CHANNEL_ID)
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).training_results_channel_id)
     if not channel:
         return await interaction.response.send_message("❌ Training results channel not found.", ephemeral=True)
 
@@ -896,7 +1913,14 @@ async def trainingresult(interaction: discord.Interaction, trainee: discord.Memb
     # Try to DM trainee safely
     try:
         await trainee.send(dm_message)
+        dm_sent = True
     except discord.Forbidden:
+        dm_sent = False
+
+    await moderation_journal.append("training_result", interaction.guild_id, trainee, interaction.user,
+                                    result=result.value, notes=notes, dm_sent=dm_sent)
+
+    if not dm_sent:
         await interaction.response.send_message(
             f"✅ Result posted, but I couldn't DM {trainee.mention} (DMs off).",
             ephemeral=True
@@ -908,55 +1932,1060 @@ async def trainingresult(interaction: discord.Interaction, trainee: discord.Memb
         f"✅ Training result posted and DM sent to {trainee.mention}.",
         ephemeral=True
     )
+
+# ------------------------
+# ⏰ Scheduled Announcements
+# ------------------------
+import asyncio
+import heapq
+import re
+
+SCHEDULED_JOBS_FILE = "scheduled_jobs.json"
+# Catch-up policy: a job that came due while the bot was offline still runs on startup if it
+# is at most this late; anything older is dropped and logged, so stale votes never fire.
+SCHEDULE_CATCH_UP_GRACE = 15 * 60  # seconds
+SCHEDULE_RELATIVE_RE = re.compile(r"^(?:in\s+)?(\d+)\s*(m|min|mins|minutes?|h|hrs?|hours?|d|days?)$", re.IGNORECASE)
+SCHEDULE_JOB_LABELS = {"ssv": "Session Vote (SSV)", "ssu": "Session Start (SSU)", "training": "Staff Training", "reminder": "Reminder"}
+
+class JobScheduler:
+    """
+    Persistent one-shot jobs driven by a min-heap of (run_at, job_id). One task sleeps until
+    the earliest deadline instead of polling. Cancel and reschedule leave the old heap entry
+    behind and it is skipped when popped, so both cost at most one O(log n) push.
+    """
+
+    def __init__(self, path, runner):
+        self.path = path
+        self.runner = runner
+        self.jobs = {}       # job_id -> job
+        self.heap = []       # (run_at, job_id); may contain stale entries
+        self.next_id = 1
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    @metrics.time_storage("scheduled_jobs", "load")
+    def load(self):
+        data = {"next_id": 1, "jobs": []}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except:
+                logger.error("Failed to read scheduled jobs", exc_info=True)
+        self.next_id = data["next_id"]
+        self.jobs = {job["id"]: job for job in data["jobs"]}
+        self.heap = [(job["run_at"], job["id"]) for job in self.jobs.values()]
+        heapq.heapify(self.heap)
+
+    @metrics.time_storage("scheduled_jobs", "save")
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"next_id": self.next_id, "jobs": list(self.jobs.values())}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _push(self, run_at, job_id):
+        heapq.heappush(self.heap, (run_at, job_id))
+        # Drop stale entries once they outnumber live ones so the heap stays O(live jobs)
+        if len(self.heap) > 2 * len(self.jobs) + 16:
+            self.heap = [(job["run_at"], job["id"]) for job in self.jobs.values()]
+            heapq.heapify(self.heap)
+        if self.heap[0][1] == job_id:
+            self.wakeup.set()
+
+    def add(self, kind, run_at, **payload):
+        job = {"id": self.next_id, "kind": kind, "run_at": run_at, **payload}
+        self.next_id += 1
+        self.jobs[job["id"]] = job
+        self._push(run_at, job["id"])
+        self.save()
+        return job
+
+    def cancel(self, job_id):
+        """Remove a job and any reminder attached to it; returns the job or None"""
+        job = self.jobs.pop(job_id, None)
+        if job and job.get("reminder_id"):
+            self.jobs.pop(job["reminder_id"], None)
+        if job:
+            self.save()
+        return job
+
+    def reschedule(self, job_id, run_at):
+        """Move a job (and its reminder, keeping the same lead time); returns the job or None"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        reminder = self.jobs.get(job.get("reminder_id"))
+        if reminder:
+            reminder["run_at"] = run_at - (job["run_at"] - reminder["run_at"])
+            self._push(reminder["run_at"], reminder["id"])
+        job["run_at"] = run_at
+        self._push(run_at, job_id)
+        self.save()
+        return job
+
+    def upcoming(self, guild_id):
+        return sorted((job for job in self.jobs.values() if job["guild_id"] == guild_id), key=lambda job: job["run_at"])
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            # Discard heap entries left behind by cancel/reschedule
+            while self.heap and self.jobs.get(self.heap[0][1], {}).get("run_at") != self.heap[0][0]:
+                heapq.heappop(self.heap)
+
+            delay = self.heap[0][0] - time.time() if self.heap else None
+            if delay is None or delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            run_at, job_id = heapq.heappop(self.heap)
+            job = self.jobs.pop(job_id)
+            self.save()
+
+            late = time.time() - run_at
+            if late > SCHEDULE_CATCH_UP_GRACE:
+                logger.warning(f"Dropping scheduled {job['kind']} job #{job_id}: missed by {int(late // 60)} minutes")
+                continue
+
+            try:
+                await self.runner(job)
+            except Exception as e:
+                logger.error(f"Scheduled {job['kind']} job #{job_id} failed: {e}", exc_info=True)
+
+async def run_scheduled_job(job):
+    guild = bot.get_guild(job["guild_id"])
+    if guild is None:
+        logger.warning(f"Scheduled job #{job['id']}: guild {job['guild_id']} not available")
+        return
+
+    if job["kind"] == "reminder":
+        channel = guild.get_channel(job["channel_id"])
+        if channel:
+            await channel.send(f"{job['ping']} ⏰ Reminder: **{job['label']}** starts <t:{int(job['starts_at'])}:R>!")
+        return
+
+    host = await fetch_member_cached(guild, job["host_id"])
+
+    if job["kind"] == "training":
+        message = await post_training_announcement(guild, host, job["session_type"], job["notes"], job.get("capacity"))
+        if not message:
+            logger.warning(f"Scheduled training #{job['id']}: training channel not found")
+        return
+
+    channel = guild.get_channel(guild_configs.get(guild.id).announce_channel_id)
+    if not channel:
+        logger.warning(f"Scheduled {job['kind']} #{job['id']}: announcement channel not found")
+        return
+    if load_session_data(guild.id).get("current_session"):
+        await send_dm_safe(host, content=f"⚠️ Your scheduled {SCHEDULE_JOB_LABELS[job['kind']]} was skipped because a session is already active.")
+        return
+
+    if job["kind"] == "ssv":
+        await post_session_vote(channel, host)
+    else:
+        await start_ssu(channel, host)
+
+job_scheduler = JobScheduler(SCHEDULED_JOBS_FILE, run_scheduled_job)
+
+def parse_schedule_time(text):
+    """Parse "in 90m", "2h", "1d" or "YYYY-MM-DD HH:MM" (UTC) into a Unix timestamp, or None"""
+    text = text.strip()
+    match = SCHEDULE_RELATIVE_RE.match(text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)[0].lower()
+        return time.time() + amount * {"m": 60, "h": 3600, "d": 86400}[unit]
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+async def schedule_job(interaction: discord.Interaction, kind, when, remind_minutes, channel_id, ping, **payload):
+    run_at = parse_schedule_time(when)
+    if run_at is None:
+        await interaction.response.send_message("⚠️ Use a time like `in 90m`, `2h` or `2025-11-20 19:30` (UTC).", ephemeral=True)
+        return
+    if run_at <= time.time():
+        await interaction.response.send_message("⚠️ That time is in the past.", ephemeral=True)
+        return
+
+    job = job_scheduler.add(kind, run_at, guild_id=interaction.guild_id, host_id=interaction.user.id, **payload)
+    if remind_minutes:
+        reminder = job_scheduler.add(
+            "reminder", run_at - remind_minutes * 60, guild_id=interaction.guild_id, channel_id=channel_id,
+            ping=ping, label=SCHEDULE_JOB_LABELS[kind], starts_at=run_at, parent_id=job["id"]
+        )
+        job["reminder_id"] = reminder["id"]
+        job_scheduler.save()
+
+    await interaction.response.send_message(
+        f"⏰ Scheduled **{SCHEDULE_JOB_LABELS[kind]}** as job #{job['id']} for <t:{int(run_at)}:F> (<t:{int(run_at)}:R>).",
+        ephemeral=True
+    )
+
+schedule_group = app_commands.Group(name="schedule", description="Schedule session votes, session starts and trainings")
+
+@schedule_group.command(name="ssv", description="Schedule a session vote (SSV)")
+@require_specific_staff()
+@app_commands.describe(when="When to post: e.g. 'in 90m', '2h' or '2025-11-20 19:30' (UTC)", remind_minutes="Optional: post a reminder this many minutes before")
+async def schedule_ssv(interaction: discord.Interaction, when: str, remind_minutes: app_commands.Range[int, 1, 1440] = None):
+    config = guild_configs.get(interaction.guild_id)
+    await schedule_job(interaction, "ssv", when, remind_minutes, config.announce_channel_id, f"<@&{config.ping_role_id}>")
+
+@schedule_group.command(name="ssu", description="Schedule a session start (SSU)")
+@require_specific_staff()
+@app_commands.describe(when="When to start: e.g. 'in 90m', '2h' or '2025-11-20 19:30' (UTC)", remind_minutes="Optional: post a reminder this many minutes before")
+async def schedule_ssu(interaction: discord.Interaction, when: str, remind_minutes: app_commands.Range[int, 1, 1440] = None):
+    config = guild_configs.get(interaction.guild_id)
+    await schedule_job(interaction, "ssu", when, remind_minutes, config.announce_channel_id, f"<@&{config.ping_role_id}>")
+
+@schedule_group.command(name="training", description="Schedule a staff training or ride-along announcement")
+@require_staff_permission()
+@app_commands.describe(
+    session_type="Choose between Training or Ride Along",
+    notes="Add any important notes or instructions",
+    when="When to post: e.g. 'in 90m', '2h' or '2025-11-20 19:30' (UTC)",
+    capacity="Optional: maximum attendees; later sign-ups go to a waitlist",
+    remind_minutes="Optional: post a reminder this many minutes before"
+)
+@app_commands.choices(session_type=[
+    app_commands.Choice(name="Training", value="Training"),
+    app_commands.Choice(name="Ride Along", value="Ride Along")
+])
+async def schedule_training(interaction: discord.Interaction, session_type: app_commands.Choice[str], notes: str, when: str,
+                            capacity: app_commands.Range[int, 1, 500] = None, remind_minutes: app_commands.Range[int, 1, 1440] = None):
+    config = guild_configs.get(interaction.guild_id)
+    await schedule_job(interaction, "training", when, remind_minutes, config.training_channel_id, f"<@&{config.training_ping_role_id}>",
+                       session_type=session_type.value, notes=notes, capacity=capacity)
+
+@schedule_group.command(name="list", description="List upcoming scheduled jobs")
+@require_specific_staff()
+async def schedule_list(interaction: discord.Interaction):
+    jobs = [job for job in job_scheduler.upcoming(interaction.guild_id) if job["kind"] != "reminder"]
+    if not jobs:
+        await interaction.response.send_message("⏰ Nothing is scheduled.", ephemeral=True)
+        return
+
+    lines = [
+        f"**#{job['id']}** {SCHEDULE_JOB_LABELS[job['kind']]} — <t:{int(job['run_at'])}:F> by <@{job['host_id']}>"
+        + (" (with reminder)" if job.get("reminder_id") in job_scheduler.jobs else "")
+        for job in jobs[:20]
+    ]
+    embed = discord.Embed(title="⏰ Scheduled Jobs", description="\n".join(lines), color=discord.Color.blue())
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@schedule_group.command(name="cancel", description="Cancel a scheduled job")
+@require_specific_staff()
+@app_commands.describe(job_id="Job number from /schedule list")
+async def schedule_cancel(interaction: discord.Interaction, job_id: int):
+    job = job_scheduler.jobs.get(job_id)
+    if not job or job["guild_id"] != interaction.guild_id:
+        await interaction.response.send_message(f"❌ No scheduled job #{job_id}.", ephemeral=True)
+        return
+    job_scheduler.cancel(job_id)
+    await interaction.response.send_message(f"🗑️ Cancelled {SCHEDULE_JOB_LABELS[job['kind']]} #{job_id}.", ephemeral=True)
+
+@schedule_group.command(name="reschedule", description="Move a scheduled job to a new time")
+@require_specific_staff()
+@app_commands.describe(job_id="Job number from /schedule list", when="New time: e.g. 'in 90m', '2h' or '2025-11-20 19:30' (UTC)")
+async def schedule_reschedule(interaction: discord.Interaction, job_id: int, when: str):
+    job = job_scheduler.jobs.get(job_id)
+    run_at = parse_schedule_time(when)
+    if not job or job["guild_id"] != interaction.guild_id:
+        await interaction.response.send_message(f"❌ No scheduled job #{job_id}.", ephemeral=True)
+        return
+    if run_at is None or run_at <= time.time():
+        await interaction.response.send_message("⚠️ Give a future time like `in 90m`, `2h` or `2025-11-20 19:30` (UTC).", ephemeral=True)
+        return
+    job_scheduler.reschedule(job_id, run_at)
+    await interaction.response.send_message(f"⏰ Moved #{job_id} to <t:{int(run_at)}:F>.", ephemeral=True)
+
+bot.tree.add_command(schedule_group, guilds=COMMAND_GUILDS)
+
 # Welcome/Leave messages
 @bot.event
 async def on_member_join(member):
     # Send welcome message with server rules
-    pass
+    index = member_name_indexes.get(member.guild.id)
+    if index and not member.bot:
+        index.add_member(member)
 import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button
 import json
 import os
-from datetime import datetime
+import gzip
+import asyncio
+from datetime import datetime, timedelta, timezone
 from collections import Counter, defaultdict
+from functools import lru_cache
+from discord.ext import tasks
+import bisect
+import csv
+import itertools
 import re
+import tempfile
+import time
 
 # ------------------------
 # RP Data Storage Setup
 # ------------------------
+# Each guild's rp_logs.json is the hot segment. Logs from months that ended more than
+# RP_ARCHIVE_AFTER_DAYS ago are compacted into immutable gzip JSONL segments under
+# its rp_archive/, and rp_archive/index.json keeps a small summary per segment.
 RP_LOG_FILE = "rp_logs.json"
-
-def load_rp_logs():
-    """Load RP logs from JSON file"""
-    if os.path.exists(RP_LOG_FILE):
+RP_ARCHIVE_DIR = "rp_archive"
+RP_ARCHIVE_INDEX_FILE = "index.json"
+RP_ARCHIVE_AFTER_DAYS = int(os.getenv("RP_ARCHIVE_AFTER_DAYS", "30"))
+
+# Serializes every read-modify-write of a guild's hot segment (guild ID -> lock)
+rp_log_locks = defaultdict(asyncio.Lock)
+
+@metrics.time_storage("rp_logs", "load")
+def load_rp_logs(guild_id):
+    """Load a guild's hot RP logs from JSON; a corrupt file raises rather than reading as empty"""
+    path = guild_data_path(guild_id, RP_LOG_FILE)
+    if os.path.exists(path):
         try:
-            with open(RP_LOG_FILE, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except:
-            return []
+            # Returning [] here would let the next /logrp save over every hot log
+            logger.error(f"Failed to read RP logs for guild {guild_id}", exc_info=True)
+            raise
     return []
 
-def save_rp_logs(logs):
-    """Save RP logs to JSON file"""
-    with open(RP_LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(logs, f, indent=2, ensure_ascii=False)
+@metrics.time_storage("rp_logs", "save")
+def save_rp_logs(guild_id, logs):
+    """Save a guild's hot RP logs to JSON"""
+    write_json_atomic(guild_data_path(guild_id, RP_LOG_FILE), logs, indent=2)
+
+_rp_archive_indexes = {}  # str guild ID -> index
+
+@metrics.time_storage("rp_archive_index", "load")
+def load_rp_archive_index(guild_id):
+    """Load a guild's archived segment summaries (cached, only the archiver changes them)"""
+    index = _rp_archive_indexes.get(str(guild_id))
+    if index is None:
+        index = {"next_id": 1, "segments": {}}
+        path = guild_data_path(guild_id, RP_ARCHIVE_DIR, RP_ARCHIVE_INDEX_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except:
+                logger.error(f"Failed to read RP archive index for guild {guild_id}", exc_info=True)
+        _rp_archive_indexes[str(guild_id)] = index
+    return index
+
+@metrics.time_storage("rp_archive_index", "save")
+def save_rp_archive_index(guild_id, index):
+    """Save a guild's archived segment summaries"""
+    path = guild_data_path(guild_id, RP_ARCHIVE_DIR, RP_ARCHIVE_INDEX_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    _rp_archive_indexes[str(guild_id)] = index
+
+def next_rp_log_id(guild_id, logs):
+    """Next free RP log ID across the guild's hot segment and archive"""
+    hot_next = max((log["id"] for log in logs), default=0) + 1
+    return max(hot_next, load_rp_archive_index(guild_id).get("next_id", 1))
+
+def summarize_rp_logs(logs):
+    """Count logs per logger, participant and location for each guild"""
+    summary = {}
+    for log in logs:
+        guild = summary.setdefault(log.get("guild_id"), {
+            "count": 0, "loggers": Counter(), "participants": Counter(), "locations": Counter()
+        })
+        guild["count"] += 1
+        guild["loggers"][log["logger_id"]] += 1
+        guild["participants"].update(log.get("participant_ids", []))
+        guild["locations"][log["location"]] += 1
+    return summary
+
+def rp_segment_path(guild_id, name):
+    return guild_data_path(guild_id, RP_ARCHIVE_DIR, f"{name}.jsonl.gz")
+
+def iter_rp_segment(guild_id, name):
+    """Stream the records of one archived segment"""
+    with gzip.open(rp_segment_path(guild_id, name), 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+@lru_cache(maxsize=4)
+@metrics.time_storage("rp_archive_segment", "load")
+def load_rp_segment(guild_id, name):
+    """Decompress one archived segment into an ID -> log map (segments never change)"""
+    return {log["id"]: log for log in iter_rp_segment(guild_id, name)}
+
+def find_archived_rp_log(guild_id, log_id):
+    """Look up an archived RP log, decompressing only the segment(s) whose ID range covers it"""
+    for name, segment in load_rp_archive_index(guild_id)["segments"].items():
+        if segment["min_id"] <= log_id <= segment["max_id"]:
+            log = load_rp_segment(guild_id, name).get(log_id)
+            if log:
+                return log
+    return None
+
+async def snapshot_rp_logs(guild_id):
+    """
+    A guild's archived segment names and hot logs as of one moment, taken under its lock so
+    neither /logrp nor the archiver is mid-write. Segments never change, so the pair stays valid.
+    """
+    async with rp_log_locks[guild_id]:
+        hot_logs = await asyncio.to_thread(load_rp_logs, guild_id)
+        return list(load_rp_archive_index(guild_id)["segments"]), hot_logs
+
+def iter_all_rp_logs(guild_id, snapshot=None):
+    """
+    Stream every RP log of a guild, archived segments first, one segment in memory at a time.
+    Pass a snapshot_rp_logs() snapshot when not holding the guild's rp_log_locks.
+    """
+    segments, hot_logs = snapshot or (list(load_rp_archive_index(guild_id)["segments"]), load_rp_logs(guild_id))
+    for name in segments:
+        yield from iter_rp_segment(guild_id, name)
+    yield from hot_logs
+
+def archive_old_rp_logs(guild_id, now=None):
+    """
+    Compact hot RP logs from months that ended more than RP_ARCHIVE_AFTER_DAYS ago
+    into one new segment per month. Returns the number of logs archived.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=RP_ARCHIVE_AFTER_DAYS)
+    logs = load_rp_logs(guild_id)
+
+    by_month = defaultdict(list)
+    keep = []
+    for log in logs:
+        ts = datetime.fromisoformat(log["timestamp"])
+        month_end = (ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0) + timedelta(days=32)).replace(day=1)
+        if month_end <= cutoff:
+            by_month[ts.strftime("%Y-%m")].append(log)
+        else:
+            keep.append(log)
+
+    if not by_month:
+        return 0
+
+    index = dict(load_rp_archive_index(guild_id))
+    index["segments"] = dict(index["segments"])
+    os.makedirs(guild_data_path(guild_id, RP_ARCHIVE_DIR), exist_ok=True)
+
+    for month, month_logs in sorted(by_month.items()):
+        # Segments are immutable, so late arrivals for a month get their own part
+        name, part = month, 1
+        while name in index["segments"]:
+            part += 1
+            name = f"{month}.{part}"
+
+        tmp_path = rp_segment_path(guild_id, name) + ".tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for log in month_logs:
+                f.write(json.dumps(log, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, rp_segment_path(guild_id, name))
+
+        index["segments"][name] = {
+            "month": month,
+            "count": len(month_logs),
+            "min_id": min(log["id"] for log in month_logs),
+            "max_id": max(log["id"] for log in month_logs),
+            "guilds": summarize_rp_logs(month_logs),
+        }
+
+    index["next_id"] = next_rp_log_id(guild_id, logs)
+    # Index before the hot file: a crash in between duplicates logs instead of losing them
+    save_rp_archive_index(guild_id, index)
+    save_rp_logs(guild_id, keep)
+
+    archived = len(logs) - len(keep)
+    logger.info(f"Archived {archived} RP logs of guild {guild_id} into {len(by_month)} segment(s)")
+    return archived
+
+def rp_log_counters(guild_id, logs, since=None):
+    """
+    Logger, participant and location counts for a guild from the segment summaries plus the hot logs.
+    With `since`, only hot logs from that time on are counted; the current month is never archived,
+    so any `since` inside it is exact.
+    """
+    total = 0
+    loggers, participants, locations = Counter(), Counter(), Counter()
+
+    if since is None:
+        for segment in load_rp_archive_index(guild_id)["segments"].values():
+            summary = segment["guilds"].get(guild_id)
+            if summary:
+                total += summary["count"]
+                loggers.update(summary["loggers"])
+                participants.update(summary["participants"])
+                locations.update(summary["locations"])
+
+    for log in logs:
+        if log.get("guild_id") == guild_id and (since is None or log["timestamp"] >= since):
+            total += 1
+            loggers[log["logger_id"]] += 1
+            participants.update(log["participant_ids"])
+            locations[log["location"]] += 1
+
+    return total, loggers, participants, locations
+
+@tasks.loop(hours=24)
+async def rp_archive_task():
+    for guild_id in guild_configs.guild_ids:
+        try:
+            async with rp_log_locks[guild_id]:
+                await asyncio.to_thread(archive_old_rp_logs, guild_id)
+        except Exception as e:
+            logger.error(f"RP log archival failed for guild {guild_id}: {e}", exc_info=True)
 
 # ------------------------
-# Enhanced /logrp Command with Database Storage
+# RP Log Search Index
+# ------------------------
+SEARCH_TOKEN_RE = re.compile(r"[a-z0-9]+")
+SEARCH_PAGE_SIZE = 5
+
+def tokenize_rp_text(text):
+    return SEARCH_TOKEN_RE.findall(text.lower())
+
+class RPSearchIndex:
+    """In-memory inverted index (term -> sorted log IDs) over RP log text, plus per-log filter fields"""
+
+    def __init__(self):
+        self.postings = {}
+        self.terms = []           # Sorted lazily for prefix lookups
+        self.terms_sorted = True
+        self.docs = {}            # log ID -> (guild_id, location, location_key, participant_ids, timestamp, logger_name, snippet)
+        self.ready = False
+
+    def add(self, log):
+        log_id = log["id"]
+        if log_id in self.docs:
+            return
+
+        text = " ".join((log["location"], log["description"], log["participants"], " ".join(log.get("participant_names", []))))
+        for term in set(tokenize_rp_text(text)):
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = []
+                self.terms.append(term)
+                self.terms_sorted = False
+            if postings and postings[-1] > log_id:
+                bisect.insort(postings, log_id)
+            else:
+                postings.append(log_id)
+
+        self.docs[log_id] = (
+            log.get("guild_id"),
+            log["location"],
+            normalize_location(log["location"]),
+            frozenset(log.get("participant_ids", [])),
+            log["timestamp"],
+            log["logger_name"],
+            log["description"][:100],
+        )
+
+    def _prefix_ids(self, prefix):
+        if not self.terms_sorted:
+            self.terms.sort()
+            self.terms_sorted = True
+        ids = set()
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in itertools.islice(self.terms, start, None):
+            if not term.startswith(prefix):
+                break
+            ids.update(self.postings[term])
+        return ids
+
+    def search(self, query, guild_id, location=None, participant_id=None, after=None, before=None):
+        """
+        AND together every query term (a trailing * makes it a prefix term), then apply the filters.
+        Returns matching log IDs, newest first.
+        """
+        term_sets = []
+        for word in query.lower().split():
+            tokens = tokenize_rp_text(word)
+            for i, token in enumerate(tokens):
+                if word.endswith("*") and i == len(tokens) - 1:
+                    term_sets.append(self._prefix_ids(token))
+                else:
+                    term_sets.append(self.postings.get(token, []))
+
+        if term_sets:
+            # Walk the shortest posting list and probe the others
+            term_sets.sort(key=len)
+            candidates = term_sets[0]
+            for other in term_sets[1:]:
+                if isinstance(other, set):
+                    candidates = [log_id for log_id in candidates if log_id in other]
+                else:
+                    candidates = [log_id for log_id in candidates if _sorted_contains(other, log_id)]
+                if not candidates:
+                    break
+        else:
+            candidates = self.docs.keys()
+
+        results = []
+        for log_id in candidates:
+            doc_guild, _, doc_location_key, doc_participants, doc_time, _, _ = self.docs[log_id]
+            if doc_guild != guild_id:
+                continue
+            if location and doc_location_key != normalize_location(location):
+                continue
+            if participant_id and participant_id not in doc_participants:
+                continue
+            if after and doc_time < after:
+                continue
+            if before and doc_time >= before:
+                continue
+            results.append(log_id)
+
+        results.sort(key=lambda log_id: self.docs[log_id][4], reverse=True)
+        return results
+
+def _sorted_contains(items, value):
+    i = bisect.bisect_left(items, value)
+    return i < len(items) and items[i] == value
+
+# Log IDs are only unique within a guild, so every guild has its own index
+rp_search_indexes = defaultdict(RPSearchIndex)  # guild ID -> RPSearchIndex
+
+def build_rp_search_index(guild_id, snapshot=None):
+    """Index every archived and hot RP log of a guild (run off the event loop at startup, from a snapshot)"""
+    index = RPSearchIndex()
+    for log in iter_all_rp_logs(guild_id, snapshot):
+        index.add(log)
+    return index
+
+# ------------------------
+# Location Autocomplete
+# ------------------------
+AUTOCOMPLETE_LIMIT = 25  # Discord's maximum number of choices
+
+def normalize_location(location):
+    """Key that merges spelling variants such as 'Mission Bay' and 'missionbay'"""
+    return re.sub(r"[^a-z0-9]", "", location.lower())
+
+class LocationTrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []  # Most frequent location keys under this node, best first
+
+class LocationTrie:
+    """Prefix trie of known locations; every node caches its top completions so lookups never walk subtrees"""
+
+    def __init__(self):
+        self.root = LocationTrieNode()
+        self.counts = {}     # location key -> number of logs
+        self.spellings = {}  # location key -> Counter of stored spellings
+        self.ready = False   # Seeded from the store; an unready trie only holds what was logged since startup
+
+    def add(self, location, count=1):
+        key = normalize_location(location)
+        if not key:
+            return
+        self.spellings.setdefault(key, Counter())[location.lower()] += count
+        self.counts[key] = self.counts.get(key, 0) + count
+
+        node = self.root
+        self._bump(node, key)
+        for char in key:
+            node = node.children.setdefault(char, LocationTrieNode())
+            self._bump(node, key)
+
+    def _bump(self, node, key):
+        # Counts only grow, so a key can only enter a node's top list when its own count changes
+        top = node.top
+        if key not in top:
+            if len(top) < AUTOCOMPLETE_LIMIT:
+                top.append(key)
+            elif self.counts[key] > self.counts[top[-1]]:
+                top[-1] = key
+            else:
+                return
+        top.sort(key=self.counts.__getitem__, reverse=True)
+
+    def canonical(self, location):
+        """Most used spelling of a known location, or the lowercased input for a new one"""
+        spellings = self.spellings.get(normalize_location(location))
+        if spellings:
+            return spellings.most_common(1)[0][0]
+        return location.lower()
+
+    def complete(self, prefix):
+        """Known locations starting with prefix, most frequent first"""
+        node = self.root
+        for char in normalize_location(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self.canonical(key) for key in node.top]
+
+location_tries = defaultdict(LocationTrie)  # guild ID -> LocationTrie
+
+def build_location_trie(guild_id):
+    """Seed a guild's trie from its archived segment summaries and hot logs (no segment decompression)"""
+    trie = LocationTrie()
+    for segment in load_rp_archive_index(guild_id)["segments"].values():
+        for summary in segment["guilds"].values():
+            for location, count in summary["locations"].items():
+                trie.add(location, count)
+    for log in load_rp_logs(guild_id):
+        trie.add(log["location"])
+    return trie
+
+async def location_autocomplete(interaction: discord.Interaction, current: str):
+    trie = location_tries[str(interaction.guild_id)]
+    return [app_commands.Choice(name=location.title(), value=location) for location in trie.complete(current)]
+
+# ------------------------
+# Participant Name Matching
 # ------------------------
-CHANNEL_RP_LOGS = 1429695512910757961  # Your RP logs channel
-ROLEPLAY_BANNER_URL = "https://media.discordapp.net/attachments/1427494059257233449/1432155262566793418/Game_log.png?ex=69000606&is=68feb486&hm=01bb72f8cea2e76f9ef49dd10b80d85ebde94f93228bf0b104da9bb46c82672c&=&format=webp&quality=lossless"
+PARTICIPANT_MATCH_THRESHOLD = float(os.getenv("PARTICIPANT_MATCH_THRESHOLD", "0.7"))
+PARTICIPANT_MENTION_RE = re.compile(r"<@!?(\d+)>")
+# Participants are separated by commas, semicolons, slashes, "&", "+", "and" or newlines
+PARTICIPANT_SPLIT_RE = re.compile(r"\s*(?:[,;/&+\n]|\band\b)\s*", re.IGNORECASE)
+
+def normalize_member_name(name):
+    return " ".join(re.sub(r"[^a-z0-9]", " ", (name or "").lower()).split())
+
+def name_trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class MemberNameIndex:
+    """Trigram index over a guild's member display names, global names and usernames"""
+
+    def __init__(self):
+        self.grams = defaultdict(set)  # trigram -> {(member_id, name)}
+        self.names = {}                # member_id -> {name: trigram count}
+
+    def add_member(self, member):
+        self.remove_member(member.id)
+        names = {normalize_member_name(n) for n in (member.display_name, member.global_name, member.name)}
+        names.discard("")
+        self.names[member.id] = {}
+        for name in names:
+            grams = name_trigrams(name)
+            self.names[member.id][name] = len(grams)
+            for gram in grams:
+                self.grams[gram].add((member.id, name))
+
+    def remove_member(self, member_id):
+        for name in self.names.pop(member_id, {}):
+            for gram in name_trigrams(name):
+                entries = self.grams.get(gram)
+                if entries is not None:
+                    entries.discard((member_id, name))
+                    if not entries:
+                        del self.grams[gram]
+
+    def match(self, text):
+        """Member ID whose name best matches text (Dice similarity), or None below the threshold or on a tie"""
+        name = normalize_member_name(text)
+        if not name:
+            return None
+        grams = name_trigrams(name)
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+
+        best = {}  # member_id -> best score over that member's names
+        for (member_id, candidate), count in shared.items():
+            score = 2 * count / (len(grams) + self.names[member_id][candidate])
+            if score > best.get(member_id, 0):
+                best[member_id] = score
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < PARTICIPANT_MATCH_THRESHOLD:
+            return None
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            return None
+        return ranked[0][0]
+
+member_name_indexes = {}  # guild ID -> MemberNameIndex
+
+def build_member_name_index(guild):
+    index = MemberNameIndex()
+    for member in guild.members:
+        if not member.bot:
+            index.add_member(member)
+    member_name_indexes[guild.id] = index
+
+# Lean mode only indexes members who have interacted, so a name that misses the index is
+# asked of the gateway once (prefix match on username/nickname) and the answer indexed
+MEMBER_QUERY_LIMIT = 5
+MEMBER_QUERY_MEMORY = 2048  # Recent (guild, name) queries remembered so a miss isn't re-asked
+MEMBER_QUERY_TTL = 600      # Seconds before a remembered miss may be asked again (the member may have joined)
+
+_member_queries = OrderedDict()  # (guild ID, normalized name) -> monotonic time queried, oldest first
+
+async def query_members_by_name(guild, name):
+    """Ask the gateway for members whose name starts with `name` and add them to the member cache and name index"""
+    key = (guild.id, normalize_member_name(name))
+    now = time.monotonic()
+    if not key[1] or now - _member_queries.get(key, -MEMBER_QUERY_TTL) < MEMBER_QUERY_TTL:
+        return
+    _member_queries[key] = now
+    _member_queries.move_to_end(key)
+    while len(_member_queries) > MEMBER_QUERY_MEMORY:
+        _member_queries.popitem(last=False)
+
+    try:
+        members = await guild.query_members(query=name, limit=MEMBER_QUERY_LIMIT, cache=False)
+    except (asyncio.TimeoutError, ValueError):
+        return
+    for member in members:
+        remember_member(member)
+
+async def resolve_participants(guild, participants, fetch_missing=True):
+    """
+    Turn the free-text participants field into (participant_ids, participant_names).
+    Mentions are taken as-is; every other comma/"and"-separated name is matched against the member index
+    (in lean mode, a miss is retried after asking the gateway for that name).
+    With fetch_missing=False nothing is fetched: mentioned members missing from the cache are not looked up
+    over REST and unmatched names are not queried on the gateway (backfills would hit its rate limit).
+    """
+    participant_ids = []
+    participant_names = []
+
+    for mention_id in PARTICIPANT_MENTION_RE.findall(participants):
+        if mention_id in participant_ids:
+            continue
+        member = find_member(guild, mention_id)
+        if member is None and fetch_missing:
+            try:
+                member = await fetch_member_cached(guild, mention_id)
+            except:
+                member = None
+        participant_ids.append(mention_id)
+        participant_names.append(member.display_name if member else f"User_{mention_id}")
+
+    index = member_name_indexes.get(guild.id)
+    remainder = PARTICIPANT_MENTION_RE.sub(",", participants)
+    for chunk in PARTICIPANT_SPLIT_RE.split(remainder):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+
+        member_id = index.match(chunk) if index else None
+        if member_id is None and LEAN_GATEWAY and fetch_missing and index is not None:
+            await query_members_by_name(guild, chunk)
+            member_id = index.match(chunk)
+        member = find_member(guild, member_id) if member_id else None
+        if member is None:
+            participant_names.append(chunk)
+        elif str(member_id) not in participant_ids:
+            participant_ids.append(str(member_id))
+            participant_names.append(member.display_name)
+
+    return participant_ids, participant_names
+
+@bot.event
+async def on_raw_member_remove(payload):
+    # Raw event so it also fires for members outside discord.py's cache (lean mode)
+    member_cache.discard(payload.guild_id, payload.user.id)
+    index = member_name_indexes.get(payload.guild_id)
+    if index:
+        index.remove_member(payload.user.id)
 
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="logrp", description="Log a roleplay event")
+@bot.event
+async def on_member_update(before, after):
+    index = member_name_indexes.get(after.guild.id)
+    if index and (before.display_name != after.display_name):
+        index.add_member(after)
+
+@bot.event
+async def on_user_update(before, after):
+    if before.name == after.name and before.global_name == after.global_name:
+        return
+    for guild in after.mutual_guilds:
+        index = member_name_indexes.get(guild.id)
+        member = guild.get_member(after.id)
+        if index and member:
+            index.add_member(member)
+
+# ------------------------
+# Member Profiles
+# ------------------------
+# Each guild's member_profiles.json is a materialized view of its members' activity,
+# keyed by member ID. /logrp and /ssd update it incrementally; it can always be
+# rebuilt from the guild's RP log store and session history.
+MEMBER_PROFILES_FILE = "member_profiles.json"
+PROFILES_SAVE_DELAY = 2  # Seconds to coalesce profile updates into one write
+
+_member_profiles = {}                        # str guild ID -> profiles
+_dirty_profiles = set()                      # str guild IDs with changes not yet on disk
+_profile_save_tasks = {}                     # str guild ID -> pending delayed save
+_profile_write_locks = defaultdict(asyncio.Lock)
+
+@metrics.time_storage("member_profiles", "load")
+def load_member_profiles(guild_id):
+    """Load a guild's member profiles (cached in memory after the first read)"""
+    profiles = _member_profiles.get(str(guild_id))
+    if profiles is None:
+        profiles = {}
+        path = guild_data_path(guild_id, MEMBER_PROFILES_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    profiles = json.load(f)
+            except:
+                logger.error(f"Failed to read member profiles for guild {guild_id}", exc_info=True)
+        _member_profiles[str(guild_id)] = profiles
+    return profiles
+
+@metrics.time_storage("member_profiles", "save")
+def write_member_profiles(guild_id, payload):
+    path = guild_data_path(guild_id, MEMBER_PROFILES_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def save_member_profiles(guild_id, profiles):
+    """Save a guild's member profiles to JSON right away (startup and tooling; commands use schedule_profiles_save)"""
+    write_member_profiles(guild_id, json.dumps(profiles, ensure_ascii=False))
+    _member_profiles[str(guild_id)] = profiles
+    _dirty_profiles.discard(str(guild_id))
+
+async def flush_member_profiles(guild_id):
+    """Write a guild's profiles if they have unsaved changes: serialized here, written on a worker thread"""
+    guild_id = str(guild_id)
+    async with _profile_write_locks[guild_id]:
+        if guild_id not in _dirty_profiles:
+            return
+        _dirty_profiles.discard(guild_id)
+        payload = json.dumps(_member_profiles[guild_id], ensure_ascii=False)
+        try:
+            await asyncio.to_thread(write_member_profiles, guild_id, payload)
+        except Exception as e:
+            _dirty_profiles.add(guild_id)
+            logger.error(f"Failed to save member profiles for guild {guild_id}: {e}", exc_info=True)
+
+async def flush_all_member_profiles():
+    for guild_id in list(_dirty_profiles):
+        await flush_member_profiles(guild_id)
+
+def schedule_profiles_save(guild_id):
+    """Mark a guild's profiles dirty and coalesce bursts of updates into one write a couple of seconds later"""
+    guild_id = str(guild_id)
+    _dirty_profiles.add(guild_id)
+    task = _profile_save_tasks.get(guild_id)
+    if task and not task.done():
+        return
+
+    async def delayed_save():
+        while guild_id in _dirty_profiles:
+            await asyncio.sleep(PROFILES_SAVE_DELAY)
+            await flush_member_profiles(guild_id)
+
+    _profile_save_tasks[guild_id] = asyncio.create_task(delayed_save())
+
+async def replace_member_profiles(guild_id, profiles):
+    """Swap in rebuilt profiles and write them now"""
+    _member_profiles[str(guild_id)] = profiles
+    _dirty_profiles.add(str(guild_id))
+    await flush_member_profiles(guild_id)
+
+def get_member_profile(profiles, member_id, name=None):
+    profile = profiles.setdefault(str(member_id), {
+        "name": name,
+        "rp_logged": 0,
+        "rp_participated": 0,
+        "locations": {},
+        "sessions_hosted": 0,
+        "host_minutes": 0,
+        "last_active": None,
+    })
+    if name:
+        profile["name"] = name
+    return profile
+
+def touch_profile(profile, timestamp):
+    if not profile["last_active"] or timestamp > profile["last_active"]:
+        profile["last_active"] = timestamp
+
+def apply_rp_log_to_profiles(profiles, log):
+    """Fold one RP log into its logger's and participants' profiles"""
+    logger_profile = get_member_profile(profiles, log["logger_id"], log["logger_name"])
+    logger_profile["rp_logged"] += 1
+
+    for participant_id in set(log.get("participant_ids", [])):
+        get_member_profile(profiles, participant_id)["rp_participated"] += 1
+
+    # Locations and activity count once per member involved, whether they logged or played
+    for member_id in set(log.get("participant_ids", [])) | {log["logger_id"]}:
+        profile = get_member_profile(profiles, member_id)
+        profile["locations"][log["location"]] = profile["locations"].get(log["location"], 0) + 1
+        touch_profile(profile, log["timestamp"])
+
+def apply_session_to_profiles(profiles, session):
+    """Fold one finished session into its host's profile"""
+    profile = get_member_profile(profiles, session["host_id"], session["host_name"])
+    profile["sessions_hosted"] += 1
+    profile["host_minutes"] += session.get("duration_minutes", 0)
+    touch_profile(profile, session.get("end_time") or session["start_time"])
+
+def rebuild_member_profiles(guild_id):
+    """Recompute a guild's profiles from scratch by streaming its RP log store and session history"""
+    profiles = {}
+    for log in iter_all_rp_logs(guild_id):
+        apply_rp_log_to_profiles(profiles, log)
+    for session in load_session_data(guild_id).get("sessions", []):
+        apply_session_to_profiles(profiles, session)
+    return profiles
+
+# ------------------------
+# Enhanced /logrp Command with Database Storage
+# ------------------------
+def store_rp_logs(guild_id, entries):
+    """
+    Assign IDs to a guild's new RP log entries, append them to its hot segment and update
+    the search index, location trie and member profiles. Call with the guild's rp_log_locks held.
+    """
+    logs = load_rp_logs(guild_id)
+    next_id = next_rp_log_id(guild_id, logs)
+    stored = []
+    for offset, entry in enumerate(entries):
+        stored.append({"id": next_id + offset, **entry})
+
+    logs.extend(stored)
+    save_rp_logs(guild_id, logs)
+    rp_log_versions[str(guild_id)] += len(stored)
+
+    profiles = load_member_profiles(guild_id)
+    for entry in stored:
+        rp_search_indexes[int(guild_id)].add(entry)
+        location_tries[str(guild_id)].add(entry["location"])
+        apply_rp_log_to_profiles(profiles, entry)
+    schedule_profiles_save(guild_id)
+
+    return stored
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="logrp", description="Log a roleplay event")
 @app_commands.describe(
     location="Where did the RP take place?",
     description="Brief description of what happened.",
     participants="Who was involved in the RP?"
 )
+@app_commands.autocomplete(location=location_autocomplete)
 async def logrp(interaction: discord.Interaction, location: str, description: str, participants: str):
-    log_channel = interaction.guild.get_channel(CHANNEL_RP_LOGS)
+    log_channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).rp_logs_channel_id)
     if not log_channel:
         await interaction.response.send_message("⚠️ Log channel not found. Please contact an admin.", ephemeral=True)
         return
@@ -970,42 +2999,25 @@ async def logrp(interaction: discord.Interaction, location: str, description: st
     embed.timestamp = discord.utils.utcnow()
     
     # Send to channel
-    await log_channel.send(embed=embed)
-    
-    # Save to database
-    logs = load_rp_logs()
-    
-    # Extract participant mentions/names for better tracking
-    participant_list = re.findall(r'<@!?(\d+)>|([A-Za-z0-9_]+)', participants)
-    participant_ids = []
-    participant_names = []
+    log_message = await log_channel.send(embed=embed)
     
-    for mention_id, name in participant_list:
-        if mention_id:
-            participant_ids.append(mention_id)
-            try:
-                member = await interaction.guild.fetch_member(int(mention_id))
-                participant_names.append(member.display_name)
-            except:
-                participant_names.append(f"User_{mention_id}")
-        elif name:
-            participant_names.append(name)
+    # Resolve mentions and free-text names to members for better tracking
+    participant_ids, participant_names = await resolve_participants(interaction.guild, participants)
     
-    rp_entry = {
-        "id": len(logs) + 1,
-        "logger_id": str(interaction.user.id),
-        "logger_name": interaction.user.display_name,
-        "location": location.lower(),
-        "description": description,
-        "participants": participants,
-        "participant_ids": participant_ids,
-        "participant_names": participant_names,
-        "timestamp": datetime.utcnow().isoformat(),
-        "guild_id": str(interaction.guild_id)
-    }
-    
-    logs.append(rp_entry)
-    save_rp_logs(logs)
+    # Save to database (no awaits between load and save)
+    async with rp_log_locks[interaction.guild_id]:
+        rp_entry, = store_rp_logs(interaction.guild_id, [{
+            "logger_id": str(interaction.user.id),
+            "logger_name": interaction.user.display_name,
+            "location": location_tries[str(interaction.guild_id)].canonical(location),
+            "description": description,
+            "participants": participants,
+            "participant_ids": participant_ids,
+            "participant_names": participant_names,
+            "timestamp": datetime.utcnow().isoformat(),
+            "guild_id": str(interaction.guild_id),
+            "message_id": str(log_message.id)
+        }])
     
     await interaction.response.send_message(f"✅ Roleplay log #{rp_entry['id']} posted successfully!", ephemeral=True)
 
@@ -1014,15 +3026,17 @@ async def logrp(interaction: discord.Interaction, location: str, description: st
 # ------------------------
 # /rplog Command - View Specific RP Log by ID
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="rplog", description="View a specific RP log by ID")
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rplog", description="View a specific RP log by ID")
 @app_commands.describe(log_id="The ID number of the RP log")
 async def rplog(interaction: discord.Interaction, log_id: int):
-    logs = load_rp_logs()
-    
-    # Find the log
-    log = next((l for l in logs if l["id"] == log_id and l.get("guild_id") == str(interaction.guild_id)), None)
+    logs = load_rp_logs(interaction.guild_id)
     
+    # Find the log in the hot segment, then in the one archived segment covering the ID
+    log = next((l for l in logs if l["id"] == log_id), None)
     if not log:
+        log = await asyncio.to_thread(find_archived_rp_log, interaction.guild_id, log_id)
+    
+    if not log or log.get("guild_id") != str(interaction.guild_id):
         await interaction.response.send_message(f"❌ RP log #{log_id} not found!", ephemeral=True)
         return
     
@@ -1042,27 +3056,57 @@ async def rplog(interaction: discord.Interaction, log_id: int):
 # ------------------------
 # /rpleaderboard Command - Top RP Contributors
 # ------------------------
-@bot.tree.command(guild=discord.Object(id=GUILD_ID), name="rpleaderboard", description="View top RP contributors")
+# Rendered embeds are cached per (guild, category, period). An entry is reused while its
+# RP log version matches (store_rp_logs bumps it) and it is younger than the member TTL,
+# after which member lookups are redone.
+LEADERBOARD_MEMBER_TTL = 300  # seconds
+
+rp_log_versions = defaultdict(int)  # guild ID -> write counter
+leaderboard_cache = {}              # (guild ID, category, period) -> (version, rendered_at, embed payload)
+
+async def get_leaderboard_member(guild, user_id):
+    """Cached member, falling back to REST; None if they left"""
+    try:
+        return await fetch_member_cached(guild, user_id)
+    except:
+        return None
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rpleaderboard", description="View top RP contributors")
 @app_commands.describe(
-    category="What to rank by"
+    category="What to rank by",
+    period="Time range to rank over"
 )
 @app_commands.choices(category=[
     app_commands.Choice(name="Most RPs Logged", value="logged"),
     app_commands.Choice(name="Most RPs Participated", value="participated"),
     app_commands.Choice(name="Most Active Locations", value="locations")
+], period=[
+    app_commands.Choice(name="All Time", value="all"),
+    app_commands.Choice(name="This Month", value="month")
 ])
-async def rpleaderboard(interaction: discord.Interaction, category: app_commands.Choice[str] = None):
-    logs = load_rp_logs()
+async def rpleaderboard(interaction: discord.Interaction, category: app_commands.Choice[str] = None,
+                        period: app_commands.Choice[str] = None):
+    guild_id = str(interaction.guild_id)
+    category_type = category.value if category else "logged"
+    period_type = period.value if period else "all"
+    cache_key = (guild_id, category_type, period_type)
+
+    cached = leaderboard_cache.get(cache_key)
+    if cached and cached[0] == rp_log_versions[guild_id] and time.monotonic() - cached[1] < LEADERBOARD_MEMBER_TTL:
+        await interaction.response.send_message(embed=discord.Embed.from_dict(cached[2]))
+        return
+    version = rp_log_versions[guild_id]
+
+    logs = load_rp_logs(guild_id)
     
-    # Filter logs for this guild
-    guild_logs = [log for log in logs if log.get("guild_id") == str(interaction.guild_id)]
+    # Hot segment plus archived segment summaries for this guild
+    since = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat() if period_type == "month" else None
+    total_logs, logger_counter, participation_counter, location_counter = rp_log_counters(guild_id, logs, since=since)
     
-    if not guild_logs:
+    if not total_logs:
         await interaction.response.send_message("📊 No RP logs found yet! Start logging with `/logrp`", ephemeral=True)
         return
     
-    category_type = category.value if category else "logged"
-    
     embed = discord.Embed(
         title="🏆 RP Leaderboard",
         color=discord.Color.gold(),
@@ -1070,53 +3114,39 @@ async def rpleaderboard(interaction: discord.Interaction, category: app_commands
     )
     
     if category_type == "logged":
-        # Count RPs logged by each user
-        logger_counter = Counter()
-        for log in guild_logs:
-            logger_counter[log["logger_id"]] += 1
-        
         top_loggers = logger_counter.most_common(10)
         leaderboard_text = ""
         
         for idx, (user_id, count) in enumerate(top_loggers, 1):
-            try:
-                member = await interaction.guild.fetch_member(int(user_id))
+            member = await get_leaderboard_member(interaction.guild, user_id)
+            if member:
                 medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
                 leaderboard_text += f"{medal} {member.mention} - **{count}** RPs logged\n"
-            except:
-                pass
         
         embed.description = "Top users who have logged the most RPs"
         embed.add_field(name="📝 Most RPs Logged", value=leaderboard_text or "No data", inline=False)
     
     elif category_type == "participated":
-        # Count participations
-        participation_counter = Counter()
-        for log in guild_logs:
-            for pid in log["participant_ids"]:
-                participation_counter[pid] += 1
-        
         top_participants = participation_counter.most_common(10)
         leaderboard_text = ""
         
         for idx, (user_id, count) in enumerate(top_participants, 1):
-            try:
-                member = await interaction.guild.fetch_member(int(user_id))
+            member = await get_leaderboard_member(interaction.guild, user_id)
+            if member:
                 medal = "🥇" if idx == 1 else "🥈" if idx == 2 else "🥉" if idx == 3 else f"**{idx}.**"
                 leaderboard_text += f"{medal} {member.mention} - **{count}** RPs\n"
-            except:
-                pass
         
         embed.description = "Top users who have participated in the most RPs"
         embed.add_field(name="👥 Most Active RPers", value=leaderboard_text or "No data", inline=False)
     
     elif category_type == "locations":
-        # Count most popular locations
-        location_counter = Counter()
-        for log in guild_logs:
-            location_counter[log["location"]] += 1
+        # Merge spelling variants logged before autocomplete existed
+        trie = location_tries[str(interaction.guild_id)]
+        merged_locations = Counter()
+        for location, count in location_counter.items():
+            merged_locations[trie.canonical(location)] += count
         
-        top_locations = location_counter.most_common(10)
+        top_locations = merged_locations.most_common(10)
         leaderboard_text = ""
         
         for idx, (location, count) in enumerate(top_locations, 1):
@@ -1126,14 +3156,466 @@ async def rpleaderboard(interaction: discord.Interaction, category: app_commands
         embed.description = "Most popular RP locations"
         embed.add_field(name="📍 Top Locations", value=leaderboard_text or "No data", inline=False)
     
-    embed.set_footer(text=f"Total RPs in server: {len(guild_logs)}")
+    if period_type == "month":
+        embed.title = "🏆 RP Leaderboard — This Month"
+    embed.set_footer(text=f"Total RPs in server: {total_logs}")
+    leaderboard_cache[cache_key] = (version, time.monotonic(), embed.to_dict())
+    await interaction.response.send_message(embed=embed)
+
+# ------------------------
+# /rpsearch Command - Full-Text Search Over RP Logs
+# ------------------------
+def build_rpsearch_embed(index, query, results, page):
+    """Render one page of search results from the index alone (no storage reads)"""
+    total_pages = max(1, (len(results) + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE)
+    embed = discord.Embed(
+        title="🔎 RP Log Search",
+        description=f"**{len(results)}** result(s) for `{query or '*'}`",
+        color=discord.Color.dark_blue()
+    )
+
+    for log_id in results[page * SEARCH_PAGE_SIZE:(page + 1) * SEARCH_PAGE_SIZE]:
+        _, location, _, _, timestamp, logger_name, snippet = index.docs[log_id]
+        logged_at = datetime.fromisoformat(timestamp)
+        embed.add_field(
+            name=f"#{log_id} — {location.title()}",
+            value=f"{snippet}\n*{logger_name} • {logged_at.strftime('%b %d, %Y')}*",
+            inline=False
+        )
+
+    embed.set_footer(text=f"Page {page + 1}/{total_pages} • Use /rplog <id> for full details")
+    return embed
+
+class RPSearchView(View):
+    def __init__(self, user_id, index, query, results):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.index = index
+        self.query = query
+        self.results = results
+        self.page = 0
+        self.last_page = max(0, (len(results) - 1) // SEARCH_PAGE_SIZE)
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.last_page
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("⚠️ Run `/rpsearch` yourself to page through results.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=build_rpsearch_embed(self.index, self.query, self.results, self.page), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.last_page, self.page + 1)
+        self.update_buttons()
+        await interaction.response.edit_message(embed=build_rpsearch_embed(self.index, self.query, self.results, self.page), view=self)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rpsearch", description="Search RP logs by keyword")
+@app_commands.describe(
+    query="Keywords (all must match). End a word with * to match prefixes, e.g. robb*",
+    location="Only logs at this location",
+    participant="Only logs this member participated in",
+    after="Only logs on or after this date (YYYY-MM-DD)",
+    before="Only logs before this date (YYYY-MM-DD)"
+)
+@app_commands.autocomplete(location=location_autocomplete)
+async def rpsearch(interaction: discord.Interaction, query: str = "", location: str = None,
+                   participant: discord.Member = None, after: str = None, before: str = None):
+    index = rp_search_indexes[interaction.guild_id]
+    if not index.ready:
+        await interaction.response.send_message("⏳ The RP log search index is still being built. Try again shortly.", ephemeral=True)
+        return
+
+    try:
+        after_iso = datetime.strptime(after, "%Y-%m-%d").isoformat() if after else None
+        before_iso = datetime.strptime(before, "%Y-%m-%d").isoformat() if before else None
+    except ValueError:
+        await interaction.response.send_message("⚠️ Dates must be in `YYYY-MM-DD` format.", ephemeral=True)
+        return
+
+    if not query.strip() and not (location or participant or after or before):
+        await interaction.response.send_message("⚠️ Give a search query or at least one filter.", ephemeral=True)
+        return
+
+    results = index.search(
+        query,
+        str(interaction.guild_id),
+        location=location,
+        participant_id=str(participant.id) if participant else None,
+        after=after_iso,
+        before=before_iso
+    )
+
+    if not results:
+        await interaction.response.send_message("🔎 No RP logs matched your search.", ephemeral=True)
+        return
+
+    view = RPSearchView(interaction.user.id, index, query, results)
+    await interaction.response.send_message(embed=build_rpsearch_embed(index, query, results, 0), view=view, ephemeral=True)
+
+# ------------------------
+# /profile Command - Member Activity Dossier
+# ------------------------
+@bot.tree.command(guilds=COMMAND_GUILDS, name="profile", description="View a member's RP and session activity")
+@app_commands.describe(member="Member to view (defaults to you)")
+async def profile(interaction: discord.Interaction, member: discord.Member = None):
+    member = member or interaction.user
+    member_profile = load_member_profiles(interaction.guild_id).get(str(member.id))
+
+    if not member_profile:
+        await interaction.response.send_message(f"📇 No recorded activity for {member.mention} yet.", ephemeral=True)
+        return
+
+    top_locations = sorted(member_profile["locations"].items(), key=lambda item: item[1], reverse=True)[:3]
+    host_minutes = member_profile["host_minutes"]
+
+    embed = discord.Embed(title=f"📇 {member.display_name}", color=discord.Color.dark_blue())
+    embed.set_thumbnail(url=member.display_avatar.url)
+    embed.add_field(name="📝 RPs Logged", value=f"**{member_profile['rp_logged']}**", inline=True)
+    embed.add_field(name="👥 RPs Participated", value=f"**{member_profile['rp_participated']}**", inline=True)
+    embed.add_field(name="🎮 Sessions Hosted", value=f"**{member_profile['sessions_hosted']}**", inline=True)
+    embed.add_field(name="⏱️ Host Time", value=f"**{host_minutes // 60}h {host_minutes % 60}m**", inline=True)
+    if member_profile["last_active"]:
+        last_active = datetime.fromisoformat(member_profile["last_active"])
+        embed.add_field(name="🕒 Last Active", value=f"<t:{int(last_active.replace(tzinfo=timezone.utc).timestamp())}:R>", inline=True)
+    embed.add_field(
+        name="📍 Top Locations",
+        value="\n".join(f"**{location.title()}** — {count}" for location, count in top_locations) or "None yet",
+        inline=False
+    )
+
     await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rebuildprofiles", description="Rebuild all member profiles from the log and session stores (staff only)")
+@require_staff_permission()
+async def rebuildprofiles(interaction: discord.Interaction):
+    await interaction.response.defer(ephemeral=True)
+
+    async with rp_log_locks[interaction.guild_id]:
+        profiles = await asyncio.to_thread(rebuild_member_profiles, interaction.guild_id)
+        await replace_member_profiles(interaction.guild_id, profiles)
+
+    await interaction.followup.send(f"✅ Rebuilt {len(profiles)} member profiles.", ephemeral=True)
+
+# ------------------------
+# /rpbackfill Command - Import RP Logs From Channel History
+# ------------------------
+RP_BACKFILL_CHECKPOINT_FILE = "rp_backfill_checkpoint.json"
+RP_BACKFILL_BATCH_SIZE = 100
+# A /logrp record is stored moments after its message is posted, and legacy records
+# match within 120 s, so a duplicate always lies within this much of the message time
+RP_BACKFILL_DEDUP_WINDOW = timedelta(hours=1)
+RP_LOG_EMBED_TITLE = "📘 Roleplay Log"
+AVATAR_USER_ID_RE = re.compile(r"/(?:avatars|users)/(\d+)/")
+
+rp_backfill_tasks = {}  # guild ID -> running backfill task
+
+@metrics.time_storage("rp_backfill", "load")
+def load_rp_backfill_checkpoint(guild_id):
+    path = guild_data_path(guild_id, RP_BACKFILL_CHECKPOINT_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            logger.error(f"Failed to read RP backfill checkpoint for guild {guild_id}", exc_info=True)
+    return {"last_message_id": None, "scanned": 0, "imported": 0, "duplicates": 0, "skipped": 0}
+
+@metrics.time_storage("rp_backfill", "save")
+def save_rp_backfill_checkpoint(guild_id, checkpoint):
+    write_json_atomic(guild_data_path(guild_id, RP_BACKFILL_CHECKPOINT_FILE), checkpoint, indent=2)
+
+def filter_new_rp_logs(guild_id, records):
+    """
+    Drop records that are already stored, checking them only against the stored logs from
+    the months they fall in (those months' archived segments plus the hot logs), so memory
+    is bounded by a few months rather than the guild's whole history. Call with the guild's
+    rp_log_locks held, off the event loop.
+    """
+    months = set()
+    for record in records:
+        timestamp = datetime.fromisoformat(record["timestamp"])
+        months.add((timestamp - RP_BACKFILL_DEDUP_WINDOW).strftime("%Y-%m"))
+        months.add((timestamp + RP_BACKFILL_DEDUP_WINDOW).strftime("%Y-%m"))
+
+    segments = [name for name, segment in load_rp_archive_index(guild_id)["segments"].items() if segment["month"] in months]
+    stored = itertools.chain.from_iterable(load_rp_segment(guild_id, name).values() for name in segments)
+
+    message_ids = set()
+    legacy = defaultdict(list)
+    for log in itertools.chain(stored, load_rp_logs(guild_id)):
+        if log["timestamp"][:7] not in months:
+            continue
+        if log.get("message_id"):
+            message_ids.add(log["message_id"])
+        else:
+            legacy[(log["description"], log["participants"])].append(datetime.fromisoformat(log["timestamp"]))
+
+    return [
+        record for record in records
+        if record["message_id"] not in message_ids and not is_legacy_duplicate(
+            legacy, record["description"], record["participants"], datetime.fromisoformat(record["timestamp"]))
+    ]
+
+def is_legacy_duplicate(legacy, description, participants, timestamp):
+    return any(abs((timestamp - t).total_seconds()) <= 120 for t in legacy.get((description, participants), ()))
+
+async def parse_rp_log_message(message):
+    """Turn a "📘 Roleplay Log" embed posted by /logrp back into an RP log record, or None"""
+    if message.author.id != bot.user.id or not message.embeds:
+        return None
+    embed = message.embeds[0]
+    if embed.title != RP_LOG_EMBED_TITLE:
+        return None
+
+    fields = {field.name: field.value for field in embed.fields}
+    location = fields.get("📍 Location")
+    description = fields.get("📝 Roleplay")
+    participants = fields.get("👥 Participants", "")
+    if not location or not description:
+        return None
+
+    # The footer reads "Logged by <name>"; its icon URL usually carries the logger's user ID
+    footer_text = embed.footer.text or ""
+    logger_name = footer_text[len("Logged by "):] if footer_text.startswith("Logged by ") else "Unknown"
+    id_match = AVATAR_USER_ID_RE.search(embed.footer.icon_url or "")
+    if id_match:
+        logger_id = id_match.group(1)
+    else:
+        index = member_name_indexes.get(message.guild.id)
+        matched = index.match(logger_name) if index else None
+        logger_id = str(matched) if matched else "0"
+
+    timestamp = (embed.timestamp or message.created_at).astimezone(timezone.utc).replace(tzinfo=None)
+    participant_ids, participant_names = await resolve_participants(message.guild, participants, fetch_missing=False)
+
+    return {
+        "logger_id": logger_id,
+        "logger_name": logger_name,
+        "location": location_tries[str(message.guild.id)].canonical(location),
+        "description": description,
+        "participants": participants,
+        "participant_ids": participant_ids,
+        "participant_names": participant_names,
+        "timestamp": timestamp.isoformat(),
+        "guild_id": str(message.guild.id),
+        "message_id": str(message.id),
+        "backfilled": True
+    }
+
+async def run_rp_backfill(channel, report):
+    """
+    Stream the RP logs channel oldest-first from the checkpoint, importing unseen log embeds
+    in batches. The checkpoint only advances after a batch is saved, so a crash or restart resumes cleanly.
+    """
+    guild_id = channel.guild.id
+    checkpoint = load_rp_backfill_checkpoint(guild_id)
+    after = discord.Object(id=int(checkpoint["last_message_id"])) if checkpoint["last_message_id"] else None
+
+    batch = []
+    since_flush = 0
+
+    async def flush(last_message_id):
+        if batch:
+            # Deduplicate against the store under the lock, so /logrp and the archiver can't slip in between
+            async with rp_log_locks[guild_id]:
+                fresh = await asyncio.to_thread(filter_new_rp_logs, guild_id, batch)
+                if fresh:
+                    store_rp_logs(guild_id, fresh)
+            checkpoint["imported"] += len(fresh)
+            checkpoint["duplicates"] += len(batch) - len(fresh)
+            batch.clear()
+        checkpoint["last_message_id"] = str(last_message_id)
+        save_rp_backfill_checkpoint(guild_id, checkpoint)
+        await report(checkpoint, done=False)
+
+    last_message = None
+    async for message in channel.history(limit=None, after=after, oldest_first=True):
+        last_message = message
+        checkpoint["scanned"] += 1
+        since_flush += 1
+
+        record = await parse_rp_log_message(message)
+        if record is None:
+            checkpoint["skipped"] += 1
+        else:
+            batch.append(record)
+
+        if len(batch) >= RP_BACKFILL_BATCH_SIZE or since_flush >= 5 * RP_BACKFILL_BATCH_SIZE:
+            await flush(message.id)
+            since_flush = 0
+
+    if last_message is not None:
+        await flush(last_message.id)
+    await report(checkpoint, done=True)
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rpbackfill", description="Import RP logs from the RP logs channel history (staff only)")
+@require_staff_permission()
+@app_commands.describe(restart="Ignore the saved checkpoint and rescan the whole channel")
+async def rpbackfill(interaction: discord.Interaction, restart: bool = False):
+    running = rp_backfill_tasks.get(interaction.guild_id)
+    if running and not running.done():
+        await interaction.response.send_message("⏳ A backfill is already running.", ephemeral=True)
+        return
+
+    channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).rp_logs_channel_id)
+    if not channel:
+        await interaction.response.send_message("⚠️ Log channel not found. Please contact an admin.", ephemeral=True)
+        return
+
+    checkpoint_path = guild_data_path(interaction.guild_id, RP_BACKFILL_CHECKPOINT_FILE)
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    await interaction.response.send_message("⏳ RP log backfill started...", ephemeral=True)
+
+    async def report(checkpoint, done):
+        status = "✅ RP log backfill finished" if done else "⏳ RP log backfill running"
+        text = (f"{status}: scanned **{checkpoint['scanned']}** messages, imported **{checkpoint['imported']}**, "
+                f"skipped **{checkpoint['duplicates']}** duplicates and **{checkpoint['skipped']}** other messages.")
+        logger.info(text)
+        try:
+            await interaction.edit_original_response(content=text)
+        except discord.HTTPException:
+            pass  # The interaction token expires after 15 minutes; progress is still logged
+
+    async def run():
+        try:
+            await run_rp_backfill(channel, report)
+        except Exception as e:
+            logger.error(f"RP log backfill failed: {e}", exc_info=True)
+
+    rp_backfill_tasks[interaction.guild_id] = asyncio.create_task(run())
+
+# ------------------------
+# /rpexport Command - Streaming CSV/JSONL Export
+# ------------------------
+RP_LOG_EXPORT_COLUMNS = ["id", "timestamp", "guild_id", "logger_id", "logger_name", "location", "description",
+                         "participants", "participant_ids", "participant_names", "message_id"]
+SESSION_EXPORT_COLUMNS = ["id", "guild_id", "host_id", "host_name", "start_time", "end_time", "duration_minutes",
+                          "peak_players", "vote_initiated", "voter_count", "ended_by_id", "ended_by_name"]
+EXPORT_SIZE_MARGIN = 512 * 1024  # Headroom for gzip data still buffered when a part is rolled over
+
+async def export_source(dataset, guild_id):
+    """
+    (records, time key) for an export, taken on the event loop so the worker thread reads a
+    consistent copy: RP logs from a locked snapshot, sessions from a copy of the cached list.
+    """
+    if dataset == "rp_logs":
+        return iter_all_rp_logs(guild_id, await snapshot_rp_logs(guild_id)), "timestamp"
+    return list(load_session_data(guild_id).get("sessions", [])), "start_time"
+
+def iter_export_records(records, time_key, since=None, until=None):
+    """Yield the matching records one at a time; RP logs stream segment by segment"""
+    for record in records:
+        if since and record[time_key] < since:
+            continue
+        if until and record[time_key] >= until:
+            continue
+        yield record
+
+def write_export_parts(records, export_format, columns, directory, base_name, part_limit):
+    """
+    Stream records into gzip-compressed parts, starting a new part before one would pass part_limit.
+    Returns (paths, record_count).
+    """
+    paths = []
+    count = 0
+    raw = gz = writer = None
+
+    def open_part():
+        nonlocal raw, gz, writer
+        path = os.path.join(directory, f"{base_name}-part{len(paths) + 1}.{export_format}.gz")
+        paths.append(path)
+        raw = open(path, 'wb')
+        gz = gzip.open(raw, 'wt', encoding='utf-8', newline='')
+        if export_format == "csv":
+            writer = csv.DictWriter(gz, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+
+    def close_part():
+        gz.close()
+        raw.close()
+
+    open_part()
+    for record in records:
+        if count and raw.tell() >= part_limit - EXPORT_SIZE_MARGIN:
+            close_part()
+            open_part()
+
+        if export_format == "csv":
+            row = {key: ";".join(value) if isinstance(value, list) else value for key, value in record.items()}
+            writer.writerow(row)
+        else:
+            gz.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    close_part()
+
+    return paths, count
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="rpexport", description="Export RP logs or session history as compressed CSV/JSONL (staff only)")
+@require_staff_permission()
+@app_commands.describe(
+    dataset="What to export",
+    export_format="File format",
+    since="Only records on or after this date (YYYY-MM-DD)",
+    until="Only records before this date (YYYY-MM-DD)"
+)
+@app_commands.choices(
+    dataset=[
+        app_commands.Choice(name="RP Logs", value="rp_logs"),
+        app_commands.Choice(name="Session History", value="sessions"),
+    ],
+    export_format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSON Lines", value="jsonl"),
+    ]
+)
+async def rpexport(interaction: discord.Interaction, dataset: app_commands.Choice[str],
+                   export_format: app_commands.Choice[str], since: str = None, until: str = None):
+    try:
+        since_iso = datetime.strptime(since, "%Y-%m-%d").isoformat() if since else None
+        until_iso = datetime.strptime(until, "%Y-%m-%d").isoformat() if until else None
+    except ValueError:
+        await interaction.response.send_message("⚠️ Dates must be in `YYYY-MM-DD` format.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    columns = RP_LOG_EXPORT_COLUMNS if dataset.value == "rp_logs" else SESSION_EXPORT_COLUMNS
+    records = iter_export_records(*await export_source(dataset.value, interaction.guild_id), since_iso, until_iso)
+    base_name = f"{dataset.value}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths, count = await asyncio.to_thread(
+            write_export_parts, records, export_format.value, columns, directory, base_name, interaction.guild.filesize_limit
+        )
+
+        if not count:
+            await interaction.followup.send("📦 No records matched that export.", ephemeral=True)
+            return
+
+        for part, path in enumerate(paths, 1):
+            await interaction.followup.send(
+                f"📦 {dataset.name} export — part {part}/{len(paths)}" + (f" ({count} records)" if part == 1 else ""),
+                file=discord.File(path),
+                ephemeral=True
+            )
 # Add this command anywhere in your bot code (after the helper functions, before bot.run())
 
 
 # BONUS: Advanced version with channel selection and more options
 @bot.tree.command(
-    guild=discord.Object(id=GUILD_ID),
+    guilds=COMMAND_GUILDS,
     name="affiliatepost",
     description="Post a custom affiliate embed with advanced options"
 )
@@ -1165,7 +3647,7 @@ async def affiliatepost(
     """
     
     # Get the affiliate channel (same restricted channel)
-    affiliate_channel = interaction.guild.get_channel(1427152315902591137)
+    affiliate_channel = interaction.guild.get_channel(guild_configs.get(interaction.guild_id).affiliate_channel_id)
     if not affiliate_channel:
         await interaction.response.send_message(
             "❌ Affiliate channel not found! Please contact an administrator.",
@@ -1277,27 +3759,179 @@ async def affiliatepost(
     
     # Confirm to user
     await interaction.response.send_message(
-        f"✅ Affiliate embed posted successfully in <#{1427152315902591137}>!",
+        f"✅ Affiliate embed posted successfully in {affiliate_channel.mention}!",
         ephemeral=True
     )
+# ------------------------
+# Hot Reload - /reload and the Guild Config Watcher
+# ------------------------
+GUILD_CONFIG_WATCH_SECONDS = 5
+
+@tasks.loop(seconds=GUILD_CONFIG_WATCH_SECONDS)
+async def guild_config_watch_task():
+    """Swap in guild_config.json whenever it changes on disk"""
+    if guild_configs.reload() and set(guild_configs.guild_ids) != {guild.id for guild in COMMAND_GUILDS}:
+        # Slash commands are registered per guild at startup
+        logger.warning("Guild config adds or removes guilds; restart the bot to register commands for them")
+
+async def reload_target_autocomplete(interaction: discord.Interaction, current: str):
+    targets = ["config", *bot.extensions]
+    return [app_commands.Choice(name=target, value=target) for target in targets if current.lower() in target.lower()]
+
+@bot.tree.command(guilds=COMMAND_GUILDS, name="reload", description="Reload a cog or the guild config without restarting (Staff only)")
+@require_staff_permission()
+@app_commands.describe(
+    target="A loaded extension such as status, or config",
+    sync="Also re-sync slash commands (only needed if a command's options changed)"
+)
+@app_commands.autocomplete(target=reload_target_autocomplete)
+async def reload_command(interaction: discord.Interaction, target: str, sync: bool = False):
+    started = time.perf_counter()
+
+    if target == "config":
+        if not guild_configs.reload(force=True):
+            await interaction.response.send_message("❌ The guild config could not be read; the current one is still in use. See the bot log.", ephemeral=True)
+            return
+    elif target in bot.extensions:
+        try:
+            # On failure discord.py puts the previous version back
+            await bot.reload_extension(target)
+        except commands.ExtensionError as e:
+            logger.error(f"Reload of {target} failed: {e}", exc_info=True)
+            await interaction.response.send_message(f"❌ Reloading **{target}** failed; the previous version is still running.\n`{e}`", ephemeral=True)
+            return
+        move_global_commands_to_guilds()
+    else:
+        await interaction.response.send_message(f"⚠️ Unknown target `{target}`. Choose `config` or a loaded extension.", ephemeral=True)
+        return
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"{interaction.user} reloaded {target} in {elapsed_ms:.0f} ms")
+
+    if sync:
+        await interaction.response.defer(ephemeral=True)
+        for guild in COMMAND_GUILDS:
+            await bot.tree.sync(guild=guild)
+        await interaction.followup.send(f"✅ Reloaded **{target}** in {elapsed_ms:.0f} ms and re-synced commands.", ephemeral=True)
+        return
+    await interaction.response.send_message(f"✅ Reloaded **{target}** in {elapsed_ms:.0f} ms.", ephemeral=True)
+
 # --------------------------
 # Run Bot
 # --------------------------
 import asyncio
 
+metrics_runner = None
+interaction_recorder = None
+commands_synced = False
+
+@tasks.loop(seconds=recorder.RECORD_FLUSH_SECONDS)
+async def interaction_record_flush_task():
+    """Flush recorded interactions even when no new ones arrive to trigger it"""
+    if interaction_recorder is not None and interaction_recorder.pending:
+        interaction_recorder.flush()
+
 @bot.event
 async def on_ready():
-    try:
-        await bot.tree.sync()
-        print("Slash commands synced.")
-    except Exception as e:
-        print(f"Slash sync error: {e}")
+    global training_view_registered, metrics_runner, interaction_recorder, gateway_ready_seconds, commands_synced
+
+    if gateway_ready_seconds is None:
+        gateway_ready_seconds = time.time() - bot_started_at
+        rss = diagnostics.process_rss()
+        logger.info(
+            f"Gateway ready in {gateway_ready_seconds:.1f}s ({'lean' if LEAN_GATEWAY else 'full'} mode): "
+            f"{len(bot.guilds)} guilds, {sum(len(guild.members) for guild in bot.guilds)} cached members, "
+            f"RSS {diagnostics.format_bytes(rss) if rss is not None else 'unavailable'}"
+        )
+
+    if metrics.METRICS_PORT and metrics_runner is None:
+        metrics_runner = await metrics.start_metrics_server(metrics.METRICS_PORT)
+        logger.info(f"Metrics endpoint listening on http://{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics")
+
+    if recorder.INTERACTION_RECORD_DIR and interaction_recorder is None:
+        interaction_recorder = recorder.InteractionRecorder(recorder.INTERACTION_RECORD_DIR, recorder.INTERACTION_RECORD_SALT)
+        logger.info(f"Recording sanitized interactions to {interaction_recorder.path}")
+        interaction_record_flush_task.start()
+
+    diagnostics.watchdog.start()
+
+    if not rp_archive_task.is_running():
+        rp_archive_task.start()
+
+    if not guild_config_watch_task.is_running():
+        guild_config_watch_task.start()
+
+    for guild_id in guild_configs.guild_ids:
+        if not location_tries[str(guild_id)].ready:
+            # Anything stored before now is in the files the build reads, so nothing is lost by replacing
+            trie = build_location_trie(guild_id)
+            trie.ready = True
+            location_tries[str(guild_id)] = trie
+
+    await moderation_journal.ensure_loaded()
+
+    if job_scheduler.task is None:
+        job_scheduler.load()
+        job_scheduler.start()
+
+    if not training_view_registered:
+        # Load attendee state and re-attach the persistent training buttons
+        training_registry.load()
+        bot.add_view(StaffTrainingView())
+        training_view_registered = True
+
+    for guild_id in guild_configs.guild_ids:
+        if not os.path.exists(guild_data_path(guild_id, MEMBER_PROFILES_FILE)):
+            async with rp_log_locks[guild_id]:
+                await replace_member_profiles(guild_id, await asyncio.to_thread(rebuild_member_profiles, guild_id))
+
+    for guild in bot.guilds:
+        if guild.id not in member_name_indexes:
+            build_member_name_index(guild)
+
+    for guild_id in guild_configs.guild_ids:
+        if not rp_search_indexes[guild_id].ready:
+            # Build off the event loop, then pick up anything /logrp wrote meanwhile and swap
+            # the index in before the lock lets another write through
+            index = await asyncio.to_thread(build_rp_search_index, guild_id, await snapshot_rp_logs(guild_id))
+            async with rp_log_locks[guild_id]:
+                for log in await asyncio.to_thread(load_rp_logs, guild_id):
+                    index.add(log)
+                index.ready = True
+                rp_search_indexes[guild_id] = index
+            logger.info(f"RP search index built for guild {guild_id}: {len(index.docs)} logs, {len(index.postings)} terms")
+
+    if not commands_synced:
+        # Once per process: the sync moves the global cog commands into the guild trees
+        await sync_guild_commands()
+        commands_synced = True
 
     print(f"Logged in as {bot.user} ({bot.user.id})")
 
 async def load_cogs():
     await bot.load_extension("status")  # loads status.py using setup()
 
-asyncio.run(load_cogs())
-
-bot.run(BOT_TOKEN)
+async def setup_hook():
+    # Runs once at login, before the gateway connects, so no command can see guild storage mid-migration
+    migrate_legacy_storage()
+    # Loaded on the bot's own event loop, so cog loops keep running and /reload can swap them in place
+    await load_cogs()
+
+bot.setup_hook = setup_hook
+
+async def close_bot():
+    """Write out debounced saves before disconnecting"""
+    global interaction_recorder
+    await training_registry.flush()
+    await flush_all_member_profiles()
+    if interaction_recorder is not None:
+        # Closing writes the gzip trailer; without it bench.replay sees a truncated file
+        interaction_record_flush_task.cancel()
+        interaction_recorder.close()
+        interaction_recorder = None
+    await commands.AutoShardedBot.close(bot)
+
+bot.close = close_bot
+
+if __name__ == "__main__":
+    bot.run(BOT_TOKEN)
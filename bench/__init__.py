@@ -0,0 +1,9 @@
+"""
+Benchmarks for the bot's storage and aggregation paths.
+
+    python -m bench run --sizes 1k,10k,100k --out results.json
+    python -m bench compare baseline.json results.json
+
+Each dataset size runs in its own subprocess and temporary directory, so the
+bot's JSON files, caches and memory numbers never leak between sizes.
+"""
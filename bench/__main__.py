@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench.datasets import generate_members, generate_rp_logs, generate_sessions, parse_size
+from bench.fakes import FakeGuild, FakeInteraction
+from bench.scenarios import SCENARIOS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "1k,10k,100k"
+DEFAULT_ITERATIONS = 50
+REGRESSION_THRESHOLD = 0.2   # p95 slower by more than 20%...
+REGRESSION_FLOOR_MS = 0.5    # ...and by more than half a millisecond
+DATA_FILES = ("rp_logs.json", "session_data.json", "session_stats.json", "member_profiles.json")
+
+class BenchContext:
+    def __init__(self, bot, guild, members):
+        self.bot = bot
+        self.guild = guild
+        self.members = members
+        self.hot_min_id = 1
+        self.max_id = 0
+
+    def interaction(self):
+        return FakeInteraction(self.guild, self.members[0])
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+# =========================================================
+# WORKER (one dataset size, one process)
+# =========================================================
+
+async def run_scenarios(ctx, iterations):
+    results = {}
+    for name, scale, func in SCENARIOS:
+        rng = random.Random(name)
+        count = max(3, int(iterations * scale))
+        await func(ctx, rng)  # Warm-up: first-touch caches are measured by setup, not here
+
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await func(ctx, rng)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        await func(ctx, rng)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        results[name] = {
+            "iterations": count,
+            "mean_ms": sum(timings) / count * 1000,
+            "p50_ms": percentile(timings, 0.5) * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "p99_ms": percentile(timings, 0.99) * 1000,
+            "max_ms": timings[-1] * 1000,
+            "peak_alloc_bytes": peak,
+        }
+    return results
+
+def run_worker(size, iterations, result_path):
+    os.chdir(tempfile.mkdtemp(prefix=f"sfcrp-bench-{size}-"))
+    sys.path.insert(0, REPO_ROOT)
+    setup = {}
+
+    start = time.perf_counter()
+    bot = importlib.import_module("SFCRP_bot")
+    setup["import_seconds"] = time.perf_counter() - start
+
+    members = generate_members(max(50, min(2000, size // 50)))
+    guild = FakeGuild(bot.GUILD_ID, members)
+
+    start = time.perf_counter()
+    bot.save_rp_logs(guild.id, generate_rp_logs(size, guild.id, members))
+    session_data = generate_sessions(size, guild.id, members)
+    bot.save_session_data(guild.id, session_data)
+    bot.save_session_stats(guild.id, bot.rebuild_session_stats(session_data["sessions"]))
+    del session_data
+    setup["generate_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bot.archive_old_rp_logs(guild.id)
+    setup["archive_seconds"] = time.perf_counter() - start
+
+    # The same warm-up on_ready does
+    start = time.perf_counter()
+    bot.location_tries[str(guild.id)] = bot.build_location_trie(guild.id)
+    bot.rp_search_indexes[guild.id] = bot.build_rp_search_index(guild.id)
+    bot.rp_search_indexes[guild.id].ready = True
+    bot.build_member_name_index(guild)
+    bot.save_member_profiles(guild.id, bot.rebuild_member_profiles(guild.id))
+    setup["startup_indexes_seconds"] = time.perf_counter() - start
+
+    ctx = BenchContext(bot, guild, members)
+    hot_logs = bot.load_rp_logs(guild.id)
+    ctx.max_id = size
+    ctx.hot_min_id = hot_logs[0]["id"] if hot_logs else size + 1
+    del hot_logs
+
+    paths = {name: bot.guild_data_path(guild.id, name) for name in DATA_FILES}
+    files = {name: os.path.getsize(path) for name, path in paths.items() if os.path.exists(path)}
+    files["rp_archive/"] = directory_size(bot.guild_data_path(guild.id, bot.RP_ARCHIVE_DIR))
+
+    scenarios = asyncio.run(run_scenarios(ctx, iterations))
+
+    import diagnostics
+    result = {
+        "records": size,
+        "hot_rp_logs": size - ctx.hot_min_id + 1,
+        "setup": setup,
+        "files": files,
+        "rss_bytes": diagnostics.process_rss(),
+        "scenarios": scenarios,
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+# =========================================================
+# RUN / COMPARE
+# =========================================================
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    results = {}
+    for label in args.sizes.split(","):
+        size = parse_size(label)
+        print(f"▶ {label} records...", flush=True)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_path = f.name
+        subprocess.run(
+            [sys.executable, "-m", "bench", "worker", str(size), "--iterations", str(args.iterations), "--result", result_path],
+            cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL
+        )
+        with open(result_path, encoding='utf-8') as f:
+            results[label] = json.load(f)
+        os.remove(result_path)
+
+        for name, stats in results[label]["scenarios"].items():
+            print(f"  {name:<24} p50 {stats['p50_ms']:9.2f} ms   p95 {stats['p95_ms']:9.2f} ms   peak alloc {stats['peak_alloc_bytes'] / 1024:9.0f} KiB")
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    print(f"{baseline['meta'].get('revision')} -> {candidate['meta'].get('revision')} (p95)")
+    regressions = 0
+    for label, result in candidate["results"].items():
+        base_result = baseline["results"].get(label)
+        if not base_result:
+            continue
+        for name, stats in result["scenarios"].items():
+            base_stats = base_result["scenarios"].get(name)
+            if not base_stats:
+                continue
+            before, after = base_stats["p95_ms"], stats["p95_ms"]
+            change = (after - before) / before if before else 0
+            regressed = change > args.threshold and after - before > REGRESSION_FLOOR_MS
+            regressions += regressed
+            print(f"  {label:>5} {name:<24} {before:9.2f} -> {after:9.2f} ms  {change:+7.1%}{'  ⚠️ REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"{regressions} regression(s) over {args.threshold:.0%}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark the bot's storage and aggregation paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run every scenario at each dataset size")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated record counts, e.g. 1k,10k,100k,1m")
+    run_parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    run_parser.add_argument("--out", default="bench_results.json")
+
+    worker_parser = commands.add_parser("worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument("size", type=int)
+    worker_parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    worker_parser.add_argument("--result", required=True)
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files and fail on p95 regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "worker":
+        run_worker(args.size, args.iterations, args.result)
+    else:
+        compare(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Seeded synthetic rp_logs.json / session_data.json that look like production data"""
+import random
+from datetime import datetime, timedelta
+
+from bench.fakes import FakeMember
+
+LOCATIONS = [
+    "Downtown Bank", "downtown bank", "Gas Station", "gas station ", "Police Station", "Fire Station",
+    "City Hall", "Hospital", "Highway 101", "Golden Gate Bridge", "Pier 39", "Chinatown",
+    "Mission District", "Airport", "Jewelry Store", "Car Dealership", "Prison", "Harbor",
+    "Mountain Road", "Suburbs", "Farm", "Tool Shop", "Diner", "Apartment Complex",
+]
+ACTIONS = ["traffic stop", "bank robbery", "pursuit", "structure fire", "medical call", "arrest",
+           "shootout", "car crash", "store robbery", "patrol", "welfare check", "drug bust"]
+DETAILS = ["suspect fled on foot", "two units responded", "ended in an arrest", "suspect escaped",
+           "backup was requested", "EMS treated one victim", "spike strips were used", "resolved peacefully"]
+FIRST_NAMES = ["Alex", "Jordan", "Sam", "Taylor", "Casey", "Riley", "Morgan", "Jamie", "Drew", "Quinn",
+               "Avery", "Parker", "Reese", "Rowan", "Skyler", "Charlie", "Emerson", "Finley", "Hayden", "Kai"]
+LAST_NAMES = ["Smith", "Johnson", "Lee", "Garcia", "Brown", "Davis", "Miller", "Wilson", "Moore", "Clark"]
+
+RP_LOG_SPAN_DAYS = 365
+SESSION_SPAN_DAYS = 3 * 365
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000, '500' -> 500"""
+    text = text.strip().lower()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def generate_members(count, seed=0):
+    rng = random.Random(seed)
+    members = []
+    for index in range(count):
+        name = f"{rng.choice(FIRST_NAMES)}{rng.choice(LAST_NAMES)}{index}"
+        display = f"{rng.choice(['Officer', 'Deputy', 'Trooper', 'Medic', ''])} {name}".strip()
+        members.append(FakeMember(1_100_000_000_000_000_000 + index, name.lower(), display))
+    return members
+
+def generate_rp_logs(count, guild_id, members, now=None, seed=0):
+    """RP logs with IDs 1..count spread evenly over the last year, oldest first"""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    step = timedelta(days=RP_LOG_SPAN_DAYS) / max(count, 1)
+    start = now - timedelta(days=RP_LOG_SPAN_DAYS)
+    # Activity is skewed: a few regulars log most RPs
+    weights = [1 / (rank + 1) for rank in range(len(members))]
+
+    logs = []
+    for index in range(count):
+        logger = rng.choices(members, weights)[0]
+        party = rng.sample(members, rng.randint(1, 4))
+        mentioned = [member for member in party if rng.random() < 0.5]
+        named = [member for member in party if member not in mentioned]
+        participants = ", ".join([member.mention for member in mentioned] + [member.display_name for member in named])
+        logs.append({
+            "id": index + 1,
+            "logger_id": str(logger.id),
+            "logger_name": logger.display_name,
+            "location": rng.choice(LOCATIONS),
+            "description": f"{rng.choice(ACTIONS).capitalize()} near the {rng.choice(LOCATIONS).strip().lower()}, {rng.choice(DETAILS)}.",
+            "participants": participants,
+            "participant_ids": [str(member.id) for member in party],
+            "participant_names": [member.display_name for member in party],
+            "timestamp": (start + step * index).isoformat(),
+            "guild_id": str(guild_id),
+            "message_id": str(1_200_000_000_000_000_000 + index),
+        })
+    return logs
+
+def generate_sessions(count, guild_id, members, now=None, seed=0):
+    """Finished sessions spread over the last three years, sorted by start time"""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    step = timedelta(days=SESSION_SPAN_DAYS) / max(count, 1)
+    start = now - timedelta(days=SESSION_SPAN_DAYS)
+    hosts = members[:max(1, len(members) // 20)]
+
+    sessions = []
+    for index in range(count):
+        host = rng.choice(hosts)
+        ender = rng.choice(hosts)
+        started = start + step * index
+        duration = rng.randint(20, 240)
+        sessions.append({
+            "id": index + 1,
+            "host_id": str(host.id),
+            "host_name": host.display_name,
+            "start_time": started.isoformat(),
+            "current_players": 0,
+            "peak_players": rng.randint(0, 40),
+            "player_updates": 0,
+            "player_history": [],
+            "vote_initiated": rng.random() < 0.6,
+            "voter_count": rng.randint(0, 12),
+            "guild_id": str(guild_id),
+            "end_time": (started + timedelta(minutes=duration)).isoformat(),
+            "ended_by_id": str(ender.id),
+            "ended_by_name": ender.display_name,
+            "duration_minutes": duration,
+        })
+    return {"current_session": None, "sessions": sessions, "sessions_sorted": True}
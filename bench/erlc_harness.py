@@ -0,0 +1,150 @@
+"""
+Drive ERLCStatus.update_task against the fake ERLC API and report how polling behaves.
+
+    python -m bench.erlc_harness --duration 60 --interval 1 --error-rate 0.05 --outage 20:30 --rate-limit 35/60
+    python -m bench.erlc_harness --duration 60 --interval 1 --poller --poller-stop 30
+
+--interval shortens the real 30 s poll so a run takes seconds instead of hours; outage
+and rate-limit windows are in the same (scaled) seconds. --poller runs erlc_poller in
+its own process and the cog reads its snapshots; --poller-stop kills that process
+partway through to exercise the in-process fallback.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench.fake_erlc import add_server_arguments, server_from_args
+from bench.fakes import FakeGuild
+from guild_config import GuildConfig
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATUS_CHANNEL_ID = 1427153224330248213
+
+class FakeStatusBot:
+    """Just enough of commands.Bot for ERLCStatus"""
+
+    def __init__(self, guild):
+        self.guild = guild
+        # Only get() is used, so a dict stands in for the GuildConfigStore
+        self.guild_configs = {guild.id: GuildConfig(guild.id, {"status_channel_id": STATUS_CHANNEL_ID})}
+
+    async def wait_until_ready(self):
+        return
+
+    def get_channel(self, channel_id):
+        return self.guild.get_channel(channel_id)
+
+def summarize_intervals(times, interval):
+    gaps = [later - earlier - interval for earlier, later in zip(times, times[1:])]
+    if not gaps:
+        return {"polls": len(times)}
+    gaps.sort()
+    return {
+        "polls": len(times),
+        "drift_mean_ms": sum(gaps) / len(gaps) * 1000,
+        "drift_p95_ms": gaps[min(len(gaps) - 1, int(0.95 * len(gaps)))] * 1000,
+        "drift_max_ms": gaps[-1] * 1000,
+    }
+
+def recovery_times(outages, started_at, edits):
+    """Seconds from each outage ending to the first status edit that shows live data again"""
+    results = []
+    for _, end in outages:
+        end_at = started_at + end
+        recovered = next(
+            (edited_at for edited_at, embed in edits
+             if edited_at >= end_at and embed and embed.fields[1].value != "?"),
+            None
+        )
+        results.append(round(recovered - end_at, 3) if recovered else None)
+    return results
+
+async def run(args):
+    server = server_from_args(args)
+    url = await server.start()
+
+    # status.py reads these at import time
+    os.environ["ERLC_API_URL"] = url
+    os.environ.setdefault("ERLC_API_KEY", "harness-key")
+    worker = None
+    if args.poller:
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="sfcrp-erlc-"), "poller.sock")
+        os.environ["ERLC_POLLER_SOCKET"] = socket_path
+        worker = subprocess.Popen([sys.executable, "-m", "erlc_poller", "--socket", socket_path, "--interval", str(args.interval)],
+                                  cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Let the worker bind first, or the cog's first connect misses and it polls in-process meanwhile
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    sys.path.insert(0, REPO_ROOT)
+    status = importlib.import_module("status")
+    import metrics
+
+    guild = FakeGuild(1)
+    bot = FakeStatusBot(guild)
+    channel = guild.get_channel(STATUS_CHANNEL_ID)
+
+    cog = status.ERLCStatus(bot)
+    cog.update_task.change_interval(seconds=args.interval)
+    await cog.send_embeds(channel, bot.guild_configs[guild.id])
+    status_message = await channel.fetch_message(cog.boards[guild.id].message_ids[3])
+
+    if worker and args.poller_stop is not None:
+        await asyncio.sleep(args.poller_stop)
+        worker.terminate()
+        worker.wait()
+        await asyncio.sleep(args.duration - args.poller_stop)
+    else:
+        await asyncio.sleep(args.duration)
+    cog.cog_unload()
+    if worker and worker.poll() is None:
+        worker.terminate()
+        worker.wait()
+    await server.stop()
+
+    server_polls = [at for at, path, _ in server.request_log if path == "/v1/server"]
+    statuses = Counter(status_code for _, path, status_code in server.request_log if path == "/v1/server")
+    live_edits = sum(1 for _, embed in status_message.edits if embed and embed.fields[1].value != "?")
+    erlc_latency = metrics.erlc_latency.quantiles(0.5, 0.95).get((), (0, 0))
+
+    report = {
+        "config": {
+            "duration": args.duration, "interval": args.interval, "latency_ms": args.latency,
+            "error_rate": args.error_rate, "rate_limit": args.rate_limit, "outages": args.outage,
+            "poller": args.poller, "poller_stop": args.poller_stop,
+        },
+        "api_calls": dict(sorted((str(code), count) for code, count in statuses.items())),
+        "api_latency_ms": {"p50": erlc_latency[0] * 1000, "p95": erlc_latency[1] * 1000},
+        "loop": summarize_intervals(server_polls, args.interval),
+        "embed_edits": {"total": len(status_message.edits), "with_live_data": live_edits, "stale": len(status_message.edits) - live_edits,
+                        "skipped_unchanged": int(metrics.status_edits.values.get((("result", "unchanged"),), 0))},
+        "outage_recovery_seconds": recovery_times(args.outage, server.started_at, status_message.edits),
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.erlc_harness", description="Load-test the ERLC status loop")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--interval", type=float, default=1.0, help="Poll interval in seconds (production: 30)")
+    parser.add_argument("--poller", action="store_true", help="Poll from a separate erlc_poller process")
+    parser.add_argument("--poller-stop", type=float, default=None, help="Seconds into the run to kill the poller process")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    started = time.monotonic()
+    asyncio.run(run(args))
+    print(f"Finished in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
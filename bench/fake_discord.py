@@ -0,0 +1,258 @@
+"""
+Local stand-in for the Discord REST API, enough for the bot's slash commands and views.
+
+Point discord.py at it with discord.http.Route.BASE = server.api_base. Every request is
+answered with X-RateLimit-* headers from a per-route bucket, so discord.py's own rate
+limiter behaves as it does in production, and exhausted buckets answer 429.
+"""
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+from collections import Counter, deque
+
+import discord
+from aiohttp import web
+
+API_PREFIX = "/api/v10"
+BOT_USER_ID = 1_400_000_000_000_000_000
+APPLICATION_ID = BOT_USER_ID
+
+# (requests, window seconds) per bucket, roughly Discord's documented per-route limits.
+# A bucket is the route template plus its major parameter (channel, guild or webhook).
+DEFAULT_ROUTE_LIMITS = {
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "PATCH /channels/{channel_id}/messages/{message_id}": (5, 5.0),
+    "POST /users/@me/channels": (10, 10.0),
+    "PUT /guilds/{guild_id}/members/{user_id}/roles/{role_id}": (10, 10.0),
+    "DELETE /guilds/{guild_id}/members/{user_id}/roles/{role_id}": (10, 10.0),
+    "POST /webhooks/{webhook_id}/{webhook_token}": (5, 2.0),
+    "PATCH /webhooks/{webhook_id}/{webhook_token}/messages/{message_id}": (5, 2.0),
+}
+MAJOR_PARAMETERS = ("channel_id", "guild_id", "webhook_id")
+
+def json_response(data, status=200, headers=None):
+    # discord.py only decodes bodies whose Content-Type is exactly application/json
+    return web.Response(body=json.dumps(data).encode(), status=status, headers={**(headers or {}), "Content-Type": "application/json"})
+
+def user_payload(user_id, name, bot=False):
+    return {"id": str(user_id), "username": name, "global_name": None, "discriminator": "0", "avatar": None, "bot": bot}
+
+def bot_user_payload():
+    return user_payload(BOT_USER_ID, "SFCRP Bot", bot=True)
+
+class FakeDiscordServer:
+    def __init__(self, latency=0.03, jitter=0.01, route_limits=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_limits = DEFAULT_ROUTE_LIMITS if route_limits is None else route_limits
+        self.rng = random.Random(seed)
+        self.buckets = {}             # (route, major) -> deque of request times
+        self.requests = Counter()     # route -> count
+        self.rate_limited = Counter() # route -> 429 count
+        self.callbacks = {}           # interaction ID -> (monotonic receipt time, callback payload)
+        self.messages = {}            # message ID -> message payload
+        self.ids = itertools.count(discord.utils.time_snowflake(discord.utils.utcnow()))
+        self.runner = None
+        self.api_base = None
+
+    # =====================================================
+    # HELPERS
+    # =====================================================
+
+    def message_payload(self, channel_id, body, message_id=None):
+        message_id = message_id or next(self.ids)
+        return {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "author": bot_user_payload(),
+            "content": body.get("content") or "",
+            "timestamp": discord.utils.snowflake_time(message_id).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": body.get("embeds") or [],
+            "components": body.get("components") or [],
+            "pinned": False,
+            "type": 0,
+            "flags": body.get("flags", 0),
+        }
+
+    def check_rate_limit(self, route, major):
+        """Returns (headers, retry_after or None)"""
+        limit = self.route_limits.get(route)
+        if limit is None:
+            return {}, None
+        requests, window = limit
+        now = time.monotonic()
+        bucket = self.buckets.setdefault((route, major), deque())
+        while bucket and now - bucket[0] >= window:
+            bucket.popleft()
+
+        reset_after = (bucket[0] + window - now) if bucket else window
+        if len(bucket) >= requests:
+            return {
+                "X-RateLimit-Limit": str(requests),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                "X-RateLimit-Bucket": re.sub(r"\W", "", route),
+                "X-RateLimit-Scope": "user",
+                "Retry-After": str(math.ceil(reset_after)),
+            }, reset_after
+
+        bucket.append(now)
+        return {
+            "X-RateLimit-Limit": str(requests),
+            "X-RateLimit-Remaining": str(requests - len(bucket)),
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": re.sub(r"\W", "", route),
+        }, None
+
+    async def read_body(self, request):
+        if request.content_type == "multipart/form-data":
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == "payload_json":
+                    return json.loads(await part.text())
+            return {}
+        if request.can_read_body:
+            return await request.json()
+        return {}
+
+    # =====================================================
+    # ROUTES
+    # =====================================================
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        resource = request.match_info.route.resource
+        template = resource.canonical[len(API_PREFIX):] if resource else request.path
+        route = f"{request.method} {template}"
+        major = next((request.match_info[name] for name in MAJOR_PARAMETERS if name in request.match_info), None)
+        self.requests[route] += 1
+
+        headers, retry_after = self.check_rate_limit(route, major)
+        if retry_after is not None:
+            self.rate_limited[route] += 1
+            return json_response(
+                {"message": "You are being rate limited.", "retry_after": round(retry_after, 3), "global": False},
+                status=429, headers=headers
+            )
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def get_me(self, request):
+        return json_response(bot_user_payload())
+
+    async def get_application(self, request):
+        return json_response({
+            "id": str(APPLICATION_ID), "name": "SFCRP Bot", "description": "", "icon": None,
+            "bot_public": False, "bot_require_code_grant": False, "owner": user_payload(1, "owner"),
+            "verify_key": "0" * 64, "flags": 0, "summary": "",
+        })
+
+    async def interaction_callback(self, request):
+        received_at = time.monotonic()
+        body = await self.read_body(request)
+        interaction_id = request.match_info["webhook_id"]
+        self.callbacks[int(interaction_id)] = (received_at, body)
+
+        data = body.get("data") or {}
+        resource = {"type": body["type"]}
+        message_id = None
+        if body["type"] in (4, 7) and data:
+            message = self.message_payload(0, data)
+            message_id = message["id"]
+            self.messages[int(message_id)] = message
+            resource["message"] = message
+        return json_response({
+            "interaction": {
+                "id": interaction_id,
+                "type": 2,
+                "response_message_id": message_id,
+                "response_message_loading": body["type"] == 5,
+                "response_message_ephemeral": bool(data.get("flags", 0) & 64),
+            },
+            "resource": resource,
+        })
+
+    async def create_message(self, request):
+        body = await self.read_body(request)
+        message = self.message_payload(request.match_info["channel_id"], body)
+        self.messages[int(message["id"])] = message
+        return json_response(message)
+
+    async def edit_message(self, request):
+        body = await self.read_body(request)
+        message_id = int(request.match_info["message_id"])
+        message = self.messages.get(message_id) or self.message_payload(request.match_info["channel_id"], {}, message_id)
+        message.update({key: value for key, value in body.items() if key in ("content", "embeds", "components")})
+        message["edited_timestamp"] = discord.utils.utcnow().isoformat()
+        self.messages[message_id] = message
+        return json_response(message)
+
+    async def get_message(self, request):
+        message = self.messages.get(int(request.match_info["message_id"]))
+        if message is None:
+            return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+        return json_response(message)
+
+    async def create_dm(self, request):
+        body = await self.read_body(request)
+        recipient = body["recipient_id"]
+        return json_response({"id": str(next(self.ids)), "type": 1, "recipients": [user_payload(recipient, f"user{recipient}")]})
+
+    async def member_role(self, request):
+        return web.Response(status=204)
+
+    async def get_member(self, request):
+        return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+
+    async def followup(self, request):
+        body = await self.read_body(request)
+        message = self.message_payload(0, body)
+        self.messages[int(message["id"])] = message
+        return json_response(message)
+
+    async def edit_original(self, request):
+        body = await self.read_body(request)
+        return json_response(self.message_payload(0, body))
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application(middlewares=[self.middleware])
+        p = API_PREFIX
+        app.router.add_get(f"{p}/users/@me", self.get_me)
+        app.router.add_get(f"{p}/oauth2/applications/@me", self.get_application)
+        app.router.add_post(f"{p}/interactions/{{webhook_id}}/{{webhook_token}}/callback", self.interaction_callback)
+        app.router.add_post(f"{p}/channels/{{channel_id}}/messages", self.create_message)
+        app.router.add_get(f"{p}/channels/{{channel_id}}/messages/{{message_id}}", self.get_message)
+        app.router.add_patch(f"{p}/channels/{{channel_id}}/messages/{{message_id}}", self.edit_message)
+        app.router.add_post(f"{p}/users/@me/channels", self.create_dm)
+        app.router.add_put(f"{p}/guilds/{{guild_id}}/members/{{user_id}}/roles/{{role_id}}", self.member_role)
+        app.router.add_delete(f"{p}/guilds/{{guild_id}}/members/{{user_id}}/roles/{{role_id}}", self.member_role)
+        app.router.add_get(f"{p}/guilds/{{guild_id}}/members/{{user_id}}", self.get_member)
+        app.router.add_post(f"{p}/webhooks/{{webhook_id}}/{{webhook_token}}", self.followup)
+        app.router.add_patch(f"{p}/webhooks/{{webhook_id}}/{{webhook_token}}/messages/{{message_id}}", self.edit_original)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.api_base = f"http://{host}:{bound_port}{API_PREFIX}"
+        return self.api_base
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
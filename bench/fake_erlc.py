@@ -0,0 +1,188 @@
+"""
+Local stand-in for the ERLC /v1/server API.
+
+    python -m bench.fake_erlc --port 8081 --latency 80 --error-rate 0.05 --rate-limit 35/60
+    ERLC_API_URL=http://127.0.0.1:8081/v1/server ERLC_API_KEY=test python SFCRP_bot.py
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter, deque
+
+from aiohttp import web
+
+DEFAULT_PLAYERS = (5, 40)
+PLAYER_CYCLE_SECONDS = 600  # One full rise and fall of the simulated player count
+
+class FakeERLCServer:
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, rate_limit=None, outages=(),
+                 players=DEFAULT_PLAYERS, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # (requests, window seconds) or None
+        self.outages = list(outages)  # (start, end) seconds after start()
+        self.players = players
+        self.rng = random.Random(seed)
+        self.requests = Counter()     # (path, status) -> count
+        self.request_log = []         # (monotonic time, path, status)
+        self.window = deque()         # request times inside the rate-limit window
+        self.started_at = None
+        self.runner = None
+
+    # =====================================================
+    # SIMULATED STATE
+    # =====================================================
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def in_outage(self):
+        elapsed = self.elapsed()
+        return any(start <= elapsed < end for start, end in self.outages)
+
+    def player_count(self):
+        low, high = self.players
+        wave = (1 - math.cos(2 * math.pi * self.elapsed() / PLAYER_CYCLE_SECONDS)) / 2
+        return max(0, min(high, round(low + (high - low) * wave + self.rng.randint(-2, 2))))
+
+    def player_list(self, count):
+        teams = ["Civilian", "Police", "Sheriff", "Fire", "DOT"]
+        return [{"Player": f"Player{i}:{1000 + i}", "Permission": "Normal", "Team": self.rng.choice(teams)} for i in range(count)]
+
+    # =====================================================
+    # REQUEST HANDLING
+    # =====================================================
+
+    def rate_limit_headers(self, now):
+        limit, window = self.rate_limit
+        while self.window and now - self.window[0] >= window:
+            self.window.popleft()
+        reset = (self.window[0] + window) if self.window else now + window
+        return {
+            "X-RateLimit-Bucket": "global",
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(max(0, limit - len(self.window))),
+            "X-RateLimit-Reset": str(int(time.time() + (reset - now))),
+        }, reset - now
+
+    async def respond(self, request, payload_factory):
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        now = time.monotonic()
+        path = request.path
+        headers = {}
+
+        if not request.headers.get("Authorization") and not request.headers.get("Server-Key"):
+            status, body = 403, {"code": 2000, "message": "You did not provide a server-key."}
+        elif self.in_outage():
+            status, body = 503, {"code": 0, "message": "Service unavailable"}
+        elif self.rng.random() < self.error_rate:
+            status, body = 500, {"code": 1001, "message": "An error occurred communicating with Roblox / the in-game private server."}
+        else:
+            status, body = 200, None
+            if self.rate_limit:
+                headers, retry_after = self.rate_limit_headers(now)
+                if len(self.window) >= self.rate_limit[0]:
+                    status, body = 429, {"code": 4001, "message": "You are being rate limited!", "retry_after": round(retry_after, 2)}
+                    headers["Retry-After"] = str(math.ceil(retry_after))
+                else:
+                    self.window.append(now)
+                    headers["X-RateLimit-Remaining"] = str(int(headers["X-RateLimit-Remaining"]) - 1)
+            if status == 200:
+                body = payload_factory()
+
+        self.requests[(path, status)] += 1
+        self.request_log.append((now, path, status))
+        return web.json_response(body, status=status, headers=headers)
+
+    async def handle_server(self, request):
+        def payload():
+            players = self.player_count()
+            queue = max(0, players - self.players[1] + self.rng.randint(0, 3))
+            return {
+                # Shape status.py reads
+                "server": {"playerCount": players, "queueLength": queue},
+                # Fields the real endpoint returns
+                "Name": "San Francisco City Roleplay",
+                "OwnerId": 1,
+                "CurrentPlayers": players,
+                "MaxPlayers": self.players[1],
+                "JoinKey": "SSCRPP",
+                "AccVerifiedReq": "Disabled",
+                "TeamBalance": True,
+            }
+        return await self.respond(request, payload)
+
+    async def handle_players(self, request):
+        return await self.respond(request, lambda: self.player_list(self.player_count()))
+
+    async def handle_queue(self, request):
+        return await self.respond(request, lambda: [2000 + i for i in range(self.rng.randint(0, 3))])
+
+    # =====================================================
+    # LIFECYCLE
+    # =====================================================
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving; returns the base URL to use as ERLC_API_URL"""
+        app = web.Application()
+        app.router.add_get("/v1/server", self.handle_server)
+        app.router.add_get("/v1/server/players", self.handle_players)
+        app.router.add_get("/v1/server/queue", self.handle_queue)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        self.started_at = time.monotonic()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}/v1/server"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+def parse_rate_limit(text):
+    """'35/60' -> (35, 60.0)"""
+    requests, window = text.split("/")
+    return int(requests), float(window)
+
+def parse_outage(text):
+    """'60:90' -> (60.0, 90.0) seconds after start"""
+    start, end = text.split(":")
+    return float(start), float(end)
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency", type=float, default=50, help="Mean response latency in ms")
+    parser.add_argument("--jitter", type=float, default=20, help="Latency jitter in ms (uniform +/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=parse_rate_limit, default=None, help="Requests per window, e.g. 35/60")
+    parser.add_argument("--outage", type=parse_outage, action="append", default=[], help="start:end seconds of HTTP 503s; repeatable")
+    parser.add_argument("--players", type=int, nargs=2, default=DEFAULT_PLAYERS, metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+
+def server_from_args(args):
+    return FakeERLCServer(
+        latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, outages=args.outage, players=tuple(args.players), seed=args.seed
+    )
+
+async def serve_forever(args):
+    server = server_from_args(args)
+    url = await server.start(args.host, args.port)
+    print(f"Fake ERLC API listening on {url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bench.fake_erlc", description="Serve a fake ERLC API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_server_arguments(parser)
+    try:
+        asyncio.run(serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
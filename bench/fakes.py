@@ -0,0 +1,158 @@
+"""Lightweight stand-ins for the discord.py objects the command handlers touch"""
+import itertools
+import time
+from types import SimpleNamespace
+
+import discord
+
+_snowflakes = itertools.count(1_300_000_000_000_000_000)
+
+def next_snowflake():
+    return next(_snowflakes)
+
+class FakeRole:
+    def __init__(self, role_id, name="Role"):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+class FakeMember:
+    def __init__(self, member_id, name, display_name=None, roles=(), bot=False):
+        self.id = member_id
+        self.name = name
+        self.global_name = display_name
+        self.display_name = display_name or name
+        self.mention = f"<@{member_id}>"
+        self.roles = list(roles)
+        self.bot = bot
+        self.display_avatar = SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png")
+        self.dms = []
+
+    async def send(self, content=None, embed=None, **kwargs):
+        self.dms.append((content, embed))
+
+    def __str__(self):
+        return self.name
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next_snowflake()
+        self.channel = channel
+        self.content = content
+        self.embeds = [embed] if embed else []
+        self.view = view
+        self.edits = []  # (time.monotonic(), embed) per edit
+
+    async def edit(self, content=None, embed=None, view=discord.utils.MISSING, **kwargs):
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        if view is not discord.utils.MISSING:
+            self.view = view
+        self.edits.append((time.monotonic(), embed))
+
+class FakeChannel:
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.sent = []
+
+        self.messages = {}
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        message = FakeMessage(self, content, embed, view)
+        self.sent.append(message)
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        message = self.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        return message
+
+    async def purge(self, limit=100, **kwargs):
+        self.messages.clear()
+
+class FakeGuild:
+    """Every channel ID resolves to a FakeChannel, so handlers never hit 'channel not found'"""
+
+    def __init__(self, guild_id, members=()):
+        self.id = guild_id
+        self.name = "Benchmark Guild"
+        self._members = {member.id: member for member in members}
+        self._channels = {}
+        self.roles = []
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def member_count(self):
+        return len(self._members)
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    async def fetch_member(self, member_id):
+        member = self._members.get(member_id)
+        if member is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Member")
+        return member
+
+    def get_channel(self, channel_id):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = FakeChannel(channel_id, self)
+        return channel
+
+    def get_role(self, role_id):
+        return FakeRole(role_id)
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+        self.messages = []
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, content=None, embed=None, view=None, **kwargs):
+        self.done = True
+        self.messages.append((content, embed, view))
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        self.done = True
+        self.messages.append((content, embed, view))
+
+    async def send_modal(self, modal):
+        self.done = True
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        self.messages.append((content, embed, view))
+        return FakeMessage(None, content, embed, view)
+
+class FakeInteraction:
+    def __init__(self, guild, user, channel=None, command=None):
+        self.id = next_snowflake()
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel or guild.get_channel(next_snowflake())
+        self.channel_id = self.channel.id
+        self.command = command
+        self.type = discord.InteractionType.application_command
+        self.created_at = discord.utils.utcnow()
+        self.extras = {}
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
@@ -0,0 +1,137 @@
+"""
+Compare startup cost of the full and lean gateway modes (LEAN_GATEWAY in SFCRP_bot.py).
+
+    python -m bench.gateway_startup --members 50k --active 2000
+
+Each mode runs in its own subprocess. Full mode gets what chunk_guilds_at_startup
+delivers: GUILD_MEMBERS_CHUNK events of 1000 members, decoded and parsed by
+discord.py, then the member name index on_ready builds. Lean mode gets no chunks;
+instead --active distinct members interact once each and land in the bounded member
+cache. The report has wall time for that work, members held, and process RSS.
+Time spent waiting on the gateway for chunks is not modelled, so full mode's real
+startup is slower than reported here.
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.datasets import generate_members, parse_size
+from bench.fake_discord import bot_user_payload, user_payload
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK_SIZE = 1000  # Discord's GUILD_MEMBERS_CHUNK size
+STAFF_EVERY = 40   # One member in this many holds a staff role
+
+def member_payload(member, roles):
+    return {"user": user_payload(member.id, member.name), "nick": member.display_name, "roles": roles,
+            "joined_at": "2025-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+def run_worker(mode, member_count, active, result_path):
+    os.chdir(tempfile.mkdtemp(prefix=f"sfcrp-gateway-{mode}-"))
+    sys.path.insert(0, REPO_ROOT)
+    import discord
+    import diagnostics
+
+    started = time.perf_counter()
+    sfcrp = importlib.import_module("SFCRP_bot")
+    import_seconds = time.perf_counter() - started
+
+    state = sfcrp.bot._connection
+    state.user = discord.ClientUser(state=state, data=bot_user_payload())
+    guild = state._add_guild_from_data({
+        "id": str(sfcrp.GUILD_ID), "name": "Startup Guild", "icon": None, "owner_id": "1",
+        "roles": [{"id": str(role_id), "name": f"role-{role_id}", "color": 0, "hoist": False, "position": index,
+                   "permissions": "0", "managed": False, "mentionable": True}
+                  for index, role_id in enumerate([sfcrp.GUILD_ID, sfcrp.ROLE_STAFF_ADMIN])],
+        "channels": [], "members": [], "member_count": member_count, "features": [], "emojis": [], "stickers": [],
+        "large": True,
+    })
+    members = generate_members(member_count)
+    staff_role = [str(sfcrp.ROLE_STAFF_ADMIN)]
+    gc.collect()
+    rss_before = diagnostics.process_rss()
+
+    started = time.perf_counter()
+    if mode == "full":
+        # Registered the way Guild.chunk() does, so discord.py caches the chunked members
+        request = discord.state.ChunkRequest(guild.id, 0, None, state._get_guild, cache=True)
+        state._chunk_requests[request.nonce] = request
+        chunk_count = (member_count + CHUNK_SIZE - 1) // CHUNK_SIZE
+        for chunk_index in range(chunk_count):
+            batch = members[chunk_index * CHUNK_SIZE:(chunk_index + 1) * CHUNK_SIZE]
+            raw = json.dumps({
+                "guild_id": str(guild.id), "chunk_index": chunk_index, "chunk_count": chunk_count, "nonce": request.nonce,
+                "members": [member_payload(member, staff_role if member.id % STAFF_EVERY == 0 else []) for member in batch],
+            })
+            state.parse_guild_members_chunk(json.loads(raw))
+        sfcrp.build_member_name_index(guild)
+    else:
+        sfcrp.build_member_name_index(guild)
+        for member in members[:active]:
+            raw = json.dumps(member_payload(member, staff_role if member.id % STAFF_EVERY == 0 else []))
+            sfcrp.remember_member(discord.Member(data=json.loads(raw), guild=guild, state=state))
+    work_seconds = time.perf_counter() - started
+
+    gc.collect()
+    rss_after = diagnostics.process_rss()
+    result = {
+        "mode": mode,
+        "import_seconds": import_seconds,
+        "startup_work_seconds": work_seconds,
+        "members_cached": len(guild.members) + len(sfcrp.member_cache),
+        "name_index_members": len(sfcrp.member_name_indexes[guild.id].names),
+        "users_cached": len(state._users),
+        "rss_bytes": rss_after,
+        "rss_growth_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+def run(args):
+    member_count = parse_size(args.members)
+    results = {}
+    for mode in ("full", "lean"):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_path = f.name
+        env = {**os.environ, "LEAN_GATEWAY": "1" if mode == "lean" else "0"}
+        subprocess.run(
+            [sys.executable, "-m", "bench.gateway_startup", "--worker", mode, "--members", str(member_count),
+             "--active", str(args.active), "--result", result_path],
+            cwd=REPO_ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        with open(result_path, encoding='utf-8') as f:
+            results[mode] = json.load(f)
+        os.remove(result_path)
+
+        result = results[mode]
+        print(f"  {mode:<5} startup work {result['startup_work_seconds']:7.2f} s   members held {result['members_cached']:>8}"
+              f"   RSS {result['rss_bytes'] / 1024 / 1024:7.1f} MiB (+{(result['rss_growth_bytes'] or 0) / 1024 / 1024:.1f})")
+
+    report = {"config": {"members": member_count, "active": args.active}, "results": results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.gateway_startup", description="Full vs lean gateway startup cost")
+    parser.add_argument("--members", default="50k", help="Guild member count, e.g. 50k")
+    parser.add_argument("--active", type=int, default=2000, help="Distinct members who interact in lean mode")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here")
+    parser.add_argument("--worker", choices=("full", "lean"), help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, parse_size(args.members), args.active, args.result)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main()
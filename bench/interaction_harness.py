@@ -0,0 +1,292 @@
+"""
+Fire bursts of concurrent interactions through the real command tree and views, with
+all REST traffic going to bench.fake_discord, and report ack latency per command.
+
+    python -m bench.interaction_harness --commands logrp,vote,promote --concurrency 50 --rounds 3
+
+Interactions enter exactly where gateway INTERACTION_CREATE events do
+(ConnectionState.parse_interaction_create), so throttling, checks, views and the
+discord.py HTTP rate limiter are all in the path. An interaction counts as acked when
+the fake server receives its callback; Discord drops anything slower than 3 seconds.
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import discord
+
+from bench.datasets import generate_members
+from bench.fake_discord import FakeDiscordServer, user_payload
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACK_DEADLINE = 3.0
+SETTLE_TIMEOUT = 15.0  # seconds to wait for stragglers after a burst
+
+class InteractionFactory:
+    """Builds INTERACTION_CREATE payloads for the harness guild"""
+
+    def __init__(self, bot, guild_id, channel_id):
+        self.bot = bot
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.ids = itertools.count()
+
+    def next_id(self):
+        # Snowflakes carry their creation time, which discord.py uses for created_at
+        return discord.utils.time_snowflake(discord.utils.utcnow()) + next(self.ids) % 4096
+
+    def member_payload(self, member, roles=()):
+        return {
+            "user": user_payload(member.id, member.name),
+            "nick": member.display_name,
+            "roles": [str(role) for role in roles],
+            "joined_at": "2025-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+            "permissions": "0",
+        }
+
+    def base(self, interaction_type, member, roles):
+        interaction_id = self.next_id()
+        return interaction_id, {
+            "id": str(interaction_id),
+            "application_id": str(self.bot.application_id),
+            "type": interaction_type,
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "guild_id": str(self.guild_id),
+            "channel_id": str(self.channel_id),
+            "channel": {"id": str(self.channel_id), "type": 0, "guild_id": str(self.guild_id), "name": "general",
+                        "position": 0, "permission_overwrites": []},
+            "member": self.member_payload(member, roles),
+            "app_permissions": "8",
+            "attachment_size_limit": 8 * 1024 * 1024,
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "entitlements": [],
+            "context": 0,
+        }
+
+    def command(self, name, member, roles=(), options=(), resolved=None):
+        interaction_id, payload = self.base(2, member, roles)
+        payload["data"] = {
+            "id": str(self.next_id()),
+            "name": name,
+            "type": 1,
+            "guild_id": str(self.guild_id),
+            "options": list(options),
+        }
+        if resolved:
+            payload["data"]["resolved"] = resolved
+        return interaction_id, payload
+
+    def button(self, message, custom_id, member, roles=()):
+        interaction_id, payload = self.base(3, member, roles)
+        payload["message"] = message
+        payload["data"] = {"custom_id": custom_id, "component_type": 2}
+        return interaction_id, payload
+
+def guild_payload(bot, guild_id, members, channel_ids, role_ids):
+    return {
+        "id": str(guild_id),
+        "name": "Harness Guild",
+        "icon": None,
+        "owner_id": str(members[0].id),
+        "roles": [{"id": str(role_id), "name": f"role-{role_id}", "color": 0, "hoist": False, "position": index,
+                   "permissions": "0", "managed": False, "mentionable": True}
+                  for index, role_id in enumerate([guild_id, *role_ids])],
+        "channels": [{"id": str(channel_id), "type": 0, "name": f"channel-{channel_id}", "position": index,
+                      "permission_overwrites": []} for index, channel_id in enumerate(channel_ids)],
+        "members": [{"user": user_payload(member.id, member.name), "nick": member.display_name, "roles": [],
+                     "joined_at": "2025-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+                    for member in members] + [{"user": user_payload(bot.user.id, bot.user.name, bot=True), "roles": [],
+                                               "joined_at": "2025-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}],
+        "member_count": len(members) + 1,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "verification_level": 0,
+        "default_message_notifications": 0,
+        "explicit_content_filter": 0,
+        "mfa_level": 0,
+        "premium_tier": 0,
+        "preferred_locale": "en-US",
+        "large": False,
+    }
+
+# =========================================================
+# SCENARIOS
+# =========================================================
+
+async def setup_vote(ctx):
+    """Post one SSV and return its message payload for the button clicks"""
+    interaction_id, payload = ctx.factory.command("ssv", ctx.staff, roles=ctx.staff_roles)
+    ctx.bot._connection.parse_interaction_create(payload)
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while time.monotonic() < deadline:
+        for message in ctx.server.messages.values():
+            custom_ids = [c.get("custom_id") for row in message["components"] for c in row.get("components", [])]
+            if "vote_yes_persistent" in custom_ids:
+                return message
+        await asyncio.sleep(0.05)
+    raise RuntimeError("/ssv never posted its vote message")
+
+def build_payload(ctx, command, index):
+    member = ctx.members[index % len(ctx.members)]
+    if command == "logrp":
+        party = [ctx.members[(index + offset) % len(ctx.members)] for offset in (1, 2)]
+        return ctx.factory.command("logrp", member, options=[
+            {"name": "location", "type": 3, "value": "Downtown Bank"},
+            {"name": "description", "type": 3, "value": f"Harness robbery #{index}"},
+            {"name": "participants", "type": 3, "value": f"<@{party[0].id}>, {party[1].display_name}"},
+        ])
+    if command == "vote":
+        return ctx.factory.button(ctx.vote_message, "vote_yes_persistent", member)
+    if command == "promote":
+        target = ctx.members[(index + 1) % len(ctx.members)]
+        return ctx.factory.command("promote", ctx.staff_pool[index % len(ctx.staff_pool)], roles=ctx.staff_roles, options=[
+            {"name": "member", "type": 6, "value": str(target.id)},
+            {"name": "new_rank", "type": 3, "value": "Sergeant"},
+        ], resolved={
+            "users": {str(target.id): user_payload(target.id, target.name)},
+            "members": {str(target.id): {"nick": target.display_name, "roles": [], "joined_at": "2025-01-01T00:00:00+00:00",
+                                         "deaf": False, "mute": False, "flags": 0, "permissions": "0"}},
+        })
+    raise ValueError(f"Unknown command: {command}")
+
+async def run_burst(ctx, command, concurrency, offset):
+    dispatched = {}
+    for index in range(concurrency):
+        interaction_id, payload = build_payload(ctx, command, offset + index)
+        dispatched[interaction_id] = time.monotonic()
+        ctx.bot._connection.parse_interaction_create(payload)
+
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while time.monotonic() < deadline and not all(i in ctx.server.callbacks for i in dispatched):
+        await asyncio.sleep(0.05)
+
+    latencies, outcomes = [], Counter()
+    for interaction_id, sent_at in dispatched.items():
+        callback = ctx.server.callbacks.get(interaction_id)
+        if callback is None:
+            outcomes["never_acked"] += 1
+            continue
+        received_at, body = callback
+        latency = received_at - sent_at
+        latencies.append(latency)
+        content = (body.get("data") or {}).get("content") or ""
+        if latency > ACK_DEADLINE:
+            outcomes["missed_deadline"] += 1
+        if content.startswith("⏳"):
+            outcomes["throttled"] += 1
+        elif content.startswith("❌") or content.startswith("⛔"):
+            outcomes["error"] += 1
+    return latencies, outcomes
+
+def summarize(latencies, outcomes, dispatched):
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+    return {
+        "dispatched": dispatched,
+        "acked": len(latencies),
+        "ack_ms": {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": pick(1.0)},
+        **{key: outcomes.get(key, 0) for key in ("missed_deadline", "never_acked", "throttled", "error")},
+    }
+
+class HarnessContext:
+    pass
+
+async def start_harness(members, latency=0.04, jitter=0.015, route_limits=None, no_throttle=False, vote_goal=10**6,
+                        extra_role_ids=(), extra_channel_ids=()):
+    """
+    Import the bot into a scratch directory, log it in against a fresh FakeDiscordServer
+    and add the harness guild with these members. Returns a HarnessContext.
+    """
+    os.chdir(tempfile.mkdtemp(prefix="sfcrp-interactions-"))
+    sys.path.insert(0, REPO_ROOT)
+    sfcrp = importlib.import_module("SFCRP_bot")
+    bot = sfcrp.bot
+
+    server = FakeDiscordServer(latency=latency, jitter=jitter, route_limits=route_limits)
+    discord.http.Route.BASE = await server.start()
+    await bot.login("harness-token")
+
+    staff_roles = [sfcrp.ROLE_STAFF_ADMIN, *sfcrp.ALLOWED_ROLES]
+    channel_ids = {sfcrp.ANNOUNCE_CHANNEL_ID, sfcrp.CHANNEL_RP_LOGS, sfcrp.CHANNEL_PROMOTIONS, sfcrp.TRAINING_CHANNEL_ID, 1, *extra_channel_ids}
+    role_ids = set(staff_roles + [sfcrp.PING_ROLE_ID, *extra_role_ids]) - {sfcrp.GUILD_ID}
+    guild = bot._connection._add_guild_from_data(
+        guild_payload(bot, sfcrp.GUILD_ID, members, sorted(channel_ids), role_ids)
+    )
+    sfcrp.build_member_name_index(guild)
+
+    if no_throttle:
+        sfcrp.command_buckets.take = lambda limits: 0
+    sfcrp.guild_configs.get(sfcrp.GUILD_ID).ssu_vote_goal = vote_goal
+
+    ctx = HarnessContext()
+    ctx.sfcrp, ctx.bot, ctx.server, ctx.guild, ctx.members = sfcrp, bot, server, guild, members
+    ctx.staff, ctx.staff_roles = members[0], staff_roles
+    ctx.factory = InteractionFactory(bot, sfcrp.GUILD_ID, 1)
+    return ctx
+
+async def stop_harness(ctx):
+    await ctx.bot.close()
+    await ctx.server.stop()
+
+async def run(args):
+    members = generate_members(max(args.concurrency * 2, 50))
+    ctx = await start_harness(
+        members, latency=args.latency / 1000, jitter=args.jitter / 1000,
+        route_limits={} if args.no_route_limits else None, no_throttle=args.no_throttle, vote_goal=args.vote_goal
+    )
+    server = ctx.server
+    ctx.staff_pool = members[:max(1, args.concurrency // 4)]
+
+    report = {"config": vars(args), "commands": {}}
+    for command in args.commands.split(","):
+        if command == "vote":
+            ctx.vote_message = await setup_vote(ctx)
+        latencies, outcomes = [], Counter()
+        for round_index in range(args.rounds):
+            burst_latencies, burst_outcomes = await run_burst(ctx, command, args.concurrency, round_index * args.concurrency)
+            latencies += burst_latencies
+            outcomes += burst_outcomes
+            await asyncio.sleep(args.pause)
+        report["commands"][command] = summarize(latencies, outcomes, args.concurrency * args.rounds)
+
+    report["rest_requests"] = dict(server.requests)
+    report["rate_limited"] = dict(server.rate_limited)
+
+    await stop_harness(ctx)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.interaction_harness", description="Concurrent interaction load test")
+    parser.add_argument("--commands", default="logrp,vote,promote", help="Comma-separated: logrp, vote, promote")
+    parser.add_argument("--concurrency", type=int, default=25, help="Interactions per burst")
+    parser.add_argument("--rounds", type=int, default=3, help="Bursts per command")
+    parser.add_argument("--pause", type=float, default=2.0, help="Seconds between bursts")
+    parser.add_argument("--latency", type=float, default=40, help="Fake REST latency in ms")
+    parser.add_argument("--jitter", type=float, default=15, help="Fake REST jitter in ms")
+    parser.add_argument("--vote-goal", type=int, default=10**6, help="SSU vote goal during the run (default: never reached)")
+    parser.add_argument("--no-throttle", action="store_true", help="Bypass the bot's per-user/guild command throttling")
+    parser.add_argument("--no-route-limits", action="store_true", help="Disable simulated Discord route rate limits")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Replay a recording made with INTERACTION_RECORD_DIR (see recorder.py) through the real
+command tree and views, with all REST traffic going to bench.fake_discord.
+
+    python -m bench.replay interactions-20260101-120000.jsonl.gz --speed 10 --seed-size 10k
+
+Each recorded interaction is dispatched at its recorded offset divided by --speed, so
+bursts keep their shape while a day of traffic replays in minutes. Users are the
+recording's pseudonyms with their recorded roles; --seed-size fills storage with
+synthetic RP logs and sessions first so commands that read history have data.
+
+Button clicks are pointed at the latest message the bot posted with the same
+custom_id. Clicks whose custom_id the bot never posted (non-persistent views, which
+get random IDs) are still dispatched against a stand-in message and counted as
+unmatched; they only reach a handler if the view is persistent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+from bench.datasets import generate_rp_logs, generate_sessions, parse_size
+from bench.fake_discord import user_payload
+from bench.fakes import FakeMember
+from bench.interaction_harness import ACK_DEADLINE, SETTLE_TIMEOUT, start_harness, stop_harness, summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from recorder import read_recording
+
+USER_OPTION_TYPES = (6, 9)
+
+def recording_members(entries):
+    """One member per pseudonymous user seen in the recording, as invoker or option value"""
+    user_ids = set()
+
+    def collect(options):
+        for option in options or []:
+            collect(option.get("options"))
+            if option.get("type") in USER_OPTION_TYPES:
+                user_ids.add(int(option["value"]))
+
+    for entry in entries:
+        user_ids.add(entry["user"])
+        collect(entry.get("options"))
+    return [FakeMember(user_id, f"user{user_id % 100000:05d}") for user_id in sorted(user_ids)]
+
+def resolved_payload(ctx, options):
+    """The resolved block Discord attaches for user options"""
+    users, members = {}, {}
+
+    def collect(options):
+        for option in options or []:
+            collect(option.get("options"))
+            if option.get("type") in USER_OPTION_TYPES:
+                member = ctx.members_by_id.get(int(option["value"]))
+                if member:
+                    users[str(member.id)] = user_payload(member.id, member.name)
+                    members[str(member.id)] = {"nick": None, "roles": [], "joined_at": "2025-01-01T00:00:00+00:00",
+                                               "deaf": False, "mute": False, "flags": 0, "permissions": "0"}
+
+    collect(options)
+    return {"users": users, "members": members} if users else None
+
+def find_component_message(ctx, custom_id):
+    for message in reversed(list(ctx.server.messages.values())):
+        for row in message["components"]:
+            if any(component.get("custom_id") == custom_id for component in row.get("components", [])):
+                return message
+    return None
+
+def build_replay_payload(ctx, entry, outcomes):
+    member = ctx.members_by_id[entry["user"]]
+    roles = entry.get("roles", [])
+
+    if entry["type"] in (2, 4):
+        interaction_id, payload = ctx.factory.command(
+            entry["name"], member, roles=roles, options=entry.get("options") or [],
+            resolved=resolved_payload(ctx, entry.get("options"))
+        )
+        payload["type"] = entry["type"]
+    else:
+        custom_id = entry["custom_id"]
+        message = find_component_message(ctx, custom_id)
+        if message is None:
+            outcomes["unmatched_component"] += 1
+            message = ctx.server.message_payload(entry.get("channel") or 1, {"components": [
+                {"type": 1, "components": [{"type": 2, "style": 1, "label": "replay", "custom_id": custom_id}]}
+            ]})
+        interaction_id, payload = ctx.factory.button(message, custom_id, member, roles=roles)
+        payload["data"]["component_type"] = entry.get("component_type", 2)
+        if entry.get("values"):
+            payload["data"]["values"] = entry["values"]
+
+    if entry.get("channel"):
+        payload["channel_id"] = str(entry["channel"])
+        payload["channel"]["id"] = str(entry["channel"])
+    return interaction_id, payload
+
+def seed_storage(ctx, size):
+    """Synthetic history written through the bot's own save functions, as bench run does"""
+    sfcrp = ctx.sfcrp
+    guild_id = ctx.guild.id
+    sfcrp.save_rp_logs(guild_id, generate_rp_logs(size, guild_id, ctx.members))
+    session_data = generate_sessions(size, guild_id, ctx.members)
+    sfcrp.save_session_data(guild_id, session_data)
+    sfcrp.save_session_stats(guild_id, sfcrp.rebuild_session_stats(session_data["sessions"]))
+    sfcrp.archive_old_rp_logs(guild_id)
+    sfcrp.location_tries[str(guild_id)] = sfcrp.build_location_trie(guild_id)
+    sfcrp.rp_search_indexes[guild_id] = sfcrp.build_rp_search_index(guild_id)
+    sfcrp.rp_search_indexes[guild_id].ready = True
+    sfcrp.save_member_profiles(guild_id, sfcrp.rebuild_member_profiles(guild_id))
+
+def entry_label(entry):
+    if entry["type"] == 3:
+        return f"button:{entry['custom_id']}"
+    label = entry["name"]
+    options = entry.get("options") or []
+    # Subcommands (/schedule ssv) are reported by their full name
+    while options and options[0].get("type") in (1, 2):
+        label += f" {options[0]['name']}"
+        options = options[0].get("options") or []
+    return f"autocomplete:{label}" if entry["type"] == 4 else label
+
+async def run(args):
+    entries = [entry for entry in read_recording(args.recording) if entry.get("guild")]
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        raise SystemExit("Recording has no guild interactions to replay")
+
+    members = recording_members(entries)
+    ctx = await start_harness(
+        members, latency=args.latency / 1000, jitter=args.jitter / 1000,
+        route_limits={} if args.no_route_limits else None, no_throttle=args.no_throttle,
+        extra_role_ids={role for entry in entries for role in entry.get("roles", [])},
+        extra_channel_ids={entry["channel"] for entry in entries if entry.get("channel")},
+    )
+    ctx.members_by_id = {member.id: member for member in members}
+    if args.seed_size:
+        seed_storage(ctx, parse_size(args.seed_size))
+    ctx.sfcrp.build_member_name_index(ctx.guild)
+
+    dispatched = {}  # interaction ID -> (label, monotonic dispatch time)
+    outcomes = Counter()
+    drift = []
+    started_at = time.monotonic()
+    base_offset = entries[0]["t"]
+    for entry in entries:
+        due = started_at + (entry["t"] - base_offset) / args.speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            drift.append(-delay)
+        interaction_id, payload = build_replay_payload(ctx, entry, outcomes)
+        dispatched[interaction_id] = (entry_label(entry), time.monotonic())
+        ctx.bot._connection.parse_interaction_create(payload)
+
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while time.monotonic() < deadline and not all(i in ctx.server.callbacks for i in dispatched):
+        await asyncio.sleep(0.05)
+    replay_seconds = time.monotonic() - started_at
+
+    latencies, command_outcomes = defaultdict(list), defaultdict(Counter)
+    for interaction_id, (label, sent_at) in dispatched.items():
+        callback = ctx.server.callbacks.get(interaction_id)
+        if callback is None:
+            command_outcomes[label]["never_acked"] += 1
+            continue
+        received_at, body = callback
+        latency = received_at - sent_at
+        latencies[label].append(latency)
+        content = (body.get("data") or {}).get("content") or ""
+        if latency > ACK_DEADLINE:
+            command_outcomes[label]["missed_deadline"] += 1
+        if content.startswith("⏳"):
+            command_outcomes[label]["throttled"] += 1
+        elif content.startswith("❌") or content.startswith("⛔"):
+            command_outcomes[label]["error"] += 1
+
+    dispatch_counts = Counter(label for label, _ in dispatched.values())
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    report = {
+        "config": vars(args),
+        "recording": {"interactions": len(entries), "users": len(members), "span_seconds": entries[-1]["t"] - base_offset},
+        "replay_seconds": round(replay_seconds, 3),
+        "dispatch_lag_ms": {"behind": len(drift), "max": max(drift) * 1000 if drift else 0.0},
+        "unmatched_components": outcomes["unmatched_component"],
+        "overall": summarize(all_latencies, sum(command_outcomes.values(), Counter()), len(dispatched)),
+        "commands": {label: summarize(latencies[label], command_outcomes[label], count)
+                     for label, count in dispatch_counts.most_common()},
+        "rest_requests": dict(ctx.server.requests),
+        "rate_limited": dict(ctx.server.rate_limited),
+    }
+
+    await stop_harness(ctx)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench.replay", description="Replay recorded interaction traffic")
+    parser.add_argument("recording", help="interactions-*.jsonl.gz written by the bot's recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression; 10 replays an hour in 6 minutes")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N interactions")
+    parser.add_argument("--seed-size", default=None, help="Seed storage with synthetic history first, e.g. 10k")
+    parser.add_argument("--latency", type=float, default=40, help="Fake REST latency in ms")
+    parser.add_argument("--jitter", type=float, default=15, help="Fake REST jitter in ms")
+    parser.add_argument("--no-throttle", action="store_true", help="Bypass the bot's per-user/guild command throttling")
+    parser.add_argument("--no-route-limits", action="store_true", help="Disable simulated Discord route rate limits")
+    parser.add_argument("--out", default=None, help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
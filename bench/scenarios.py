@@ -0,0 +1,61 @@
+"""
+Benchmark scenarios. Each one drives a real command callback (or the helper it
+delegates to) against fake Discord objects and the on-disk dataset.
+"""
+from discord import app_commands
+
+SCENARIOS = []
+
+def scenario(name, iterations=1.0):
+    """Register a scenario; iterations scales the run's --iterations for slow or writing paths"""
+    def decorator(func):
+        SCENARIOS.append((name, iterations, func))
+        return func
+    return decorator
+
+def choice(value):
+    return app_commands.Choice(name=value, value=value)
+
+@scenario("logrp", iterations=0.2)
+async def logrp(ctx, rng):
+    party = rng.sample(ctx.members, 3)
+    participants = f"{party[0].mention}, {party[1].display_name} and {party[2].name}"
+    await ctx.bot.logrp.callback(ctx.interaction(), "Downtown Bank", "Benchmark robbery with a short pursuit.", participants)
+
+@scenario("rplog_hot")
+async def rplog_hot(ctx, rng):
+    await ctx.bot.rplog.callback(ctx.interaction(), rng.randint(ctx.hot_min_id, ctx.max_id))
+
+@scenario("rplog_archived")
+async def rplog_archived(ctx, rng):
+    if ctx.hot_min_id <= 1:
+        return
+    await ctx.bot.rplog.callback(ctx.interaction(), rng.randint(1, ctx.hot_min_id - 1))
+
+@scenario("rpleaderboard_uncached", iterations=0.5)
+async def rpleaderboard_uncached(ctx, rng):
+    ctx.bot.leaderboard_cache.clear()
+    category = rng.choice(["logged", "participated", "locations"])
+    period = rng.choice(["all", "month"])
+    await ctx.bot.rpleaderboard.callback(ctx.interaction(), choice(category), choice(period))
+
+@scenario("rpleaderboard_cached")
+async def rpleaderboard_cached(ctx, rng):
+    await ctx.bot.rpleaderboard.callback(ctx.interaction(), choice("logged"), choice("all"))
+
+@scenario("sessionhistory")
+async def sessionhistory(ctx, rng):
+    await ctx.bot.sessionhistory.callback(ctx.interaction())
+
+@scenario("sessionhistory_page")
+async def sessionhistory_page(ctx, rng):
+    # Jump to a random page via its cursor, as the Next button does
+    sessions = ctx.bot.load_session_data(ctx.guild.id)["sessions"]
+    cursor = ctx.bot.encode_session_cursor(sessions[rng.randrange(len(sessions))])
+    interaction = ctx.interaction()
+    view = ctx.bot.SessionHistoryView(interaction.user.id, None, cursor)
+    await view.show_page(interaction, before=cursor)
+
+@scenario("sessionstats")
+async def sessionstats(ctx, rng):
+    await ctx.bot.sessionstats.callback(ctx.interaction())
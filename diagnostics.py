@@ -0,0 +1,206 @@
+import asyncio
+import gc
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter, deque
+import logging
+
+import discord
+from discord.ext import tasks
+
+import metrics
+
+logger = logging.getLogger('discord_bot')
+
+# =========================================================
+# CONSTANTS
+# =========================================================
+
+HEARTBEAT_INTERVAL = 0.1      # seconds between event-loop heartbeats
+STALL_THRESHOLD = 0.25        # loop lag (seconds) that counts as a stall
+STACK_SAMPLE_INTERVAL = 0.02  # how often the watchdog thread samples a stalled loop
+STALL_HISTORY = 50            # recent stalls kept for /botperf
+STACK_DEPTH = 12              # frames kept per sampled stack
+TRACEMALLOC_FRAMES = 5        # traceback depth recorded while tracemalloc is running
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# =========================================================
+# EVENT-LOOP WATCHDOG
+# =========================================================
+
+class LoopWatchdog:
+    """
+    A heartbeat task stamps the time every HEARTBEAT_INTERVAL. A daemon thread checks the
+    stamp; once it is STALL_THRESHOLD late the loop is blocked, and the thread samples the
+    loop thread's stack until the heartbeat comes back. The most frequent stack is logged
+    with the innermost frame from our own code, which is the one to fix.
+    """
+
+    def __init__(self):
+        self.last_beat = time.monotonic()
+        self.loop_thread_id = None
+        self.thread = None
+        self.heartbeat_task = None
+        self.stall_count = 0
+        self.stall_seconds = 0.0
+        self.longest_stall = 0.0
+        self.recent_stalls = deque(maxlen=STALL_HISTORY)
+
+    def start(self):
+        """Start from inside the running event loop; safe to call more than once"""
+        if self.heartbeat_task is None or self.heartbeat_task.done():
+            self.loop_thread_id = threading.get_ident()
+            self.last_beat = time.monotonic()
+            self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self.thread.start()
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.last_beat = time.monotonic()
+            metrics.loop_lag.observe(max(0.0, self.last_beat - before - HEARTBEAT_INTERVAL))
+
+    def _sample_stack(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return None
+        return tuple((f.filename, f.lineno, f.name) for f in traceback.extract_stack(frame)[-STACK_DEPTH:])
+
+    def _watch(self):
+        samples = None
+        stall_beat = None
+        while True:
+            time.sleep(STACK_SAMPLE_INTERVAL)
+            beat = self.last_beat
+            lag = time.monotonic() - beat - HEARTBEAT_INTERVAL
+
+            if lag > STALL_THRESHOLD:
+                if samples is None:
+                    samples = Counter()
+                    stall_beat = beat
+                stack = self._sample_stack()
+                if stack:
+                    samples[stack] += 1
+            elif samples is not None and beat != stall_beat:
+                self._record_stall(beat - stall_beat - HEARTBEAT_INTERVAL, samples)
+                samples = None
+
+    def _record_stall(self, duration, samples):
+        stack, hits = samples.most_common(1)[0] if samples else ((), 0)
+        own_frames = [f for f in stack if f[0].startswith(PROJECT_DIR) and f[0] != __file__]
+        culprit = own_frames[-1] if own_frames else (stack[-1] if stack else None)
+        where = f"{culprit[2]} ({os.path.basename(culprit[0])}:{culprit[1]})" if culprit else "unknown"
+
+        self.stall_count += 1
+        self.stall_seconds += duration
+        self.longest_stall = max(self.longest_stall, duration)
+        self.recent_stalls.append({"at": time.time(), "duration": duration, "where": where})
+        metrics.loop_stalls.inc()
+
+        formatted = "".join(traceback.format_list([traceback.FrameSummary(f, l, n) for f, l, n in stack]))
+        logger.warning(
+            f"Event loop blocked for {duration * 1000:.0f} ms in {where} "
+            f"({hits}/{sum(samples.values())} samples):\n{formatted}"
+        )
+
+watchdog = LoopWatchdog()
+
+
+# =========================================================
+# ON-DEMAND MEMORY INSPECTION
+# =========================================================
+
+def process_rss():
+    """Resident set size in bytes, or None where it cannot be read cheaply"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Peak, not current
+    except ImportError:
+        return None
+
+def count_live_views():
+    """Live discord.ui.View instances by class name; walks the GC heap, so only call on demand"""
+    return Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, discord.ui.View))
+
+def loop_status(loop):
+    """One-line state of a tasks.Loop or asyncio.Task"""
+    if isinstance(loop, tasks.Loop):
+        if loop.failed():
+            return "❌ failed"
+        if not loop.is_running():
+            return "⏸️ stopped"
+        next_run = loop.next_iteration
+        return f"✅ running (#{loop.current_loop}" + (f", next <t:{int(next_run.timestamp())}:R>)" if next_run else ")")
+    if loop is None:
+        return "⏸️ not started"
+    if loop.done():
+        return "❌ failed" if not loop.cancelled() and loop.exception() else "⏸️ finished"
+    return "✅ running"
+
+def cog_loops(bot):
+    """(cog name, attribute, tasks.Loop) for every loop defined on a loaded cog"""
+    for cog_name, cog in bot.cogs.items():
+        for attribute, value in vars(type(cog)).items():
+            if isinstance(value, tasks.Loop):
+                yield cog_name, attribute, getattr(cog, attribute)
+
+class MemoryTracer:
+    """
+    tracemalloc is only running between start() and stop(), so allocation tracing
+    costs nothing until staff ask for it. diff() compares against the baseline
+    snapshot taken at start().
+    """
+
+    def __init__(self):
+        self.baseline = None
+        self.started_at = None
+
+    @property
+    def active(self):
+        return tracemalloc.is_tracing() and self.baseline is not None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.baseline = tracemalloc.take_snapshot()
+        self.started_at = time.time()
+
+    def diff(self, limit=10):
+        """Top allocation sites by growth since start(), as (site, size diff, count diff)"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.compare_to(self.baseline, "lineno")[:limit]
+        return [
+            (f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size_diff, stat.count_diff)
+            for stat in stats
+        ]
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = None
+        self.started_at = None
+
+memory_tracer = MemoryTracer()
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
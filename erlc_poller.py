@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+logger = logging.getLogger("discord_bot")
+
+# =========================================================
+# CONSTANTS
+# =========================================================
+
+load_dotenv()
+
+# Optional worker mode: run `python -m erlc_poller` next to the bot with the same
+# ERLC_POLLER_SOCKET, and it owns all ERLC traffic, pushing a compact status snapshot
+# to the bot over this Unix socket. Unset, or while the worker is down, status.py
+# polls in-process as before.
+ERLC_POLLER_SOCKET = os.getenv("ERLC_POLLER_SOCKET")
+ERLC_API_KEY = os.getenv("ERLC_API_KEY")
+ERLC_API_URL = os.getenv("ERLC_API_URL", "https://api.policeroleplay.community/v1/server")
+
+POLL_SECONDS = 30            # Same cadence as ERLCStatus.update_task
+STALE_AFTER_POLLS = 3        # The bot falls back once the newest snapshot is this many polls old
+RECONNECT_SECONDS = 5        # Bot-side delay between connection attempts
+REQUEST_TIMEOUT_SECONDS = 10
+CLIENT_BUFFER_LIMIT = 64 * 1024  # A bot this far behind on reading is dropped; it reconnects and gets the latest
+CLIENT_DRAIN_SECONDS = 5         # ...as is one that doesn't take a snapshot within this long
+
+
+# =========================================================
+# SNAPSHOTS
+# =========================================================
+
+def snapshot_from_api(data, latency=None, error=None):
+    """The fields the status board shows, from an ERLC /v1/server response (None if the call failed)"""
+    server = data["server"] if data else {}
+    return {
+        "at": time.time(),
+        "players": server.get("playerCount", "?"),
+        "queue": server.get("queueLength", "?"),
+        "latency": latency,
+        "error": error,
+    }
+
+def encode_snapshot(snapshot):
+    return (json.dumps(snapshot, separators=(",", ":")) + "\n").encode()
+
+
+# =========================================================
+# WORKER
+# =========================================================
+
+class SnapshotPublisher:
+    """Unix socket server that pushes every snapshot to all connected bots; a new connection gets the latest at once"""
+
+    def __init__(self, path):
+        self.path = path
+        self.clients = set()
+        self.latest = None
+        self.server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Left behind by a worker that did not shut down cleanly
+        self.server = await asyncio.start_unix_server(self.handle_client, path=self.path)
+
+    async def handle_client(self, reader, writer):
+        self.clients.add(writer)
+        if self.latest:
+            writer.write(self.latest)
+        try:
+            await reader.read()  # Bots never send anything; this returns when they disconnect
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def drop(self, writer, reason):
+        logger.warning(f"Dropping poller client: {reason}")
+        self.clients.discard(writer)
+        writer.transport.abort()  # close() would wait to send what the client isn't reading
+
+    async def send(self, writer):
+        if writer.transport.get_write_buffer_size() > CLIENT_BUFFER_LIMIT:
+            self.drop(writer, "write buffer over limit")
+            return
+        writer.write(self.latest)
+        try:
+            await asyncio.wait_for(writer.drain(), CLIENT_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            self.drop(writer, "not reading")
+        except ConnectionError:
+            self.clients.discard(writer)
+
+    async def publish(self, snapshot):
+        self.latest = encode_snapshot(snapshot)
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+        # Concurrently, so one slow bot doesn't hold up the others
+        await asyncio.gather(*(self.send(writer) for writer in list(self.clients)))
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in self.clients:
+            writer.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def poll_once(session):
+    """One ERLC request with one reused HTTP session; returns a snapshot either way"""
+    started = time.perf_counter()
+    try:
+        async with session.get(ERLC_API_URL, headers={"Authorization": ERLC_API_KEY or ""}) as r:
+            if r.status != 200:
+                return snapshot_from_api(None, time.perf_counter() - started, str(r.status))
+            data = await r.json()
+    except Exception:
+        return snapshot_from_api(None, time.perf_counter() - started, "exception")
+    return snapshot_from_api(data, time.perf_counter() - started)
+
+async def run_poller(path, interval=POLL_SECONDS):
+    publisher = SnapshotPublisher(path)
+    await publisher.start()
+    logger.info(f"ERLC poller publishing to {path} every {interval}s")
+
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                started = time.monotonic()
+                await publisher.publish(await poll_once(session))
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        await publisher.stop()
+
+
+# =========================================================
+# BOT SIDE
+# =========================================================
+
+class SnapshotClient:
+    """Keeps a connection to the worker open and holds the newest snapshot it published"""
+
+    def __init__(self, path, on_snapshot=None):
+        self.path = path
+        self.on_snapshot = on_snapshot
+        self.latest = None
+        self.connected = False
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+
+            self.connected = True
+            logger.info(f"Connected to ERLC poller at {self.path}")
+            try:
+                while line := await reader.readline():
+                    self.latest = json.loads(line)
+                    if self.on_snapshot:
+                        self.on_snapshot(self.latest)
+            except (OSError, ValueError):
+                pass
+            finally:
+                self.connected = False
+                writer.close()
+            logger.warning("ERLC poller connection lost; polling in-process until it is back")
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def fresh(self, max_age):
+        """The newest snapshot if the worker is connected and published it within max_age seconds, else None"""
+        if self.connected and self.latest and time.time() - self.latest["at"] <= max_age:
+            return self.latest
+        return None
+
+
+# =========================================================
+# ENTRY POINT
+# =========================================================
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m erlc_poller", description="Poll the ERLC API for the bot in a separate process")
+    parser.add_argument("--socket", default=ERLC_POLLER_SOCKET, help="Unix socket path (default: $ERLC_POLLER_SOCKET)")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Seconds between polls")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("set ERLC_POLLER_SOCKET or pass --socket")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(run_poller(args.socket, args.interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
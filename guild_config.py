@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger("discord_bot")
+
+# =========================================================
+# CONSTANTS
+# =========================================================
+
+# {"guilds": {"<guild ID>": {"announce_channel_id": 123, ...}, ...}}
+# Without this file the bot serves only its home guild, with the built-in IDs.
+GUILD_CONFIG_FILE = os.getenv("GUILD_CONFIG_FILE", "guild_config.json")
+
+# Every per-guild setting and its default. IDs default to None, which the commands
+# treat like a deleted channel or role.
+SETTINGS = {
+    "staff_role_ids": [],
+    "rp_logger_role_id": None,
+    "ping_role_id": None,
+    "training_ping_role_id": None,
+    "announce_channel_id": None,
+    "promotions_channel_id": None,
+    "infractions_channel_id": None,
+    "rp_logs_channel_id": None,
+    "training_channel_id": None,
+    "training_results_channel_id": None,
+    "affiliate_channel_id": None,
+    "ssu_vote_goal": 5,
+    "low_player_threshold": 3,
+    # ERLC status board (status.py); /stup is refused where no status channel is set
+    "status_channel_id": None,
+    "session_host_role_id": None,
+    "owner_id": None,
+    # Embed banner images; a guild without one gets embeds with no banner
+    "promotion_banner_url": None,
+    "infraction_banner_url": None,
+    "session_banner_url": None,
+}
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+
+class GuildConfig:
+    """One guild's settings, as attributes named after SETTINGS"""
+
+    def __init__(self, guild_id, values):
+        self.guild_id = guild_id
+        for name, default in SETTINGS.items():
+            value = values.get(name, default)
+            if name.endswith("_ids"):
+                value = [int(item) for item in value]
+            elif name.endswith("_id") and value is not None:
+                value = int(value)
+            setattr(self, name, value)
+
+    def is_staff(self, member) -> bool:
+        return any(role.id in self.staff_role_ids for role in getattr(member, "roles", ()))
+
+class GuildConfigStore:
+    """
+    Every configured guild's settings, read once into a dict indexed by guild ID.
+    The home guild's missing settings fall back to home_defaults.
+    """
+
+    def __init__(self, path, home_guild_id, home_defaults):
+        self.path = path
+        self.home_guild_id = home_guild_id
+        self.home_defaults = home_defaults
+        self.configs = {}
+        self.mtime = None
+
+    def read(self):
+        """Parse the config file into a new {guild ID: GuildConfig} dict"""
+        raw = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f).get("guilds", {})
+
+        configs = {}
+        for guild_id, values in raw.items():
+            unknown = set(values) - set(SETTINGS)
+            if unknown:
+                logger.warning(f"Guild config {guild_id}: ignoring unknown settings {', '.join(sorted(unknown))}")
+            guild_id = int(guild_id)
+            if guild_id == self.home_guild_id:
+                values = {**self.home_defaults, **values}
+            configs[guild_id] = GuildConfig(guild_id, values)
+
+        if self.home_guild_id not in configs:
+            configs[self.home_guild_id] = GuildConfig(self.home_guild_id, self.home_defaults)
+        return configs
+
+    def file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        self.mtime = self.file_mtime()
+        self.configs = self.read()
+        logger.info(f"Loaded config for {len(self.configs)} guild(s)")
+
+    def reload(self, force=False):
+        """
+        Re-read the file if it changed since the last load (or always, with force) and swap
+        the new configs in. A file that fails to parse leaves the current configs in place.
+        Returns True if the configs were swapped.
+        """
+        mtime = self.file_mtime()
+        if mtime == self.mtime and not force:
+            return False
+        self.mtime = mtime
+        try:
+            configs = self.read()
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Guild config {self.path} not reloaded, keeping the current one: {e}")
+            return False
+        # One assignment, so a command sees either the old configs or the new ones, never a mix
+        self.configs = configs
+        logger.info(f"Reloaded config for {len(configs)} guild(s)")
+        return True
+
+    def get(self, guild_id) -> GuildConfig:
+        """Settings for a guild; an unconfigured guild gets the empty defaults"""
+        config = self.configs.get(guild_id)
+        if config is None:
+            config = GuildConfig(guild_id, {})
+        return config
+
+    @property
+    def guild_ids(self):
+        return list(self.configs)
@@ -0,0 +1,208 @@
+import asyncio
+import bisect
+import functools
+import os
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+# =========================================================
+# CONSTANTS
+# =========================================================
+
+# The endpoint is off unless METRICS_PORT is set. It binds to localhost by default;
+# point Prometheus (or curl) at http://127.0.0.1:<port>/metrics
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RECENT_SAMPLES = 512     # observations kept per series for p50/p95 in /botperf
+
+
+# =========================================================
+# METRIC TYPES
+# =========================================================
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in pairs)
+    return "{" + body + "}"
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        self.values[_label_key(labels)] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, help_text, function=None):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self.function = function  # Read at scrape time instead of being pushed
+
+    def set(self, value, **labels):
+        self.values[_label_key(labels)] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.function:
+            try:
+                self.set(self.function())
+            except Exception:
+                pass
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.series = {}  # label key -> [bucket counts, sum, count, recent samples]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=RECENT_SAMPLES)]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+        series[3].append(value)
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def quantiles(self, *qs):
+        """Recent-sample quantiles per label set, e.g. {(("command", "logrp"),): (p50, p95)}"""
+        result = {}
+        for key, (_, _, _, recent) in self.series.items():
+            if recent:
+                samples = sorted(recent)
+                result[key] = tuple(samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs)
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count, _) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+# =========================================================
+# BOT METRICS
+# =========================================================
+
+command_latency = Histogram("sfcrp_command_duration_seconds", "Slash command handler duration, by command and outcome")
+interaction_ack_latency = Histogram("sfcrp_interaction_ack_seconds", "Time from interaction creation to the first response, rounded up to a bucket bound")
+erlc_latency = Histogram("sfcrp_erlc_request_seconds", "ERLC API request duration")
+erlc_errors = Counter("sfcrp_erlc_errors_total", "ERLC API failures, by reason")
+status_edits = Counter("sfcrp_status_edits_total", "Status board embed edits, by result")
+storage_latency = Histogram("sfcrp_storage_seconds", "JSON storage load/save duration, by store and operation")
+loop_lag = Histogram("sfcrp_event_loop_lag_seconds", "Extra delay of a scheduled event-loop wakeup", buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5))
+loop_stalls = Counter("sfcrp_event_loop_stalls_total", "Times the event loop was blocked past the watchdog threshold")
+gateway_latency = Gauge("sfcrp_gateway_latency_seconds", "Discord gateway heartbeat latency")
+
+REGISTRY = [command_latency, interaction_ack_latency, erlc_latency, erlc_errors, status_edits, storage_latency, loop_lag, loop_stalls, gateway_latency]
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def time_storage(store, operation):
+    """Decorator recording how long a synchronous load/save helper takes"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with storage_latency.time(store=store, operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# =========================================================
+# INSTRUMENTATION
+# =========================================================
+
+# Discord drops an interaction that isn't acknowledged within this many seconds
+ACK_DEADLINE = 3
+# is_done() is checked at the histogram's own bucket bounds, so each ack still lands in the right bucket
+ACK_CHECKPOINTS = tuple(bound for bound in LATENCY_BUCKETS if 0.05 <= bound < ACK_DEADLINE) + (ACK_DEADLINE,)
+
+_ack_watches = set()
+
+async def watch_interaction_ack(interaction, command):
+    """
+    Record how long after its creation an interaction was first answered, using only the
+    public is_done() flag. Acks missing the deadline are recorded as ACK_DEADLINE with kind "missed".
+    """
+    created_at = interaction.created_at.timestamp()
+    for checkpoint in ACK_CHECKPOINTS:
+        delay = created_at + checkpoint - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if interaction.response.is_done():
+            kind = interaction.response.type.name if interaction.response.type else "unknown"
+            interaction_ack_latency.observe(checkpoint, command=command, kind=kind)
+            return
+    interaction_ack_latency.observe(ACK_DEADLINE, command=command, kind="missed")
+
+def start_ack_watch(interaction, command):
+    task = asyncio.create_task(watch_interaction_ack(interaction, command))
+    _ack_watches.add(task)
+    task.add_done_callback(_ack_watches.discard)
+
+
+# =========================================================
+# HTTP ENDPOINT
+# =========================================================
+
+async def handle_metrics(request):
+    return web.Response(body=render().encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def start_metrics_server(port, host=METRICS_HOST):
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, int(port)).start()
+    return runner
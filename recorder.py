@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import discord
+
+# =========================================================
+# CONSTANTS
+# =========================================================
+
+# Recording is off unless INTERACTION_RECORD_DIR is set. Each bot start writes one
+# interactions-<UTC timestamp>.jsonl.gz there; replay it with python -m bench.replay
+INTERACTION_RECORD_DIR = os.getenv("INTERACTION_RECORD_DIR")
+# Pseudonyms are keyed with this salt; leave unset for a random salt per recording
+INTERACTION_RECORD_SALT = os.getenv("INTERACTION_RECORD_SALT")
+RECORD_FLUSH_EVERY = 50       # records between gzip flushes
+RECORD_FLUSH_SECONDS = 30.0   # ...or this long, whichever comes first
+
+MENTION_RE = re.compile(r"<(@[!&]?|#)(\d{15,20})>")
+WORD_RE = re.compile(r"[^\W\d_]+|\d+", re.UNICODE)
+KEEP_WORDS = {"and", "AND", "And"}  # Separators the participant parser relies on
+PSEUDONYM_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+# =========================================================
+# SANITIZING
+# =========================================================
+
+class Sanitizer:
+    """
+    Deterministic keyed pseudonyms: the same user ID or word always maps to the same
+    replacement within a recording, so cardinality, lengths and repeat patterns survive
+    while the real values do not.
+    """
+
+    def __init__(self, salt):
+        self.salt = salt
+
+    def _digest(self, value):
+        return hmac.new(self.salt, str(value).encode(), hashlib.sha256).digest()
+
+    def user_id(self, user_id):
+        # Keep a snowflake-sized number so it still parses as a Discord ID
+        return 1_000_000_000_000_000_000 + int.from_bytes(self._digest(f"id:{user_id}")[:8], "big") % 10**18
+
+    def word(self, word):
+        if word in KEEP_WORDS:
+            return word
+        digest = self._digest(f"word:{word.lower()}")
+        if word.isdigit():
+            return "".join(str(byte % 10) for byte in digest[:len(word)]).ljust(len(word), "0")
+        letters = "".join(PSEUDONYM_LETTERS[byte % 26] for byte in (digest * (len(word) // 32 + 1))[:len(word)])
+        return letters.capitalize() if word[:1].isupper() else letters
+
+    def mention(self, match):
+        prefix, snowflake = match.groups()
+        # Role and channel mentions point at server structure, not people
+        if prefix in ("@", "@!"):
+            snowflake = self.user_id(snowflake)
+        return f"<{prefix}{snowflake}>"
+
+    def text(self, text):
+        pieces, last = [], 0
+        for match in MENTION_RE.finditer(text):
+            pieces.append(WORD_RE.sub(lambda m: self.word(m.group(0)), text[last:match.start()]))
+            pieces.append(self.mention(match))
+            last = match.end()
+        pieces.append(WORD_RE.sub(lambda m: self.word(m.group(0)), text[last:]))
+        return "".join(pieces)
+
+def choice_parameters(command):
+    """Names of parameters whose values come from a fixed choice list (safe to keep verbatim)"""
+    if command is None or not hasattr(command, "parameters"):
+        return set()
+    return {param.name for param in command.parameters if param.choices}
+
+def sanitize_options(sanitizer, options, keep):
+    sanitized = []
+    for option in options or []:
+        option = dict(option)
+        if "options" in option:
+            option["options"] = sanitize_options(sanitizer, option["options"], keep)
+        elif option.get("type") in (6, 9):  # user, mentionable
+            option["value"] = str(sanitizer.user_id(option["value"]))
+        elif option.get("type") == 3 and option["name"] not in keep:
+            option["value"] = sanitizer.text(option["value"])
+        sanitized.append(option)
+    return sanitized
+
+
+# =========================================================
+# RECORDER
+# =========================================================
+
+class InteractionRecorder:
+    def __init__(self, directory, salt=None):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"interactions-{datetime.utcnow():%Y%m%d-%H%M%S}.jsonl.gz")
+        self.sanitizer = Sanitizer((salt or os.urandom(32).hex()).encode())
+        self.file = gzip.open(self.path, "wt", encoding="utf-8")
+        self.started_at = time.monotonic()
+        self.flushed_at = self.started_at
+        self.pending = 0
+
+    def record(self, interaction: discord.Interaction):
+        data = interaction.data or {}
+        entry = {
+            "t": round(time.monotonic() - self.started_at, 3),
+            "type": interaction.type.value,
+            "guild": interaction.guild_id,
+            "channel": interaction.channel_id,
+            "user": self.sanitizer.user_id(interaction.user.id),
+            "roles": [role.id for role in getattr(interaction.user, "roles", [])[1:]],
+        }
+        if interaction.type in (discord.InteractionType.application_command, discord.InteractionType.autocomplete):
+            entry["name"] = data.get("name")
+            entry["options"] = sanitize_options(self.sanitizer, data.get("options"), choice_parameters(interaction.command))
+        elif interaction.type is discord.InteractionType.component:
+            entry["custom_id"] = data.get("custom_id")
+            entry["component_type"] = data.get("component_type")
+            entry["values"] = [self.sanitizer.text(value) for value in data.get("values", [])]
+            entry["message"] = self.sanitizer.user_id(interaction.message.id) if interaction.message else None
+        else:
+            return
+
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.pending += 1
+        if self.pending >= RECORD_FLUSH_EVERY or time.monotonic() - self.flushed_at >= RECORD_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.flushed_at = time.monotonic()
+        self.pending = 0
+
+    def close(self):
+        self.file.close()
+
+def read_recording(path):
+    """Yield recorded entries; a recording cut off mid-write is read up to the damage"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+        except EOFError:
+            return
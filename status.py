@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
@@ -5,6 +6,9 @@ import aiohttp
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import time
+import metrics
+import erlc_poller
 
 # =========================================================
 # CONSTANTS
@@ -12,9 +16,8 @@ import os
 
 load_dotenv()
 
-MASTER_ID = 1185802371062833152
-HOST_ROLE_ID = 1427472494151077938
-CHANNEL_ID = 1427153224330248213
+# The status channel, host role and owner are per guild: status_channel_id,
+# session_host_role_id and owner_id in guild_config.json
 
 # Insert your ERLC key here:
 ERLC_API_KEY =os.getenv("ERLC_API_KEY")
@@ -23,7 +26,27 @@ SERVER_NAME = "San Francisco City Roleplay"
 SERVER_CODE = "SSCRPP"
 SERVER_OWNER = "Mushy_patato04"
 
-ERLC_API_URL = "https://api.policeroleplay.community/v1/server"
+# Override to point at a local stand-in (see bench/fake_erlc.py)
+ERLC_API_URL = os.getenv("ERLC_API_URL", "https://api.policeroleplay.community/v1/server")
+
+# The live status embed is only edited when a shown value changes, or at least this
+# often so "Last Updated" stays honest
+STATUS_REFRESH_SECONDS = 300
+
+
+# =========================================================
+# STATUS BOARD
+# =========================================================
+
+class StatusBoard:
+    """One guild's posted status embeds and what its live embed last showed"""
+
+    def __init__(self):
+        self.message_ids = []
+        self.session_start = None
+        self.status_message = None  # Live status message, kept to edit without refetching
+        self.shown_status = None    # (players, queue, uptime) last written to it
+        self.shown_at = 0.0
 
 
 # =========================================================
@@ -33,10 +56,18 @@ ERLC_API_URL = "https://api.policeroleplay.community/v1/server"
 class ERLCStatus(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.message_ids = []
-        self.session_start = None
+        # Board state survives /reload: cog_unload leaves it on the bot for the new instance
+        state = getattr(bot, "erlc_status_state", None) or {}
+        self.boards = state.get("boards", {})  # int guild ID -> StatusBoard
+        self.poller = erlc_poller.SnapshotClient(erlc_poller.ERLC_POLLER_SOCKET, self.record_snapshot) if erlc_poller.ERLC_POLLER_SOCKET else None
         self.update_task.start()
 
+    def cog_unload(self):
+        self.update_task.cancel()
+        if self.poller:
+            self.poller.stop()
+        self.bot.erlc_status_state = {"boards": self.boards}
+
     # =====================================================
     # API FETCH
     # =====================================================
@@ -47,14 +78,34 @@ class ERLCStatus(commands.Cog):
 
         headers = {"Authorization": ERLC_API_KEY}
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(ERLC_API_URL, headers=headers) as r:
-                    if r.status != 200:
-                        return None
-                    return await r.json()
-        except:
-            return None
+        with metrics.erlc_latency.time():
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(ERLC_API_URL, headers=headers) as r:
+                        if r.status != 200:
+                            metrics.erlc_errors.inc(reason=str(r.status))
+                            return None
+                        return await r.json()
+            except asyncio.CancelledError:
+                raise  # The loop is being stopped (cog unload), not an API failure
+            except:
+                metrics.erlc_errors.inc(reason="exception")
+                return None
+
+    def record_snapshot(self, snapshot):
+        """Worker snapshots carry the worker's request timing, so /metrics looks the same in both modes"""
+        if snapshot["latency"] is not None:
+            metrics.erlc_latency.observe(snapshot["latency"])
+        if snapshot["error"]:
+            metrics.erlc_errors.inc(reason=snapshot["error"])
+
+    async def get_snapshot(self):
+        """The worker's snapshot while it is fresh, otherwise one in-process API call"""
+        if self.poller:
+            snapshot = self.poller.fresh(erlc_poller.STALE_AFTER_POLLS * self.update_task.seconds)
+            if snapshot:
+                return snapshot
+        return erlc_poller.snapshot_from_api(await self.get_api())
 
     # =====================================================
     # AUTO UPDATE LOOP
@@ -64,47 +115,65 @@ class ERLCStatus(commands.Cog):
     async def update_task(self):
         await self.bot.wait_until_ready()
 
-        if not self.message_ids:
+        boards = {guild_id: board for guild_id, board in self.boards.items() if board.message_ids}
+        if not boards:
             return
 
-        channel = self.bot.get_channel(CHANNEL_ID)
-        if not channel:
-            return
+        # One ERLC server, so one snapshot feeds every guild's board
+        snapshot = await self.get_snapshot()
+        for guild_id, board in boards.items():
+            channel = self.bot.get_channel(self.bot.guild_configs.get(guild_id).status_channel_id or 0)
+            if channel:
+                await self.update_board(board, channel, snapshot)
 
-        data = await self.get_api()
-        players = data["server"].get("playerCount", "?") if data else "?"
-        queue = data["server"].get("queueLength", "?") if data else "?"
+    async def update_board(self, board, channel, snapshot):
+        players = snapshot["players"]
+        queue = snapshot["queue"]
 
-        if self.session_start:
-            delta = datetime.utcnow() - self.session_start
+        if board.session_start:
+            delta = datetime.utcnow() - board.session_start
             uptime = f"{int(delta.total_seconds() // 60)} minutes"
         else:
             uptime = "?"
 
+        # Only edit when something shown changed
+        status = (str(players), str(queue), uptime)
+        if status == board.shown_status and time.monotonic() - board.shown_at < STATUS_REFRESH_SECONDS:
+            metrics.status_edits.inc(result="unchanged")
+            return
+
         embed = discord.Embed(color=discord.Color.blue())
-        embed.add_field(name="Last Updated:", value=f"<t:{int(datetime.utcnow().timestamp())}:R>", inline=True)
+        embed.add_field(name="Last Updated:", value=f"<t:{int(snapshot['at'])}:R>", inline=True)
         embed.add_field(name="Players:", value=str(players), inline=True)
         embed.add_field(name="Queue:", value=str(queue), inline=True)
         embed.add_field(name="Session Uptime:", value=uptime, inline=True)
 
         try:
-            msg = await channel.fetch_message(self.message_ids[3])
-            await msg.edit(embed=embed)
+            if board.status_message is None:
+                board.status_message = await channel.fetch_message(board.message_ids[3])
+            await board.status_message.edit(embed=embed)
+            board.shown_status = status
+            board.shown_at = time.monotonic()
+            metrics.status_edits.inc(result="ok")
         except:
-            pass
+            board.status_message = None
+            metrics.status_edits.inc(result="error")
 
     @update_task.before_loop
     async def before_update(self):
         await self.bot.wait_until_ready()
+        # Connect from the loop the task runs on
+        if self.poller:
+            self.poller.start()
 
     # =====================================================
     # SEND EMBEDS
     # =====================================================
 
-    async def send_embeds(self, channel):
+    async def send_embeds(self, channel, config):
 
-        self.message_ids = []
-        self.session_start = datetime.utcnow()
+        board = StatusBoard()
+        board.session_start = datetime.utcnow()
 
         # =========================
         # EMBED 0 — BIG BANNER
@@ -118,7 +187,7 @@ class ERLCStatus(commands.Cog):
 
         embed1 = discord.Embed(color=discord.Color.blue())
         embed1.add_field(name="Info:", value="For info on sessions, read **#shouts**.", inline=True)
-        embed1.add_field(name="Session Hosters:", value=f"<@&{HOST_ROLE_ID}> +", inline=True)
+        embed1.add_field(name="Session Hosters:", value=f"<@&{config.session_host_role_id}> +" if config.session_host_role_id else "Staff", inline=True)
         embed1.add_field(name="Assistance:", value="If help is needed, please open a ticket.", inline=True)
 
         # =========================
@@ -142,7 +211,12 @@ class ERLCStatus(commands.Cog):
 
         for embed in (banner, embed1, embed2, embed3):
             msg = await channel.send(embed=embed)
-            self.message_ids.append(msg.id)
+            board.message_ids.append(msg.id)
+        board.status_message = msg
+        self.boards[channel.guild.id] = board
+
+    def is_host(self, member, config):
+        return member.id == config.owner_id or config.session_host_role_id in [r.id for r in getattr(member, "roles", [])]
 
     # =====================================================
     # !STUP — TEXT COMMAND
@@ -154,15 +228,16 @@ class ERLCStatus(commands.Cog):
         if isinstance(ctx.channel, discord.DMChannel):
             return
 
-        if ctx.author.id != MASTER_ID and HOST_ROLE_ID not in [r.id for r in ctx.author.roles]:
+        config = self.bot.guild_configs.get(ctx.guild.id)
+        if not self.is_host(ctx.author, config):
             return
 
-        channel = ctx.guild.get_channel(CHANNEL_ID)
+        channel = ctx.guild.get_channel(config.status_channel_id or 0)
         if not channel:
             return
 
         await channel.purge(limit=50)
-        await self.send_embeds(channel)
+        await self.send_embeds(channel, config)
 
     # =====================================================
     # /STUP — SLASH COMMAND
@@ -171,16 +246,22 @@ class ERLCStatus(commands.Cog):
     @app_commands.command(name="stup", description="Rebuild all SFCRP embeds.")
     async def stup_slash(self, interaction: discord.Interaction):
 
-        user = interaction.user
+        if interaction.guild is None:
+            await interaction.response.send_message("This only works in a server.", ephemeral=True)
+            return
 
-        if user.id != MASTER_ID and HOST_ROLE_ID not in [r.id for r in user.roles]:
-            await interaction.response.send_message("You cannot use this.", ephemeral=True)
+        config = self.bot.guild_configs.get(interaction.guild_id)
+        channel = interaction.guild.get_channel(config.status_channel_id or 0)
+        if not channel:
+            await interaction.response.send_message("This server has no status channel set up.", ephemeral=True)
             return
 
-        channel = interaction.guild.get_channel(CHANNEL_ID)
+        if not self.is_host(interaction.user, config):
+            await interaction.response.send_message("You cannot use this.", ephemeral=True)
+            return
 
         await channel.purge(limit=50)
-        await self.send_embeds(channel)
+        await self.send_embeds(channel, config)
 
         await interaction.response.send_message("Embeds rebuilt.", ephemeral=True)
 
@@ -191,10 +272,10 @@ class ERLCStatus(commands.Cog):
     @commands.command(name="dqa")
     async def dqa_toggle(self, ctx, *, role_name: str):
 
-        if ctx.author.id != MASTER_ID:
+        if isinstance(ctx.channel, discord.DMChannel):
             return  # silent
 
-        if isinstance(ctx.channel, discord.DMChannel):
+        if ctx.author.id != self.bot.guild_configs.get(ctx.guild.id).owner_id:
             return  # silent
 
         guild = ctx.guild